@@ -0,0 +1,64 @@
+# benchmarks/bench_currencies.py
+"""
+Meerdere valuta's tegen de lokale stand-in server: requests per cyclus met
+alleen USD en met EUR+GBP+USD (moet gelijk blijven), en hoe goed de via de
+FX-tabel omgerekende Binance-prijzen (USDT) overeenkomen met een directe
+quote. De helft van de coins ontbreekt bij CoinGecko (Binance-fallback).
+
+Gebruik (vanuit de repo-root):
+    python3 -m benchmarks.bench_currencies
+"""
+
+import contextlib
+import io
+import json
+
+import fx
+import price
+from benchmarks.fake_exchange import FakeExchange
+from providers import default_registry
+from transport import HttpTransport
+
+FX = {"eur": 0.921734, "gbp": 0.788412}
+CYCLES = 3
+
+def _coins():
+    with open("coins.json") as f:
+        return json.load(f)["coins"]
+
+def run(coins, ex, currencies):
+    fx.set_currencies(currencies)
+    transport = HttpTransport(ex.base_url, ex.base_url)
+    registry = default_registry(transport, fx.fetch_currencies())
+    ex.requests = 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(CYCLES):
+            price.update_prices(coins, registry)
+    transport.close()
+    return ex.requests / CYCLES
+
+def main():
+    coins = _coins()
+    coingecko = {c.get("coingecko_id", c["id"]): 100.0 + i * 1.37 for i, c in enumerate(coins) if i % 2 == 0}
+    binance = {c["binance_symbol"]: 200.0 + i * 2.11 for i, c in enumerate(coins) if c.get("binance_symbol")}
+    fallback = [c for i, c in enumerate(coins) if i % 2 and c.get("binance_symbol")]
+    ex = FakeExchange(coingecko, binance, fx=FX).start()
+    print(f"{len(coins)} coins, {len(fallback)} via Binance fallback")
+
+    for currencies in ("usd", "eur,gbp"):
+        n = run(coins, ex, currencies)
+        print(f"  {currencies:>8}: {n:.0f} requests per cycle, cache keys {len(price.snapshot_prices())}")
+
+    print(f"  learned rates: " + ", ".join(f"{c} {fx.fx_table.rate(c):.6f}" for c in FX))
+    worst = 0.0
+    for coin in fallback:
+        usd = price.get_cached_price(coin, "usd")
+        for currency, rate in FX.items():
+            converted = price.get_cached_price(coin, currency)
+            worst = max(worst, abs(converted - usd * rate) / (usd * rate))
+            print(f"  {coin['symbol']:>5} {fx.format_price(usd, 'usd'):>10} -> {fx.format_price(converted, currency):>10}")
+    print(f"  worst relative error of converted prices: {worst * 100:.4f}%")
+    ex.stop()
+
+if __name__ == "__main__":
+    main()
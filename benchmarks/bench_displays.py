@@ -0,0 +1,78 @@
+# benchmarks/bench_displays.py
+"""
+Meerdere displays vanuit één proces: tikt de klok van het hoofd-display
+(480x320) op de hoofd-thread en meet hoeveel later de updates klaar zijn,
+zonder en met een groot extra display dat op z'n eigen DisplayWorker
+voortdurend volledige frames rendert. Laat ook zien hoeveel frames de
+worker daarbij overslaat in plaats van achter te gaan lopen.
+
+Gebruik (vanuit de repo-root):
+    python3 -m benchmarks.bench_displays
+    python3 -m benchmarks.bench_displays --mirror memory:,1920x1080,rot0 --ticks 100
+"""
+
+import argparse
+import time
+
+import framebuffer
+from dashboard import DashboardView
+from display_worker import DisplayWorker
+
+COINS = [
+    {"id": "cfx", "name": "Conflux", "symbol": "CFX", "color": "#0080FF"},
+    {"id": "sol", "name": "Solana", "symbol": "SOL", "color": "#9945FF"},
+]
+COLOR = (247, 147, 26)
+
+def _percentile(ordered, p):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+def run(primary, worker, ticks, interval):
+    primary.draw_dashboard(65000, COLOR, COINS[0], 1.0)
+    now = time.time()
+    late = []
+    for i in range(ticks):
+        if worker is not None:
+            coin = COINS[i % 2]
+            worker.submit("frame", lambda view, coin=coin, i=i: view.draw_dashboard(65000 + i, COLOR, coin, 1.0))
+            worker.submit("values", lambda view, coin=coin, i=i: view.update_coin_value_area_variable(
+                coin["symbol"], 0.1 + i / 1000, (0, 128, 255), flush=False))
+        deadline = time.perf_counter() + interval
+        t0 = time.perf_counter()
+        primary.update_clock_area(COLOR, flush=False, now=now + i)
+        primary.update_coin_value_area_variable("CFX", round(0.1 + i / 1000, 4), (0, 128, 255), flush=False)
+        primary.flush()
+        late.append((time.perf_counter() - t0) * 1000)
+        time.sleep(max(0.0, deadline - time.perf_counter()))
+    ordered = sorted(late)
+    return _percentile(ordered, 0.5), _percentile(ordered, 0.95), ordered[-1]
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-display benchmark")
+    parser.add_argument("--primary", default="memory:")
+    parser.add_argument("--mirror", default="memory:,1920x1080,rot0")
+    parser.add_argument("--ticks", type=int, default=60)
+    parser.add_argument("--interval", type=float, default=0.05)
+    args = parser.parse_args()
+
+    primary = DashboardView(args.primary)
+    primary.warm_fonts()
+    mirror = DashboardView(args.mirror)
+    mirror.warm_fonts()
+    print(f"primary {primary.layout}, mirror {mirror.layout}")
+
+    alone = run(primary, None, args.ticks, args.interval)
+    worker = DisplayWorker(mirror, COLOR).start()
+    shared = run(primary, worker, args.ticks, args.interval)
+    worker.stop()
+    w = worker.report()
+
+    print(f"{'primary update':>22} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+    print(f"{'alone':>22} {alone[0]:8.2f} {alone[1]:8.2f} {alone[2]:8.2f}")
+    print(f"{'with mirror worker':>22} {shared[0]:8.2f} {shared[1]:8.2f} {shared[2]:8.2f}")
+    print(f"mirror: {w['runs']} updates for {args.ticks} ticks ({w['replaced']} superseded), "
+          f"avg {w['avg_ms']:.1f} ms, max {w['max_ms']:.1f} ms")
+    framebuffer.get_framebuffer(args.mirror).close()
+
+if __name__ == "__main__":
+    main()
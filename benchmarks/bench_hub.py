@@ -0,0 +1,87 @@
+# benchmarks/bench_hub.py
+"""
+Hub-modus op loopback: één PriceHub zendt synthetische prijs-updates (een
+price_updater-cyclus per interval, alle coins in alle valuta's) via
+multicast naar veel HubClients in hetzelfde proces. Meet de fan-out latency
+(verzonden -> ontvangen), de bandbreedte van de hub en per client, en
+verloren pakketten. Client 0 houdt bij wat er binnenkomt; dat moet aan
+het eind gelijk zijn aan de cache van de hub.
+
+Gebruik (vanuit de repo-root):
+    python3 -m benchmarks.bench_hub
+    python3 -m benchmarks.bench_hub --clients 100 --coins 40 --rate 5 --duration 10
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import random
+import time
+
+import fx
+import price
+from hub import HubClient, PriceHub
+
+def _percentile(ordered, p):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+def main():
+    parser = argparse.ArgumentParser(description="Hub fan-out benchmark")
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--coins", type=int, default=30)
+    parser.add_argument("--currencies", default="usd,eur,gbp")
+    parser.add_argument("--rate", type=float, default=2.0, help="update cycles per second")
+    parser.add_argument("--duration", type=float, default=8.0)
+    parser.add_argument("--group", default="239.255.42.99")
+    parser.add_argument("--port", type=int, default=51999)
+    args = parser.parse_args()
+
+    fx.set_currencies(args.currencies)
+    currencies = fx.fetch_currencies()
+    rates = {"usd": 1.0, "eur": 0.92, "gbp": 0.79}
+    coins = [f"coin-{i}" for i in range(args.coins)]
+    prices = {c: random.uniform(0.01, 70000) for c in coins}
+
+    received_by_0 = {}
+    clients = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(args.clients):
+            feed = received_by_0.update if i == 0 else (lambda entries: None)
+            clients.append(HubClient(feed, args.group, args.port, "127.0.0.1", quiet_after=60).start())
+        hub = PriceHub(args.group, args.port, "127.0.0.1", full_interval=2.0).start()
+
+        cycles = 0
+        t_end = time.time() + args.duration
+        while time.time() < t_end:
+            for c in coins:
+                prices[c] *= random.uniform(0.999, 1.001)
+                price.set_quotes(c, {cur: round(prices[c] * rates.get(cur, 1.0), 4) for cur in currencies})
+            cycles += 1
+            time.sleep(1.0 / args.rate)
+        time.sleep(0.5)
+        hub.stop()
+        for client in clients:
+            client.stop()
+
+    latencies = sorted(l for client in clients for l in client.latencies)
+    received = [client.stats["packets"] for client in clients]
+    gaps = sum(client.stats["gaps"] for client in clients)
+    elapsed = args.duration
+    s = hub.stats
+    entry = s["bytes"] / max(1, s["entries"])
+    cache = price.snapshot_prices()
+    as_json = len(json.dumps({k: [p, int(t)] for k, (p, t) in cache.items()}, separators=(",", ":"))) / len(cache)
+    print(f"{args.clients} clients, {args.coins} coins x {len(currencies)} currencies, {cycles} update cycles")
+    print(f"hub: {s['packets']} packets ({s['delta']} delta, {s['full']} full), {s['bytes'] / elapsed / 1024:.1f} KB/s, "
+          f"~{entry:.1f} bytes per price (compact JSON ~{as_json:.1f})")
+    print(f"clients: {min(received)}-{max(received)} of {s['packets']} packets, {gaps} gaps, "
+          f"{sum(c.stats['bytes'] for c in clients) / elapsed / 1024:.1f} KB/s total on loopback")
+    print(f"fan-out latency: p50 {_percentile(latencies, 0.5) * 1000:.2f} ms, p95 {_percentile(latencies, 0.95) * 1000:.2f} ms, "
+          f"max {latencies[-1] * 1000:.2f} ms")
+    in_sync = sum(1 for k, (p, t) in cache.items() if received_by_0.get(k) == (p, float(int(t))))
+    print(f"client 0 in sync with the hub: {in_sync}/{len(cache)} prices; "
+          f"API requests: 1 hub instead of {args.clients + 1} Pis")
+
+if __name__ == "__main__":
+    main()
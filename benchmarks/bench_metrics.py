@@ -0,0 +1,90 @@
+# benchmarks/bench_metrics.py
+"""
+Overhead van metrics.py: kosten per observe()/inc() (uit en aan), dezelfde
+dashboard-workload (klok, coin-waarde, sparkline, flush) zonder en met
+metrics, en de kosten van één /metrics-scrape. Rekent dat om naar CPU% in
+de steady state van het dashboard (één update per seconde, scrape elke 15 s).
+
+Gebruik (vanuit de repo-root):
+    python3 -m benchmarks.bench_metrics
+    python3 -m benchmarks.bench_metrics --iterations 2000
+"""
+
+import argparse
+import time
+
+import framebuffer
+import metrics
+
+COIN = {"id": "sol", "name": "Solana", "symbol": "SOL", "color": "#9945FF"}
+COLOR = (247, 147, 26)
+SCRAPE_INTERVAL = 15
+
+def per_call_ns(func, n=200000):
+    t0 = time.perf_counter()
+    for _ in range(n):
+        func()
+    return (time.perf_counter() - t0) / n * 1e9
+
+def observations():
+    histograms = (metrics.RENDER_SECONDS, metrics.ENCODE_SECONDS, metrics.WRITE_SECONDS, metrics.TICK_LATENESS)
+    return sum(series[2] for h in histograms for series in h._series.values())
+
+def workload(view, iterations, start):
+    """Een 'dashboard-seconde' per iteratie; geeft CPU-seconden per iteratie."""
+    t0 = time.process_time()
+    for i in range(iterations):
+        now = start + i
+        view.update_clock_area(COLOR, flush=False, now=now)
+        view.update_coin_value_area_variable("SOL", round(140 + (i % 50) / 10, 1), (153, 69, 255), flush=False)
+        view.update_sparkline_area("sol", 30 + i, [140 + (k % 7) for k in range(i, i + 81)], (153, 69, 255), flush=False)
+        view.flush()
+        metrics.TICK_LATENESS.observe(0.0004)
+    return (time.process_time() - t0) / iterations
+
+def main():
+    parser = argparse.ArgumentParser(description="Metrics overhead benchmark")
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    framebuffer.set_default_display("memory:")
+    import dashboard
+    view = dashboard.default_view
+    view.draw_dashboard(65000, COLOR, COIN, 140.0)
+
+    metrics.enable(False)
+    off_obs = per_call_ns(lambda: metrics.RENDER_SECONDS.observe(0.001, "clock"))
+    metrics.enable(True)
+    on_obs = per_call_ns(lambda: metrics.RENDER_SECONDS.observe(0.001, "clock"))
+    on_inc = per_call_ns(lambda: metrics.WRITE_BYTES.inc(784, "memory:"))
+    print(f"observe(): {off_obs:.0f} ns disabled, {on_obs:.0f} ns enabled; inc(): {on_inc:.0f} ns enabled")
+
+    start = time.time()
+    workload(view, 20, start)  # warm-up
+    # Afwisselend meten: ruis van de machine valt zo in beide gevallen
+    off = on = 0.0
+    rounds = 5
+    before = observations()
+    for r in range(rounds):
+        metrics.enable(False)
+        off += workload(view, args.iterations // rounds, start + r * args.iterations)
+        metrics.enable(True)
+        on += workload(view, args.iterations // rounds, start + r * args.iterations + args.iterations // 2)
+    off /= rounds
+    on /= rounds
+    per_second = (observations() - before) / (args.iterations // rounds * rounds)
+
+    t0 = time.process_time()
+    for _ in range(50):
+        body = metrics.render()
+    scrape = (time.process_time() - t0) / 50
+
+    print(f"workload per dashboard-second: {off * 1000:.3f} ms CPU without, {on * 1000:.3f} ms with metrics "
+          f"({(on - off) / off * 100:+.1f}%, ~{per_second:.0f} observations)")
+    instrumentation = per_second * on_obs * 1e-9
+    print(f"scrape: {scrape * 1000:.2f} ms CPU for {len(body)} bytes")
+    print(f"steady state: instrumentation {instrumentation * 100:.4f}% CPU, "
+          f"scrape every {SCRAPE_INTERVAL}s {scrape / SCRAPE_INTERVAL * 100:.4f}% CPU")
+
+if __name__ == "__main__":
+    main()
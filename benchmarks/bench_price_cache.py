@@ -0,0 +1,84 @@
+# benchmarks/bench_price_cache.py
+"""
+Lock-contention benchmark: een writer die zo snel mogelijk prijzen zet,
+tegen readers die get_cached_price() aanroepen. Vergelijkt de oude
+dict+lock cache met de versioned snapshots uit price.py.
+
+Gebruik (vanuit de repo-root):
+    python3 -m benchmarks.bench_price_cache
+"""
+
+import threading
+import time
+
+import price
+
+COINS = [{"id": f"c{i}", "coingecko_id": f"coin-{i}"} for i in range(15)]
+
+class LockedCache:
+    """De oude aanpak: één dict met een lock voor elke read en write."""
+
+    def __init__(self):
+        self.cache = {}
+        self.lock = threading.Lock()
+
+    def set_price(self, coingecko_id, value):
+        with self.lock:
+            self.cache[coingecko_id] = value
+
+    def get_cached_price(self, coin):
+        with self.lock:
+            return self.cache.get(coin.get("coingecko_id", coin.get("id")))
+
+def _run(set_price, get_price, duration, readers):
+    stop = threading.Event()
+    counts = {"writes": 0, "reads": [0] * readers}
+
+    def writer():
+        i = 0
+        while not stop.is_set():
+            set_price(COINS[i % len(COINS)]["coingecko_id"], float(i))
+            i += 1
+        counts["writes"] = i
+
+    def reader(n):
+        reads = 0
+        while not stop.is_set():
+            for coin in COINS:
+                get_price(coin)
+            reads += len(COINS)
+        counts["reads"][n] = reads
+
+    threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader, args=(n,)) for n in range(readers)]
+    for t in threads:
+        t.start()
+    time.sleep(duration)
+    stop.set()
+    for t in threads:
+        t.join()
+    return counts["writes"] / duration, sum(counts["reads"]) / duration
+
+def _changed_checks(duration):
+    """Hoe snel kan de renderer vragen 'veranderd sinds versie N?'."""
+    snap = price.current_snapshot()
+    version = snap.version
+    ids = ("coin-0", "coin-1")
+    n = 0
+    end = time.perf_counter() + duration
+    while time.perf_counter() < end:
+        for _ in range(1000):
+            price.current_snapshot().changed_since(version, ids)
+        n += 1000
+    return n / duration
+
+def main(duration=1.0, readers=3):
+    old = LockedCache()
+    w_old, r_old = _run(old.set_price, old.get_cached_price, duration, readers)
+    w_new, r_new = _run(price.set_price, price.get_cached_price, duration, readers)
+    print(f"{readers} readers + 1 writer, {duration:.0f}s each")
+    print(f"  dict+lock : {w_old:10.0f} writes/s  {r_old:10.0f} reads/s")
+    print(f"  snapshots : {w_new:10.0f} writes/s  {r_new:10.0f} reads/s (reads take no lock)")
+    print(f"  changed_since() checks: {_changed_checks(duration / 2):.0f}/s")
+
+if __name__ == "__main__":
+    main()
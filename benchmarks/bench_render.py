@@ -0,0 +1,161 @@
+# benchmarks/bench_render.py
+"""
+Render-benchmark suite op een headless display-backend (standaard memory:).
+Meet per scenario de tijd per frame, bytes naar het display per frame en
+piekgeheugen, en schrijft alles naar een JSON-bestand zodat commits met
+elkaar te vergelijken zijn.
+
+Gebruik (vanuit de repo-root):
+    python3 -m benchmarks.bench_render --out bench_render.json
+    python3 -m benchmarks.bench_render --compare bench_render.json
+    python3 -m benchmarks.bench_render --display png:/tmp/frames/ --repeat 5
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import time
+import tracemalloc
+
+import framebuffer
+
+COINS = [
+    {"id": "cfx", "name": "Conflux", "symbol": "CFX", "color": "#0080FF"},
+    {"id": "sol", "name": "Solana", "symbol": "SOL", "color": "#9945FF"},
+]
+SETUP_COINS = [{"id": f"c{i}", "symbol": f"C{i}", "name": f"Coin {i}", "show": i % 2 == 0} for i in range(60)]
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _percentile(ordered, p):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+def _measure(display, setup, step, repeat):
+    """
+    setup() één keer, dan step(i) repeat keer voor tijd en bytes. Piekgeheugen
+    in een aparte korte ronde: tracemalloc vertraagt Python-code flink.
+    """
+    setup()
+    step(-1)  # warm-up (fonts, caches)
+    times = []
+    written = []
+    for i in range(repeat):
+        before = display.stats["bytes"]
+        t0 = time.perf_counter()
+        step(i)
+        times.append((time.perf_counter() - t0) * 1000)
+        written.append(display.stats["bytes"] - before)
+    tracemalloc.start()
+    for i in range(repeat, repeat + min(repeat, 5)):
+        step(i)
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    ordered = sorted(times)
+    return {
+        "frames": repeat,
+        "mean_ms": round(sum(times) / repeat, 3),
+        "p50_ms": round(_percentile(ordered, 0.5), 3),
+        "p95_ms": round(_percentile(ordered, 0.95), 3),
+        "min_ms": round(ordered[0], 3),
+        "bytes_per_frame": round(sum(written) / repeat),
+        "py_peak_kb": round(peak / 1024, 1),
+    }
+
+def run(repeat):
+    import dashboard
+    import setup_screen
+    display = framebuffer.get_framebuffer()
+    color = (247, 147, 26)
+    clock = {"now": time.time()}
+
+    def show_first():
+        dashboard.draw_dashboard(65000, color, COINS[0], 1.0)
+
+    def draw(i):
+        coin = COINS[i % 2]
+        dashboard.draw_dashboard(65000 + i % 7, color, coin, 1.0)
+
+    def clock_tick(i):
+        clock["now"] += 1
+        dashboard.update_clock_area(color, now=clock["now"])
+
+    def coin_value(i):
+        dashboard.update_coin_value_area_variable("CFX", round(0.1 + (i % 50) / 1000, 4), (0, 128, 255))
+
+    def setup_full(i):
+        setup_screen._screen.hide()
+        setup_screen.draw_coin_toggle_list(SETUP_COINS, scroll=i % 3, search_text="", search_focused=False)
+
+    def setup_scroll(i):
+        setup_screen.draw_coin_toggle_list(SETUP_COINS, scroll=i % 10, search_text="", search_focused=False)
+
+    def setup_toggle(i):
+        SETUP_COINS[1]["show"] = not SETUP_COINS[1]["show"]
+        setup_screen.draw_coin_toggle_list(SETUP_COINS, scroll=0, search_text="", search_focused=False)
+
+    cases = {
+        "draw_dashboard": (lambda: None, draw),
+        "update_clock_area": (show_first, clock_tick),
+        "update_coin_value_area_variable": (show_first, coin_value),
+        "draw_coin_toggle_list.full": (lambda: None, setup_full),
+        "draw_coin_toggle_list.scroll": (setup_screen._screen.hide, setup_scroll),
+        "draw_coin_toggle_list.toggle": (setup_screen._screen.hide, setup_toggle),
+    }
+    results = {}
+    for name, (setup, step) in cases.items():
+        results[name] = _measure(display, setup, step, repeat)
+    return results
+
+def compare(base, current):
+    print(f"{'case':>34} {'base ms':>9} {'now ms':>9} {'delta':>8} {'base B':>8} {'now B':>8}")
+    for name, now in current["cases"].items():
+        old = base.get("cases", {}).get(name)
+        if old is None:
+            print(f"{name:>34} {'-':>9} {now['p50_ms']:9.3f}")
+            continue
+        delta = (now["p50_ms"] - old["p50_ms"]) / old["p50_ms"] * 100 if old["p50_ms"] else 0.0
+        print(f"{name:>34} {old['p50_ms']:9.3f} {now['p50_ms']:9.3f} {delta:+7.1f}% "
+              f"{old['bytes_per_frame']:8d} {now['bytes_per_frame']:8d}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Render benchmark suite")
+    parser.add_argument("--display", default="memory:", help="display-spec (memory:, file:PATH, png:DIR)")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--out", help="resultaten als JSON wegschrijven")
+    parser.add_argument("--compare", help="vergelijk met een eerder JSON-resultaat")
+    args = parser.parse_args()
+
+    framebuffer.set_default_display(args.display)
+    cases = run(args.repeat)
+    result = {
+        "commit": _git_commit(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "display": args.display,
+        "repeat": args.repeat,
+        "maxrss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "cases": cases,
+    }
+    print(f"{'case':>34} {'p50 ms':>8} {'p95 ms':>8} {'bytes/frame':>12} {'py peak KB':>11}")
+    for name, r in cases.items():
+        print(f"{name:>34} {r['p50_ms']:8.3f} {r['p95_ms']:8.3f} {r['bytes_per_frame']:12d} {r['py_peak_kb']:11.1f}")
+    print(f"max RSS: {result['maxrss_kb'] / 1024:.1f} MB")
+    if args.compare and os.path.exists(args.compare):
+        with open(args.compare) as f:
+            compare(json.load(f), result)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"results written to {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+# benchmarks/bench_rgb565.py
+"""
+Micro-benchmark: batched RGB565-encoder vs. de oude per-pixel loop.
+
+Gebruik (vanuit de repo-root):
+    python3 -m benchmarks.bench_rgb565
+"""
+
+import os
+import time
+from PIL import Image
+
+from rgb565 import encode_rgb565, encode_rgb565_reference
+
+WIDTH, HEIGHT = 480, 320
+BG = os.path.join("backgrounds", "btc-bg.png")
+
+def _test_image():
+    if os.path.isfile(BG):
+        return Image.open(BG).convert("RGB").resize((WIDTH, HEIGHT))
+    return Image.frombytes("RGB", (WIDTH, HEIGHT), os.urandom(WIDTH * HEIGHT * 3))
+
+def _best_of(fn, img, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(img)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def main(repeat=5):
+    img = _test_image()
+    noise = Image.frombytes("RGB", (WIDTH, HEIGHT), os.urandom(WIDTH * HEIGHT * 3))
+    for name, sample in (("background", img), ("noise", noise)):
+        if encode_rgb565(sample) != encode_rgb565_reference(sample):
+            raise SystemExit(f"[ERROR] Output mismatch on {name} image!")
+    t_loop = _best_of(encode_rgb565_reference, img, repeat)
+    t_fast = _best_of(encode_rgb565, img, repeat)
+    print(f"Frame {WIDTH}x{HEIGHT}, best of {repeat}")
+    print(f"  per-pixel loop : {t_loop * 1000:8.2f} ms")
+    print(f"  batched encoder: {t_fast * 1000:8.2f} ms  ({t_loop / t_fast:.0f}x)")
+    print("  output identical: yes")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# benchmarks/bench_search.py
+"""
+Zoekbenchmark voor het setup-scherm met een synthetische catalogus van 15k
+coins. Meet laden, index opbouwen en per toetsaanslag de tijd tot de eerste
+pagina (6 resultaten), tegen de oude lineaire substring-scan.
+Draai dit op de Pi Zero zelf: het budget is 5 ms per toetsaanslag.
+
+Gebruik (vanuit de repo-root):
+    python3 -m benchmarks.bench_search
+"""
+
+import os
+import random
+import string
+import tempfile
+import time
+
+from catalog import CoinCatalog, save_catalog
+from search_index import CoinSearch
+
+BUDGET_MS = 5.0
+PAGE = 6
+QUERIES = ["B", "BT", "BTC", "E", "ET", "ETH", "S", "SO", "SOL", "D", "DO", "DOG", "DOGE",
+           "C", "CO", "COI", "COIN", "Q", "QZ", "QZX"]
+WORDS = ["bit", "coin", "eth", "ereum", "sol", "ana", "doge", "chain", "swap", "finance",
+         "token", "protocol", "dao", "meta", "verse", "moon", "inu", "link", "net", "ai"]
+
+def synthetic_catalog(n, seed=1):
+    rnd = random.Random(seed)
+    entries = []
+    for i in range(n):
+        symbol = "".join(rnd.choice(string.ascii_lowercase) for _ in range(rnd.randint(2, 5)))
+        name = " ".join(rnd.choice(WORDS).capitalize() for _ in range(rnd.randint(1, 3)))
+        entries.append((f"{name.lower().replace(' ', '-')}-{i}", symbol, name))
+    return entries
+
+def linear_search(coins, search_text):
+    """De oude draw_coin_toggle_list-scan."""
+    st = search_text.strip().lower()
+    return [c for c in coins
+            if st == "" or st in c["symbol"].lower() or st in c["name"].lower()]
+
+def _ms(t0):
+    return (time.perf_counter() - t0) * 1000
+
+def main(n=15000):
+    coins = [{"id": "btc", "symbol": "BTC", "name": "Bitcoin", "coingecko_id": "bitcoin"},
+             {"id": "eth", "symbol": "ETH", "name": "Ethereum", "coingecko_id": "ethereum"}]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "catalog.tsv.gz")
+        save_catalog(synthetic_catalog(n), path)
+        size = os.path.getsize(path)
+        catalog = CoinCatalog(path)
+        t0 = time.perf_counter()
+        catalog.entries()
+        load_ms = _ms(t0)
+    t0 = time.perf_counter()
+    search = CoinSearch(coins, catalog)
+    search.search("x")[:PAGE]
+    build_ms = _ms(t0)
+    print(f"catalog: {n} coins, {size / 1024:.0f} KB on disk, load {load_ms:.0f} ms, "
+          f"index build {build_ms:.0f} ms (once per setup session)")
+
+    all_coins = coins + [search.item(i) for i in range(len(coins), search.index.size)]
+    worst = 0.0
+    print(f"{'query':>6} {'page ms':>8} {'count ms':>9} {'linear ms':>10} {'matches':>8}  first")
+    for query in QUERIES:
+        t0 = time.perf_counter()
+        result = search.search(query)
+        page = result[:PAGE]
+        page_ms = _ms(t0)
+        t0 = time.perf_counter()
+        count = len(result)
+        count_ms = _ms(t0)
+        t0 = time.perf_counter()
+        expected = linear_search(all_coins, query)
+        linear_ms = _ms(t0)
+        assert count == len(expected), (query, count, len(expected))
+        worst = max(worst, page_ms)
+        first = page[0]["symbol"] if page else "-"
+        print(f"{query:>6} {page_ms:8.3f} {count_ms:9.3f} {linear_ms:10.2f} {count:8d}  {first}")
+    verdict = "OK" if worst < BUDGET_MS else "OVER BUDGET"
+    print(f"worst keystroke (first page): {worst:.3f} ms, budget {BUDGET_MS:.0f} ms: {verdict}")
+
+if __name__ == "__main__":
+    main()
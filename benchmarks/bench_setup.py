@@ -0,0 +1,81 @@
+# benchmarks/bench_setup.py
+"""
+Touch-to-pixel benchmark voor het setup-scherm: een reeks taps (focus,
+typen, backspace, scrollen, togglen) door handle_setup_touch + tekenen,
+naar een tijdelijk framebuffer-bestand. Vergelijkt de gelaagde, incrementele
+rendering met een volledige redraw per tap zoals voorheen (fonts opnieuw
+laden, heel frame tekenen, encoden en schrijven).
+
+Gebruik (vanuit de repo-root):
+    python3 -m benchmarks.bench_setup
+"""
+
+import os
+import tempfile
+import time
+
+from PIL import ImageFont
+
+import setup_screen
+from framebuffer import get_framebuffer
+
+COINS = [{"id": f"c{i}", "symbol": f"C{i}", "name": f"Coin {i}", "show": i % 3 != 0} for i in range(40)]
+
+def _center(rect):
+    return ((rect[0] + rect[2]) // 2, (rect[1] + rect[3]) // 2)
+
+def _taps():
+    """(naam, x, y) in volgorde; coördinaten zoals na scale_touch."""
+    keys = setup_screen.KEY_RECTS
+    taps = [("focus search", 200, 75)]
+    taps += [(f"key {c}", *_center(keys[c])) for c in "CO"]
+    taps += [("backspace", *_center(keys["<"]))] * 2
+    taps += [("scroll down", setup_screen.SCROLL_X + 15, setup_screen.ROW_Y + 6*40 + 10)] * 2
+    taps += [("scroll up", setup_screen.SCROLL_X + 15, setup_screen.ROW_Y - 5)]
+    taps += [("unfocus", 200, 300)]
+    taps += [("toggle", 50, setup_screen.ROW_Y + 15)] * 2
+    return taps
+
+def _run(full_redraw):
+    scroll, text, focused = 0, "", False
+    setup_screen._screen.hide()
+    state = setup_screen.draw_coin_toggle_list(COINS, scroll, text, focused)
+    fb = get_framebuffer(setup_screen.FRAMEBUFFER)
+    results = []
+    for name, x, y in _taps():
+        t0 = time.perf_counter()
+        _exit, scroll, text, focused = setup_screen.handle_setup_touch(
+            x, y, COINS, scroll, text, focused, *state, lambda: None)
+        if full_redraw:
+            ImageFont.truetype(setup_screen.FONT_SMALL, 26)
+            ImageFont.truetype(setup_screen.FONT_SMALL, 24)
+            setup_screen._screen.hide()
+        state = setup_screen.draw_coin_toggle_list(COINS, scroll, text, focused)
+        results.append((name, (time.perf_counter() - t0) * 1000, fb.last_blit["bytes"]))
+    return results
+
+def _press_feedback(repeat=50):
+    """Key-down feedback: één voorge-encodeerde tile blitten."""
+    screen = setup_screen._screen
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        screen.press_key("Q")
+        screen.press_key("Q", pressed=False)
+    return (time.perf_counter() - t0) * 1000 / (2 * repeat)
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        setup_screen.FRAMEBUFFER = os.path.join(tmp, "fb.raw")
+        setup_screen.coin_search(COINS)
+        full = _run(full_redraw=True)
+        incremental = _run(full_redraw=False)
+        press = _press_feedback()
+    print(f"{'tap':>14} {'full ms':>8} {'full bytes':>10} {'incr ms':>8} {'incr bytes':>10}")
+    for (name, f_ms, f_bytes), (_n, i_ms, i_bytes) in zip(full, incremental):
+        print(f"{name:>14} {f_ms:8.2f} {f_bytes:10d} {i_ms:8.2f} {i_bytes:10d}")
+    avg = lambda rows: sum(r[1] for r in rows) / len(rows)
+    print(f"average touch-to-pixel: full {avg(full):.2f} ms, incremental {avg(incremental):.2f} ms")
+    print(f"key-down feedback (pre-encoded tile): {press:.3f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# benchmarks/bench_stream.py
+"""
+Streaming-modus tegen een lokale stand-in WebSocket-server: burst van ticks
+wordt samengevoegd tot ~1 cache-update per display-interval per coin, en
+na het wegvallen van de server valt de stream terug op polling en
+verbindt daarna opnieuw.
+
+Gebruik (vanuit de repo-root):
+    python3 -m benchmarks.bench_stream
+"""
+
+import json
+import time
+
+from benchmarks.fake_ws import FakeWebSocketServer
+from stream import PriceStream
+
+COINS = [
+    {"id": "btc", "symbol": "BTC", "coingecko_id": "bitcoin", "binance_symbol": "BTCUSDT"},
+    {"id": "eth", "symbol": "ETH", "coingecko_id": "ethereum", "binance_symbol": "ETHUSDT"},
+]
+
+def _wait(cond, timeout=5.0):
+    end = time.time() + timeout
+    while time.time() < end:
+        if cond():
+            return True
+        time.sleep(0.01)
+    return False
+
+def main(ticks_per_sec=200, seconds=2.0, display_interval=0.5):
+    writes = []
+    server = FakeWebSocketServer().start()
+    stream = PriceStream(COINS, lambda cid, p: writes.append((time.time(), cid, p)),
+                         url=server.base_url, display_interval=display_interval)
+    stream.BACKOFF_BASE = 0.1
+    stream.start()
+    assert _wait(lambda: server.clients), "stream did not connect"
+    print(f"subscribed: {server.paths[0]}")
+
+    t_end = time.time() + seconds
+    n = 0
+    while time.time() < t_end:
+        for c in COINS:
+            server.broadcast(json.dumps({"stream": c["binance_symbol"].lower() + "@miniTicker",
+                                         "data": {"e": "24hrMiniTicker", "s": c["binance_symbol"], "c": str(100 + n)}}))
+        n += 1
+        time.sleep(1.0 / ticks_per_sec)
+    time.sleep(display_interval * 1.5)
+    print(f"ticks sent: {n * len(COINS)}, received: {stream.stats['ticks']}, "
+          f"cache writes: {len(writes)} (interval {display_interval}s over {seconds}s)")
+    print(f"last prices: { {cid: p for _t, cid, p in writes[-len(COINS):]} }, covered: {sorted(stream.covered_ids())}")
+
+    server.accepting = False
+    server.drop_clients()
+    t0 = time.time()
+    assert _wait(stream.lost.is_set), "stream loss not detected"
+    print(f"loss detected after {(time.time() - t0) * 1000:.0f} ms, covered now: {sorted(stream.covered_ids())}")
+    server.accepting = True
+    t0 = time.time()
+    server.broadcast("{}")
+    assert _wait(lambda: server.clients), "no reconnect"
+    print(f"reconnected after {(time.time() - t0) * 1000:.0f} ms ({stream.stats['reconnects']} attempts)")
+    stream.stop()
+    server.stop()
+
+if __name__ == "__main__":
+    main()
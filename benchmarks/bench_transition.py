@@ -0,0 +1,73 @@
+# benchmarks/bench_transition.py
+"""
+Benchmark voor de coin-overgangen (transition.py) op 480x320: kosten per
+frame voor compose (mengen in RGB565) en write (naar het display), de
+haalbare framerate zonder pacing, en één gepacede run zoals in main.py.
+Doel: minstens 20 fps op een Pi 3, dus ruim onder 50 ms per frame.
+
+Gebruik (vanuit de repo-root):
+    python3 -m benchmarks.bench_transition
+    python3 -m benchmarks.bench_transition --display file:/tmp/fb.raw --fps 30
+"""
+
+import argparse
+import time
+
+from PIL import Image
+
+import framebuffer
+from rgb565 import encode_rgb565
+from transition import MODES, TransitionEngine
+
+WIDTH, HEIGHT = 480, 320
+
+def _frame(path, fallback):
+    try:
+        image = Image.open(path).convert("RGB").resize((WIDTH, HEIGHT))
+    except OSError:
+        image = Image.new("RGB", (WIDTH, HEIGHT), fallback)
+    return encode_rgb565(image)
+
+def measure(engine, old, new, steps):
+    compose = []
+    write = []
+    for i in range(steps):
+        progress = (i + 0.5) / steps
+        t0 = time.perf_counter()
+        data = engine.compose(old, new, progress)
+        t1 = time.perf_counter()
+        engine.display.write_frame(data, diff=False)
+        t2 = time.perf_counter()
+        compose.append((t1 - t0) * 1000)
+        write.append((t2 - t1) * 1000)
+    per_frame = [c + w for c, w in zip(compose, write)]
+    return {
+        "compose_ms": sum(compose) / steps,
+        "write_ms": sum(write) / steps,
+        "max_ms": max(per_frame),
+        "unpaced_fps": 1000 * steps / sum(per_frame),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Transition benchmark")
+    parser.add_argument("--display", default="memory:", help="display-spec (memory:, file:PATH, fb:/dev/fb1)")
+    parser.add_argument("--steps", type=int, default=100)
+    parser.add_argument("--fps", type=int, default=25)
+    parser.add_argument("--duration", type=float, default=0.6)
+    args = parser.parse_args()
+
+    display = framebuffer.open_display(args.display)
+    old = _frame("backgrounds/btc-bg.png", (247, 147, 26))
+    new = _frame("backgrounds/sol-bg.png", (153, 69, 255))
+    print(f"{'mode':>9} {'compose ms':>11} {'write ms':>9} {'max ms':>7} {'unpaced fps':>12}")
+    for mode in MODES:
+        engine = TransitionEngine(display, WIDTH, HEIGHT, mode=mode, duration=args.duration, fps=args.fps)
+        engine.compose(old, new, 0.5)  # warm-up (Bayer-mask)
+        r = measure(engine, old, new, args.steps)
+        print(f"{mode:>9} {r['compose_ms']:11.2f} {r['write_ms']:9.2f} {r['max_ms']:7.2f} {r['unpaced_fps']:12.1f}")
+    for mode in MODES:
+        TransitionEngine(display, WIDTH, HEIGHT, mode=mode, duration=args.duration, fps=args.fps).run(old, new)
+    display.close()
+
+if __name__ == "__main__":
+    main()
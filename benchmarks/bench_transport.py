@@ -0,0 +1,66 @@
+# benchmarks/bench_transport.py
+"""
+Prijs-cyclus tegen een lokale stand-in server: gepoolde transport met
+één Binance multi-symbol request vs. de oude aanpak (requests.get zonder
+session, Binance per coin na elkaar).
+
+Gebruik (vanuit de repo-root):
+    python3 -m benchmarks.bench_transport
+"""
+
+import json
+import time
+
+import requests
+
+from benchmarks.fake_exchange import FakeExchange
+from price import fetch_prices
+from providers import default_registry
+from transport import HttpTransport
+
+LATENCY = 0.05
+CYCLES = 3
+
+def _coins():
+    with open("coins.json") as f:
+        return json.load(f)["coins"]
+
+def _old_cycle(coins, base):
+    ids = ",".join(c.get("coingecko_id", c["id"]) for c in coins)
+    prices = requests.get(f"{base}/api/v3/simple/price?ids={ids}&vs_currencies=usd", timeout=8).json()
+    for coin in coins:
+        if prices.get(coin.get("coingecko_id", coin["id"]), {}).get("usd") is None and coin.get("binance_symbol"):
+            requests.get(f"{base}/api/v3/ticker/price?symbol={coin['binance_symbol']}", timeout=8)
+
+def main():
+    coins = _coins()
+    # Helft van de coins "ontbreekt" bij CoinGecko -> Binance fallback
+    coingecko = {c.get("coingecko_id", c["id"]): 100.0 + i for i, c in enumerate(coins) if i % 2 == 0}
+    binance = {c["binance_symbol"]: 200.0 + i for i, c in enumerate(coins) if c.get("binance_symbol")}
+    fallback = sum(1 for i, c in enumerate(coins) if i % 2 and c.get("binance_symbol"))
+    print(f"{len(coins)} coins, {fallback} via Binance fallback, server latency {LATENCY * 1000:.0f} ms")
+
+    ex = FakeExchange(coingecko, binance, latency=LATENCY).start()
+    t0 = time.perf_counter()
+    for _ in range(CYCLES):
+        _old_cycle(coins, ex.base_url)
+    t_old = (time.perf_counter() - t0) / CYCLES
+    old_conn, old_req = ex.connections, ex.requests
+
+    ex.connections = ex.requests = 0
+    transport = HttpTransport(ex.base_url, ex.base_url)
+    registry = default_registry(transport)
+    t0 = time.perf_counter()
+    for _ in range(CYCLES):
+        results = fetch_prices(coins, registry)
+    t_new = (time.perf_counter() - t0) / CYCLES
+    print(f"  old: {t_old * 1000:7.1f} ms/cycle, {old_req / CYCLES:.0f} requests, {old_conn / CYCLES:.1f} connections per cycle")
+    print(f"  new: {t_new * 1000:7.1f} ms/cycle, {ex.requests / CYCLES:.0f} requests, {ex.connections / CYCLES:.1f} connections per cycle")
+    print(f"  resolved {len(results)} prices")
+    for host, (n, avg, worst) in transport.latency_summary().items():
+        print(f"  {host}: {n} requests, avg {avg * 1000:.1f} ms, max {worst * 1000:.1f} ms")
+    transport.close()
+    ex.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# benchmarks/fake_exchange.py
+"""
+Lokale stand-in voor de CoinGecko- en Binance-API's (alleen de endpoints
+die price.py gebruikt), met instelbare latency en een teller voor het
+aantal TCP-verbindingen (om keep-alive te kunnen controleren).
+"""
+
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+class FakeExchange:
+    """
+    coingecko: {coingecko_id: usd-prijs}, binance: {symbol: prijs}.
+    fx: {valuta: koers t.o.v. USD} voor vs_currencies anders dan usd.
+    Gebruik base_url als coingecko_url/binance_url van HttpTransport.
+    """
+
+    def __init__(self, coingecko=None, binance=None, latency=0.0, port=0, fx=None):
+        self.coingecko = dict(coingecko or {})
+        self.binance = dict(binance or {})
+        self.fx = dict(fx or {})
+        self.latency = latency
+        self.connections = 0
+        self.requests = 0
+        self.status_override = None   # bv. 429 om rate-limiting te simuleren
+        self._lock = threading.Lock()
+        exchange = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                # Headers en body gaan los over de lijn; zonder NODELAY kost dat 40 ms delayed-ACK
+                self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                with exchange._lock:
+                    exchange.connections += 1
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status, payload):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                with exchange._lock:
+                    exchange.requests += 1
+                if exchange.latency:
+                    time.sleep(exchange.latency)
+                if exchange.status_override:
+                    return self._reply(exchange.status_override, {"error": "override"})
+                url = urlparse(self.path)
+                q = parse_qs(url.query)
+                if url.path == "/api/v3/simple/price":
+                    ids = q.get("ids", [""])[0].split(",")
+                    currencies = q.get("vs_currencies", ["usd"])[0].split(",")
+                    out = {}
+                    for i in ids:
+                        if i in exchange.coingecko:
+                            out[i] = {c: exchange.price_in(exchange.coingecko[i], c) for c in currencies}
+                    return self._reply(200, out)
+                if url.path == "/api/v3/ticker/price":
+                    if "symbols" in q:
+                        symbols = json.loads(q["symbols"][0])
+                        if any(s not in exchange.binance for s in symbols):
+                            return self._reply(400, {"code": -1121, "msg": "Invalid symbol."})
+                        return self._reply(200, [{"symbol": s, "price": str(exchange.binance[s])} for s in symbols])
+                    symbol = q.get("symbol", [""])[0]
+                    if symbol in exchange.binance:
+                        return self._reply(200, {"symbol": symbol, "price": str(exchange.binance[symbol])})
+                    return self._reply(400, {"code": -1121, "msg": "Invalid symbol."})
+                self._reply(404, {"error": "not found"})
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = None
+
+    def price_in(self, usd, currency):
+        rate = self.fx.get(currency)
+        return usd if rate is None else round(usd * rate, 6)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,90 @@
+# benchmarks/fake_ws.py
+"""
+Lokale stand-in WebSocket-server in Binance-stijl (combined streams).
+broadcast() stuurt een bericht naar alle clients, drop_clients() verbreekt
+alle verbindingen om reconnect/fallback te testen.
+"""
+
+import socket
+import threading
+
+from wsclient import OP_TEXT, FrameReader, accept_key, encode_frame
+
+class FakeWebSocketServer:
+    def __init__(self, port=0):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind(("127.0.0.1", port))
+        self.sock.listen(16)
+        self.port = self.sock.getsockname()[1]
+        self.base_url = f"ws://127.0.0.1:{self.port}"
+        self.clients = []
+        self.paths = []
+        self.accepting = True
+        self._lock = threading.Lock()
+        self._running = False
+
+    def start(self):
+        self._running = True
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._running = False
+        self.drop_clients()
+        self.sock.close()
+
+    def _accept_loop(self):
+        while self._running:
+            try:
+                conn, _addr = self.sock.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._handshake, args=(conn,), daemon=True).start()
+
+    def _handshake(self, conn):
+        data = b""
+        while b"\r\n\r\n" not in data:
+            chunk = conn.recv(4096)
+            if not chunk:
+                conn.close()
+                return
+            data += chunk
+        if not self.accepting:
+            conn.sendall(b"HTTP/1.1 503 Service Unavailable\r\nContent-Length: 0\r\n\r\n")
+            conn.close()
+            return
+        lines = data.decode().split("\r\n")
+        headers = {k.strip().lower(): v.strip() for k, _, v in (l.partition(":") for l in lines[1:] if l)}
+        conn.sendall(("HTTP/1.1 101 Switching Protocols\r\n"
+                      "Upgrade: websocket\r\nConnection: Upgrade\r\n"
+                      f"Sec-WebSocket-Accept: {accept_key(headers['sec-websocket-key'])}\r\n\r\n").encode())
+        with self._lock:
+            self.clients.append(conn)
+            self.paths.append(lines[0].split(" ")[1])
+        # Client-frames (pong/close) lezen tot de verbinding dicht gaat
+        reader = FrameReader(conn)
+        try:
+            while True:
+                reader.read_frame()
+        except Exception:
+            pass
+
+    def broadcast(self, message):
+        frame = encode_frame(OP_TEXT, message, mask=False)
+        with self._lock:
+            for conn in list(self.clients):
+                try:
+                    conn.sendall(frame)
+                except OSError:
+                    self.clients.remove(conn)
+
+    def drop_clients(self):
+        with self._lock:
+            clients, self.clients = self.clients, []
+        for conn in clients:
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            conn.close()
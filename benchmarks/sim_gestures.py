@@ -0,0 +1,100 @@
+# benchmarks/sim_gestures.py
+"""
+Gesture-herkenning zonder hardware: bouwt ruwe evdev-streams (tap,
+double-tap, long-press, swipe), schrijft ze als event-log weg en speelt ze
+af door InputDispatcher.replay(). Controleert de herkende gestures en meet
+de doorvoer van de recognizer.
+
+Een echte opname maken op de Pi:  python3 main.py --record-input events.jsonl
+Die afspelen:                     python3 touchscreen.py events.jsonl
+
+Gebruik (vanuit de repo-root):
+    python3 -m benchmarks.sim_gestures
+"""
+
+import json
+import os
+import tempfile
+import time
+
+from touchscreen import (InputDispatcher, EV_SYN, EV_KEY, EV_ABS, ABS_X, ABS_Y, BTN_TOUCH)
+
+GESTURES = {"tap", "double_tap", "long_press", "swipe"}
+
+def scale(raw_x, raw_y):
+    """Eenvoudige lineaire schaal 0..4095 -> 480x320 (zoals na kalibratie)."""
+    return raw_x * 480 // 4096, raw_y * 320 // 4096
+
+def _frame(t, x=None, y=None, touch=None):
+    events = []
+    if x is not None:
+        events.append([t, EV_ABS, ABS_X, x])
+    if y is not None:
+        events.append([t, EV_ABS, ABS_Y, y])
+    if touch is not None:
+        events.append([t, EV_KEY, BTN_TOUCH, touch])
+    events.append([t, EV_SYN, 0, 0])
+    return events
+
+def press(t, x, y, duration, to=None, steps=5):
+    """Vinger neer op (x, y), eventueel slepen naar to, loslaten na duration."""
+    events = _frame(t, x, y, 1)
+    end = to or (x, y)
+    for i in range(1, steps + 1):
+        f = i / steps
+        events += _frame(t + duration * f * 0.9, int(x + (end[0] - x) * f), int(y + (end[1] - y) * f))
+    events += _frame(t + duration, touch=0)
+    return events
+
+SCENARIOS = [
+    ("tap", press(0.0, 2000, 2000, 0.1), ["tap"]),
+    ("double tap", press(0.0, 4000, 300, 0.08) + press(0.25, 4010, 310, 0.08), ["tap", "tap", "double_tap"]),
+    ("two slow taps", press(0.0, 2000, 2000, 0.1) + press(0.9, 2000, 2000, 0.1), ["tap", "tap"]),
+    ("long press", press(0.0, 2000, 2000, 1.2), ["long_press"]),
+    ("swipe up", press(0.0, 2000, 3000, 0.3, to=(2000, 1000)), ["swipe"]),
+    ("jittery tap", press(0.0, 2000, 2000, 0.2, to=(2100, 2050)), ["tap"]),
+    # Resistief paneel: uitschieter in het laatste sample vóór loslaten
+    ("release spike", press(0.0, 2000, 2000, 0.1)[:-2] + _frame(0.1, 3900, 200) + _frame(0.1, touch=0), ["tap"]),
+]
+
+def _replay(events):
+    with tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False) as f:
+        for event in events:
+            f.write(json.dumps(event) + "\n")
+        path = f.name
+    try:
+        dispatcher = InputDispatcher(scale=scale)
+        seen = []
+        dispatcher.subscribe(GESTURES, callback=seen.append)
+        dispatcher.replay(path)
+        return seen
+    finally:
+        os.unlink(path)
+
+def main():
+    failures = 0
+    for name, events, expected in SCENARIOS:
+        seen = _replay(events)
+        kinds = [g.kind for g in seen]
+        ok = kinds == expected
+        failures += not ok
+        print(f"{name:>14}: {'OK  ' if ok else 'FAIL'} {kinds}" + ("" if ok else f" (expected {expected})"))
+
+    # Doorvoer: veel taps achter elkaar door de recognizer
+    events = []
+    for i in range(2000):
+        events += press(i * 0.5, 1000 + i % 2000, 2000, 0.1)
+    dispatcher = InputDispatcher(scale=scale)
+    count = []
+    dispatcher.subscribe(GESTURES, callback=count.append)
+    t0 = time.perf_counter()
+    for event in events:
+        dispatcher.feed(*event)
+    elapsed = time.perf_counter() - t0
+    print(f"recognizer: {len(events)} raw events -> {len(count)} gestures in {elapsed * 1000:.1f} ms "
+          f"({elapsed / len(events) * 1e6:.1f} us/event)")
+    if failures:
+        raise SystemExit(f"{failures} scenario(s) failed")
+
+if __name__ == "__main__":
+    main()
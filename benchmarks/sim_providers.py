@@ -0,0 +1,208 @@
+# benchmarks/sim_providers.py
+"""
+Simulatie van de provider-registry met nep-providers die latency, fouten
+en HTTP 429 injecteren, op een virtuele klok (draait in < 1 s).
+Eerst losse scenario's met een OK/FAIL-controle (circuit breaker,
+Retry-After, goedkoopste provider eerst, fallback, en de echte
+BinanceProvider tegen de lokale stand-in server die 429/503/onbekende
+symbols teruggeeft), daarna een langere
+run met een storing die alleen de stand van de registry laat zien.
+
+Gebruik (vanuit de repo-root):
+    python3 -m benchmarks.sim_providers
+"""
+
+import contextlib
+import io
+import random
+import time
+
+from benchmarks.fake_exchange import FakeExchange
+from providers import BinanceProvider, PriceProvider, ProviderError, ProviderRegistry, ProviderState, RateLimited
+from transport import HttpTransport
+
+COINS = [{"id": "a", "symbol": "A"}, {"id": "b", "symbol": "B"}, {"id": "c", "symbol": "C"}]
+
+class FakeProvider(PriceProvider):
+    def __init__(self, name, cost, rpm, error_rate=0.0, rate_limit_every=0, latency=0.0, known=None,
+                 retry_after=30):
+        self.name = name
+        self.cost = cost
+        self.requests_per_minute = rpm
+        self.error_rate = error_rate
+        self.rate_limit_every = rate_limit_every
+        self.latency = latency
+        self.known = known
+        self.retry_after = retry_after
+        self.calls = 0
+        self.down = False
+
+    def supports(self, coin):
+        return self.known is None or coin["id"] in self.known
+
+    def fetch(self, coins):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if self.down or random.random() < self.error_rate:
+            raise ProviderError(f"{self.name} injected error")
+        if self.rate_limit_every and self.calls % self.rate_limit_every == 0:
+            raise RateLimited(f"{self.name} injected 429", retry_after=self.retry_after)
+        return {c["id"]: {"usd": 1.0} for c in coins}
+
+def _registry(*providers):
+    clock = [0.0]
+    registry = ProviderRegistry(clock=lambda: clock[0])
+    for provider in providers:
+        registry.register(provider)
+    return registry, clock
+
+def _fetch(registry, coins=COINS):
+    # De registry logt elke fout; hier tellen alleen de uitkomsten
+    with contextlib.redirect_stdout(io.StringIO()):
+        return registry.fetch(coins)
+
+def circuit_opens():
+    """Circuit gaat pas open na BREAKER_THRESHOLD fouten op rij, dan cooldown."""
+    broken = FakeProvider("broken", 1.0, 600)
+    broken.down = True
+    registry, clock = _registry(broken)
+    state = registry.states["broken"]
+    circuits = []
+    for _ in range(ProviderState.BREAKER_THRESHOLD):
+        clock[0] = max(clock[0], state.blocked_until)   # wachten tot de backoff voorbij is
+        _fetch(registry)
+        circuits.append(state.circuit)
+    expected = ["closed"] * (ProviderState.BREAKER_THRESHOLD - 1) + ["open"]
+    blocked = state.blocked_until - clock[0]
+    calls = broken.calls
+    clock[0] += ProviderState.BREAKER_COOLDOWN - 1
+    _fetch(registry)
+    ok = (circuits == expected and blocked >= ProviderState.BREAKER_COOLDOWN
+          and broken.calls == calls == ProviderState.BREAKER_THRESHOLD)
+    return ok, f"circuit after each failure: {circuits}, blocked {blocked:.0f}s"
+
+def retry_after():
+    """Een 429 met Retry-After blokkeert minstens zo lang, ook als de backoff korter is."""
+    limited = FakeProvider("limited", 1.0, 600, rate_limit_every=1, retry_after=90)
+    registry, clock = _registry(limited)
+    _fetch(registry)
+    state = registry.states["limited"]
+    blocked = state.blocked_until - clock[0]
+    clock[0] = 89.0
+    _fetch(registry)
+    early = limited.calls
+    clock[0] = 90.0
+    limited.rate_limit_every = 0
+    results = _fetch(registry)
+    ok = (blocked == 90 > ProviderState.BACKOFF_BASE and early == 1 and limited.calls == 2
+          and len(results) == len(COINS))
+    return ok, f"blocked {blocked:.0f}s (backoff {ProviderState.BACKOFF_BASE:.0f}s), calls {early} at t=89, {limited.calls} at t=90"
+
+def cheapest_first():
+    """Zijn alle providers gezond, dan doet de goedkoopste alles."""
+    pricey = FakeProvider("pricey", 2.0, 600)
+    cheap = FakeProvider("cheap", 1.0, 600)
+    registry, _clock = _registry(pricey, cheap)
+    results = _fetch(registry)
+    sources = sorted({source for _quotes, source in results.values()})
+    ok = sources == ["cheap"] and cheap.calls == 1 and pricey.calls == 0
+    return ok, f"sources {sources}, calls cheap={cheap.calls} pricey={pricey.calls}"
+
+def fallback():
+    """Goedkoopste ligt eruit en kent niet elke coin: toch komt elke coin ergens vandaan."""
+    cheap = FakeProvider("cheap", 1.0, 600, known={"a", "b"})
+    backup = FakeProvider("backup", 2.0, 600)
+    registry, _clock = _registry(cheap, backup)
+    partial = {k: source for k, (_quotes, source) in _fetch(registry).items()}
+    cheap.down = True
+    down = {k: source for k, (_quotes, source) in _fetch(registry).items()}
+    ok = (partial == {"a": "cheap", "b": "cheap", "c": "backup"}
+          and down == {"a": "backup", "b": "backup", "c": "backup"})
+    return ok, f"partial {partial}, cheap down {down}"
+
+def failing_binance():
+    """
+    Binance geeft 429, 503 en daarna voor geen enkel symbol een prijs: elke
+    keer één request, een fout in de registry (geen record_success) en na
+    BREAKER_THRESHOLD keer een open circuit.
+    """
+    ex = FakeExchange(binance={"BTCUSDT": 65000.0}).start()
+    transport = HttpTransport(ex.base_url, ex.base_url)
+    binance = BinanceProvider(transport)
+    registry, clock = _registry(binance)
+    state = registry.states["binance"]
+    known = [{"id": "btc", "coingecko_id": "bitcoin", "binance_symbol": "BTCUSDT"}]
+    unknown = [{"id": "nope", "binance_symbol": "NOPEUSDT"}]
+    outcomes, requests, resolved = [], [], 0
+    try:
+        for status, coins in ((429, known), (503, known), (None, unknown)):
+            ex.status_override = status
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    binance.fetch(coins)
+                outcomes.append("ok")
+            except RateLimited:
+                outcomes.append("rate_limited")
+            except ProviderError:
+                outcomes.append("error")
+            clock[0] = max(clock[0], state.blocked_until)
+            before = ex.requests
+            resolved += len(_fetch(registry, coins))
+            requests.append(ex.requests - before)
+        circuit, health = state.circuit, state.health
+        ex.status_override = None
+        clock[0] = state.blocked_until
+        recovered = _fetch(registry, known)
+    finally:
+        transport.close()
+        ex.stop()
+    ok = (outcomes == ["rate_limited", "error", "error"] and requests == [1, 1, 1] and resolved == 0
+          and circuit == "open" and health < 0.5 and "bitcoin" in recovered)
+    return ok, (f"{outcomes}, requests per attempt {requests}, circuit {circuit}, health {health:.2f}, "
+                f"recovered {sorted(recovered)}")
+
+SCENARIOS = [
+    ("circuit", circuit_opens),
+    ("retry-after", retry_after),
+    ("cheapest", cheapest_first),
+    ("fallback", fallback),
+    ("binance down", failing_binance),
+]
+
+def scenarios():
+    failures = 0
+    for name, scenario in SCENARIOS:
+        ok, detail = scenario()
+        failures += not ok
+        print(f"{name:>14}: {'OK  ' if ok else 'FAIL'} {detail}")
+    return failures
+
+def soak(cycles=120, interval=15.0):
+    random.seed(1)
+    clock = [0.0]
+    registry = ProviderRegistry(clock=lambda: clock[0])
+    cheap = registry.register(FakeProvider("cheap", 1.0, 20, rate_limit_every=7, latency=0.001))
+    backup = registry.register(FakeProvider("backup", 2.0, 120, error_rate=0.1, latency=0.001,
+                                            known={"a", "b"}))
+    coins = COINS
+    resolved = missed = 0
+    for cycle in range(cycles):
+        cheap.down = 40 <= cycle < 60       # harde storing van de goedkope provider
+        results = registry.fetch(coins)
+        resolved += len(results)
+        missed += len(coins) - len(results)
+        clock[0] += interval
+        if cycle in (39, 45, 59, 80, 119):
+            print(f"t={clock[0]:6.0f}s {registry.report()}")
+    print(f"calls: cheap={cheap.calls} backup={backup.calls}; "
+          f"resolved {resolved}/{resolved + missed} coin-prices")
+
+def main():
+    failures = scenarios()
+    soak()
+    if failures:
+        raise SystemExit(f"{failures} scenario(s) failed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+# benchmarks/sim_scheduler.py
+"""
+De main-loop scheduler op een VirtualClock: seconde-ticks, eenmalige
+deadlines (rotatie), events (prijs-update, mode-switch), het aantal
+wake-ups per minuut en wat een blokkerende handler of een sprong in de
+wandklok met de rotatie doet, zonder een seconde echt te wachten. Controleert
+elk scenario en stopt met een fout als er één faalt.
+
+Gebruik (vanuit de repo-root):
+    python3 -m benchmarks.sim_scheduler
+"""
+
+import math
+
+from scheduler import Scheduler, VirtualClock
+
+START = 1000.3
+ROTATE_INTERVAL = 20   # zoals main.py
+
+def _run_until(scheduler, until):
+    while scheduler.clock.monotonic() < until:
+        scheduler.run_once()
+
+def second_ticks():
+    """Elke tick net na een seconde-grens, elke seconde precies één."""
+    sched = Scheduler(VirtualClock(START))
+    ticks = []
+    sched.every_second(ticks.append)
+    _run_until(sched, START + 5)
+    seconds = [math.floor(t) for t in ticks]
+    ok = (seconds == list(range(1001, 1001 + len(ticks))) and len(ticks) >= 5
+          and all(t - math.floor(t) <= 2 * Scheduler.SECOND_SLACK for t in ticks))
+    return ok, f"{len(ticks)} ticks at {', '.join(f'{t:.3f}' for t in ticks[:3])}, ..."
+
+def one_shot():
+    """call_at/call_later vuren één keer, op tijd; een geannuleerde timer nooit."""
+    sched = Scheduler(VirtualClock(START))
+    fired = []
+    sched.every_second(lambda now: None)
+    sched.call_at(1003.5, lambda now: fired.append(("at", now)))
+    sched.call_later(2.25, lambda now: fired.append(("later", now)))
+    handle = sched.call_at(1002.0, lambda now: fired.append(("cancelled", now)))
+    sched.cancel(handle)
+    _run_until(sched, START + 6)
+    expected = [("later", START + 2.25), ("at", 1003.5)]
+    ok = (len(fired) == 2 and [k for k, _ in fired] == [k for k, _ in expected]
+          and all(abs(now - when) < 1e-9 for (_, now), (_, when) in zip(fired, expected))
+          and sched.report()["lateness_max_ms"] < 1e-6)
+    return ok, f"{fired}"
+
+def events():
+    """notify() maakt de loop direct wakker: geen tijd verstreken, één keer per event."""
+    sched = Scheduler(VirtualClock(START))
+    seen = []
+    sched.on("price", lambda: seen.append(("price", sched.clock.time())))
+    sched.on("mode", lambda: seen.append(("mode", sched.clock.time())))
+    sched.every_second(lambda now: None)
+    sched.notify("price")
+    sched.notify("price")       # dubbele melding vóór de wake-up telt één keer
+    sched.notify("mode")
+    sched.run_once()
+    # Event vanuit een timer-callback (zoals een listener op de price-thread)
+    sched.call_at(1002.5, lambda now: sched.notify("price"))
+    _run_until(sched, 1002.5)
+    sched.run_once()
+    ok = seen == [("price", START), ("mode", START), ("price", 1002.5)]
+    return ok, f"{seen}"
+
+def wakeups_per_minute(minutes=10):
+    """Dashboard-achtige mix: ticks, rotatie elke 20 s, een prijs-update per minuut."""
+    sched = Scheduler(VirtualClock(START))
+    sched.every_second(lambda now: None)
+
+    def rotate(now):
+        sched.call_at(now + ROTATE_INTERVAL, rotate)
+
+    def price_update(now):
+        sched.notify("price")
+        sched.call_later(60, price_update)
+
+    sched.on("price", lambda: None)
+    # Rotatie op de seconde-grens, zoals main.py (last_rot_time komt van een tick)
+    sched.call_at(math.floor(START) + ROTATE_INTERVAL + Scheduler.SECOND_SLACK, rotate)
+    sched.call_later(30, price_update)
+    _run_until(sched, START + minutes * 60)
+    report = sched.report()
+    ok = 58 <= report["wakeups_per_min"] <= 63 and report["lateness_max_ms"] < 1e-6
+    return ok, (f"{report['wakeups_per_min']:.1f} wake-ups/min over {minutes} min, "
+                f"lateness max {report['lateness_max_ms']:.3f} ms")
+
+class Rotation:
+    """Coin-rotatie zoals main.py: volgende deadline op max(deadline, now)."""
+
+    def __init__(self, sched):
+        self.sched = sched
+        self.times = []
+        self.start(sched.clock.monotonic())
+
+    def start(self, start):
+        self.last = start
+        self.timer = self.sched.call_at(start + ROTATE_INTERVAL, self.rotate)
+
+    def rotate(self, now):
+        self.times.append(now)
+        self.start(max(self.last + ROTATE_INTERVAL, now))
+
+def _setup_session(reset, setup_seconds):
+    sched = Scheduler(VirtualClock(START))
+    sched.every_second(lambda now: None)
+    rotation = Rotation(sched)
+
+    def setup():
+        sched.clock.advance(setup_seconds)  # setup_touch_listener blokkeert tot SAVE
+        if reset:
+            # Zoals main.on_mode: rotatie-interval opnieuw laten beginnen
+            sched.cancel(rotation.timer)
+            rotation.start(sched.clock.monotonic())
+
+    sched.on("mode", setup)
+    _run_until(sched, START + 30)
+    sched.notify("mode")
+    sched.run_once()
+    back = sched.clock.monotonic()
+    _run_until(sched, back + 60.5)
+    burst = sum(1 for t in rotation.times if back <= t < back + 5)
+    after = sum(1 for t in rotation.times if back + 5 <= t <= back + 60.5)
+    return burst, after
+
+def blocking_handler(setup_seconds=300):
+    """
+    Setup blokkeert een event-handler minuten lang. Met de reset uit main.py
+    geen rotatie direct erna; ook zonder reset hooguit één (geen inhaal-burst).
+    """
+    burst, after = _setup_session(True, setup_seconds)
+    clamped, _after = _setup_session(False, setup_seconds)
+    ok = burst == 0 and after == 3 and clamped <= 1
+    return ok, (f"after a {setup_seconds} s setup: {burst} rotation(s) in the first 5 s, {after} in the "
+                f"minute after; without the reset {clamped}")
+
+def wall_clock_jump(jump=3600):
+    """NTP zet de wandklok een uur vooruit: geen rotatie-burst, ticks weer op de seconde-grens."""
+    sched = Scheduler(VirtualClock(START))
+    ticks = []
+    sched.every_second(ticks.append)
+    rotation = Rotation(sched)
+    _run_until(sched, START + 30)
+    sched.clock.jump(jump)
+    _run_until(sched, START + 130)
+    after = [t for t in ticks if t > START + jump]
+    ok = (len(rotation.times) == 6
+          and all(t - math.floor(t) <= 2 * Scheduler.SECOND_SLACK for t in after[1:])
+          and len(after) >= 99)
+    return ok, f"{len(rotation.times)} rotations in 130 s with a +{jump} s jump, {len(after)} ticks after it"
+
+SCENARIOS = [
+    ("second ticks", second_ticks),
+    ("one-shot", one_shot),
+    ("events", events),
+    ("wake-ups", wakeups_per_minute),
+    ("blocked setup", blocking_handler),
+    ("clock jump", wall_clock_jump),
+]
+
+def main():
+    failures = 0
+    for name, scenario in SCENARIOS:
+        ok, detail = scenario()
+        failures += not ok
+        print(f"{name:>14}: {'OK  ' if ok else 'FAIL'} {detail}")
+    if failures:
+        raise SystemExit(f"{failures} scenario(s) failed")
+
+if __name__ == "__main__":
+    main()
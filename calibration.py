@@ -6,100 +6,175 @@ Touchscreen kalibratie, scaling, crosshair.
 import os
 import json
 import time
-import evdev
-from PIL import Image, ImageDraw, ImageFont
+from framebuffer import get_framebuffer
+from touchscreen import get_dispatcher
 
-# Zet je standaardwaarden
+# Standaardgrootte; de echte komt van het display (zie _screen_size)
 WIDTH, HEIGHT = 480, 320
-FRAMEBUFFER = "/dev/fb1"
+FRAMEBUFFER = None  # zelfde backend als het dashboard
 CALIBRATION_FILE = "touch_calibration.json"
 FONT_SMALL = "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"
+# Boven deze fout (pixels) is de kalibratie waarschijnlijk mislukt
+MAX_RESIDUAL = 8.0
+
+def _screen_size():
+    display = get_framebuffer(FRAMEBUFFER)
+    return display.width, display.height
 
 def draw_crosshair(x, y, msg=""):
-    image = Image.new("RGB", (WIDTH, HEIGHT), (0, 0, 0))
+    # Alleen nodig als er echt gekalibreerd wordt, niet bij elke start
+    from PIL import Image, ImageDraw, ImageFont
+    from rgb565 import encode_rgb565
+    display = get_framebuffer(FRAMEBUFFER)
+    width, height = display.width, display.height
+    image = Image.new("RGB", (width, height), (0, 0, 0))
     draw = ImageDraw.Draw(image)
     size = 20
     draw.line([(x-size, y), (x+size, y)], fill=(0,255,0), width=3)
     draw.line([(x, y-size), (x, y+size)], fill=(0,255,0), width=3)
     font = ImageFont.truetype(FONT_SMALL, 24)
-    draw.text((WIDTH//2 - 80, HEIGHT-40), msg, fill=(255,255,255), font=font)
-    image = image.rotate(180)
-    rgb565 = bytearray()
-    for pixel in image.getdata():
-        r = pixel[0] >> 3
-        g = pixel[1] >> 2
-        b = pixel[2] >> 3
-        value = (r << 11) | (g << 5) | b
-        rgb565.append(value & 0xFF)
-        rgb565.append((value >> 8) & 0xFF)
-    with open(FRAMEBUFFER, 'wb') as f:
-        f.write(rgb565)
+    draw.text((width//2 - 80, height-40), msg, fill=(255,255,255), font=font)
+    display.write_frame(encode_rgb565(image, display.rotate))
 
 def calibrate_touch():
     print("[CALIBRATION] Starting touchscreen calibration...")
+    width, height = _screen_size()
     points = [
         ("Top Left", 30, 30),
-        ("Top Right", WIDTH-31, 30),
-        ("Bottom Right", WIDTH-31, HEIGHT-31),
-        ("Bottom Left", 30, HEIGHT-31),
-        ("Center", WIDTH//2, HEIGHT//2),
+        ("Top Right", width-31, 30),
+        ("Bottom Right", width-31, height-31),
+        ("Bottom Left", 30, height-31),
+        ("Center", width//2, height//2),
     ]
     raw_points = []
     screen_points = []
-    device = evdev.InputDevice('/dev/input/event0')
+    # Ruwe coördinaten: tijdens kalibratie heeft de dispatcher (nog) geen scale
+    dispatcher = get_dispatcher()
+    previous_scale, dispatcher.scale = dispatcher.scale, None
+    releases = dispatcher.subscribe({"up"})
+    dispatcher.start()
 
-    for name, x, y in points:
-        draw_crosshair(x, y, f"Touch the {name} cross")
-        print(f"[CALIBRATION] Waiting for touch at {name} ({x},{y})...")
-        got_tap = False
-        raw_x, raw_y = None, None
-        while not got_tap:
-            for event in device.read_loop():
-                if event.type == evdev.ecodes.EV_ABS:
-                    if event.code == evdev.ecodes.ABS_X:
-                        raw_x = event.value
-                    elif event.code == evdev.ecodes.ABS_Y:
-                        raw_y = event.value
-                elif event.type == evdev.ecodes.EV_KEY and event.code == evdev.ecodes.BTN_TOUCH and event.value == 0:
-                    if raw_x is not None and raw_y is not None:
-                        raw_points.append((raw_x, raw_y))
-                        screen_points.append((x, y))
-                        print(f"[CALIBRATION] Got raw ({raw_x}, {raw_y}) for {name}")
-                        got_tap = True
-                        break
-            if got_tap:
-                break
+    try:
+        for name, x, y in points:
+            draw_crosshair(x, y, f"Touch the {name} cross")
+            print(f"[CALIBRATION] Waiting for touch at {name} ({x},{y})...")
+            raw_x, raw_y = releases.get().raw
+            raw_points.append((raw_x, raw_y))
+            screen_points.append((x, y))
+            print(f"[CALIBRATION] Got raw ({raw_x}, {raw_y}) for {name}")
+    finally:
+        releases.close()
+        dispatcher.scale = previous_scale
 
-    calibration_data = {
-        "screen_points": screen_points,
-        "raw_points": raw_points,
-    }
+    calibration_data = fit_calibration(screen_points, raw_points, (width, height))
     with open(CALIBRATION_FILE, "w") as f:
         json.dump(calibration_data, f, indent=2)
     print("[CALIBRATION] Calibration complete and saved.")
     time.sleep(1)
 
+def _solve3(m, v):
+    """3x3 lineair stelsel m·x = v (Gauss met pivoting); ValueError als singulier."""
+    rows = [list(m[i]) + [v[i]] for i in range(3)]
+    for col in range(3):
+        pivot = max(range(col, 3), key=lambda r: abs(rows[r][col]))
+        if abs(rows[pivot][col]) < 1e-12:
+            raise ValueError("singular calibration matrix")
+        rows[col], rows[pivot] = rows[pivot], rows[col]
+        for r in range(3):
+            if r != col:
+                factor = rows[r][col] / rows[col][col]
+                rows[r] = [a - factor * b for a, b in zip(rows[r], rows[col])]
+    return [rows[i][3] / rows[i][i] for i in range(3)]
+
+def fit_affine(raw_points, screen_points):
+    """
+    Least-squares affine fit over alle punten:
+        sx = a*rx + b*ry + c,  sy = d*rx + e*ry + f
+    De X/Y-wissel van het paneel zit daar vanzelf in (a, e ~ 0).
+    """
+    n = len(raw_points)
+    sxx = sum(rx * rx for rx, _ in raw_points)
+    sxy = sum(rx * ry for rx, ry in raw_points)
+    syy = sum(ry * ry for _, ry in raw_points)
+    sx = sum(rx for rx, _ in raw_points)
+    sy = sum(ry for _, ry in raw_points)
+    normal = [[sxx, sxy, sx], [sxy, syy, sy], [sx, sy, n]]
+    coeffs = []
+    for axis in (0, 1):
+        t = [p[axis] for p in screen_points]
+        rhs = [sum(rx * v for (rx, _), v in zip(raw_points, t)),
+               sum(ry * v for (_, ry), v in zip(raw_points, t)),
+               sum(t)]
+        coeffs += _solve3(normal, rhs)
+    return coeffs
+
+def _two_point_affine(raw_points, screen_points):
+    """De oude mapping (punt 0 en 2, assen gewisseld) als affine coëfficiënten."""
+    (sx0, sy0), (sx1, sy1) = screen_points[0], screen_points[2]
+    (rx0, ry0), (rx1, ry1) = raw_points[0], raw_points[2]
+    if rx1 == rx0: rx1 += 1
+    if ry1 == ry0: ry1 += 1
+    b = (sx1 - sx0) / (ry1 - ry0)
+    d = (sy1 - sy0) / (rx1 - rx0)
+    return [0.0, b, sx0 - ry0 * b, d, 0.0, sy0 - rx0 * d]
+
+def residual_error(coeffs, raw_points, screen_points):
+    """(rms, max) afstand in pixels tussen gemapte en echte kruispunten."""
+    a, b, c, d, e, f = coeffs
+    errors = [((a*rx + b*ry + c - sx) ** 2 + (d*rx + e*ry + f - sy) ** 2) ** 0.5
+              for (rx, ry), (sx, sy) in zip(raw_points, screen_points)]
+    return (sum(err * err for err in errors) / len(errors)) ** 0.5, max(errors)
+
+def fit_calibration(screen_points, raw_points, screen_size=None):
+    """Kalibratie-data inclusief affine coëfficiënten, residual error en schermgrootte."""
+    try:
+        coeffs = fit_affine(raw_points, screen_points)
+    except (ValueError, ZeroDivisionError):
+        print("[WARNING] Calibration points are degenerate, using 2-point mapping")
+        coeffs = _two_point_affine(raw_points, screen_points)
+    rms, worst = residual_error(coeffs, raw_points, screen_points)
+    print(f"[CALIBRATION] Residual error: rms {rms:.1f} px, max {worst:.1f} px")
+    if worst > MAX_RESIDUAL:
+        print(f"[WARNING] Calibration residual above {MAX_RESIDUAL} px, consider recalibrating "
+              f"(delete {CALIBRATION_FILE})")
+    return {
+        "screen_points": screen_points,
+        "raw_points": raw_points,
+        "affine": [round(v, 8) for v in coeffs],
+        "residual_px": {"rms": round(rms, 2), "max": round(worst, 2)},
+        "screen_size": list(screen_size or (WIDTH, HEIGHT)),
+    }
+
 def load_calibration():
+    global calib, _affine, _size
     if not os.path.isfile(CALIBRATION_FILE):
         print("[INFO] No calibration file found, running calibration...")
         calibrate_touch()
     with open(CALIBRATION_FILE, "r") as f:
-        return json.load(f)
+        data = json.load(f)
+    if "affine" not in data:
+        # Oud bestand (alleen punten): één keer fitten en bijschrijven
+        data = fit_calibration(data["screen_points"], data["raw_points"])
+        with open(CALIBRATION_FILE, "w") as f:
+            json.dump(data, f, indent=2)
+    calib = data
+    _affine = tuple(data["affine"])
+    _size = tuple(data.get("screen_size", (WIDTH, HEIGHT)))
+    return data
 
-# Globale cache voor schaaldata
+# Globale cache: kalibratie-data, de affine coëfficiënten (a, b, c, d, e, f)
+# en de schermgrootte waarop gekalibreerd is
 calib = None
+_affine = None
+_size = (WIDTH, HEIGHT)
+
 def scale_touch(x, y):
-    global calib
-    if calib is None:
-        calib = load_calibration()
-    screen_points = calib["screen_points"]
-    raw_points = calib["raw_points"]
-    (sx0, sy0), (sx1, sy1) = screen_points[0], screen_points[2]
-    (rx0, ry0), (rx1, ry1) = raw_points[0], raw_points[2]
-    if rx1 == rx0: rx1 += 1
-    if ry1 == ry0: ry1 += 1
-    pixel_x = int((y - ry0) * (sx1 - sx0) / (ry1 - ry0) + sx0)
-    pixel_y = int((x - rx0) * (sy1 - sy0) / (rx1 - rx0) + sy0)
-    pixel_x = max(0, min(WIDTH-1, pixel_x))
-    pixel_y = max(0, min(HEIGHT-1, pixel_y))
+    """Ruwe paneelwaarden naar schermpixels: zes vermenigvuldigingen, geen lookups per veld."""
+    if _affine is None:
+        load_calibration()
+    a, b, c, d, e, f = _affine
+    pixel_x = round(a*x + b*y + c)
+    pixel_y = round(d*x + e*y + f)
+    pixel_x = max(0, min(_size[0]-1, pixel_x))
+    pixel_y = max(0, min(_size[1]-1, pixel_y))
     return pixel_x, pixel_y
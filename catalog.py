@@ -0,0 +1,63 @@
+# catalog.py
+"""
+Volledige coin-catalogus (CoinGecko /coins/list, 10k+ coins) voor het zoeken
+in setup. Opgeslagen als gzip TSV (id, symbol, naam per regel, ~300 KB) en
+pas ingelezen bij de eerste zoekopdracht.
+Importeren: python catalog.py
+"""
+
+import gzip
+import os
+import threading
+
+CATALOG_FILE = "coin_catalog.tsv.gz"
+
+class CoinCatalog:
+    def __init__(self, path=CATALOG_FILE):
+        self.path = path
+        self._entries = None
+        self._lock = threading.Lock()
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def entries(self):
+        """[(coingecko_id, symbol, naam)], lui geladen; leeg zonder catalogusbestand."""
+        with self._lock:
+            if self._entries is None:
+                self._entries = load_catalog(self.path)
+            return self._entries
+
+def load_catalog(path=CATALOG_FILE):
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return [tuple(line.rstrip("\n").split("\t", 2)) for line in f if line.count("\t") >= 2]
+    except FileNotFoundError:
+        return []
+    except (OSError, EOFError) as e:
+        print(f"[WARNING] Could not read catalog {path}: {e}")
+        return []
+
+def save_catalog(entries, path=CATALOG_FILE):
+    """Atomisch wegschrijven (tmp + rename), zoals snapshot.save_snapshot."""
+    tmp = f"{path}.tmp"
+    with gzip.open(tmp, "wt", encoding="utf-8") as f:
+        for coingecko_id, symbol, name in entries:
+            name = name.replace("\t", " ").replace("\n", " ")
+            f.write(f"{coingecko_id}\t{symbol}\t{name}\n")
+    os.replace(tmp, path)
+
+def import_catalog(transport=None, path=CATALOG_FILE):
+    """Haalt de volledige coinlijst op bij CoinGecko en slaat hem compact op."""
+    if transport is None:
+        from transport import get_transport
+        transport = get_transport()
+    r = transport.get(f"{transport.coingecko_url}/api/v3/coins/list")
+    r.raise_for_status()
+    entries = [(c["id"], c.get("symbol", ""), c.get("name", "")) for c in r.json() if c.get("id")]
+    save_catalog(entries, path)
+    print(f"[CATALOG] Imported {len(entries)} coins into {path}")
+    return entries
+
+if __name__ == "__main__":
+    import_catalog()
@@ -0,0 +1,84 @@
+# coin_registry.py
+"""
+Gedeelde coin-registry: coins.json één keer parsen, geïndexeerd op id en
+coingecko_id, en alleen opnieuw inlezen als het bestand echt veranderd is
+(mtime/size). Listeners horen het als de set ingeschakelde coins wijzigt.
+"""
+
+import copy
+import json
+import os
+import threading
+
+CONFIG_FILE = "coins.json"
+FALLBACK_BTC = {"id": "btc", "symbol": "BTC", "color": "#f7931a", "show": True}
+
+class CoinRegistry:
+    def __init__(self, path=CONFIG_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._stamp = None
+        self._coins = []
+        self._enabled = []
+        self.by_id = {}
+        self.by_coingecko_id = {}
+        self._listeners = []
+        self.reloads = 0
+        self.reload_if_changed()
+
+    def _file_stamp(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def add_listener(self, callback):
+        """callback(enabled_coins) als de set ingeschakelde coins verandert."""
+        self._listeners.append(callback)
+
+    def reload_if_changed(self):
+        """
+        Eén stat(); alleen bij een andere mtime/size wordt het bestand
+        opnieuw geparsed. Geeft True als de ingeschakelde set veranderde.
+        """
+        stamp = self._file_stamp()
+        if stamp == self._stamp:
+            return False
+        try:
+            with open(self.path, "r") as f:
+                coins = json.load(f).get("coins", [])
+        except (OSError, ValueError) as e:
+            print(f"[WARNING] Could not read {self.path}: {e}")
+            return False
+        enabled = [coin for coin in coins if coin.get("show", True)]
+        with self._lock:
+            old_ids = [c["id"] for c in self._enabled]
+            self._stamp = stamp
+            self._coins = coins
+            self._enabled = enabled
+            self.by_id = {c["id"]: c for c in coins}
+            self.by_coingecko_id = {c.get("coingecko_id", c["id"]): c for c in coins}
+            self.reloads += 1
+        if [c["id"] for c in enabled] == old_ids:
+            return False
+        for callback in list(self._listeners):
+            callback(self.enabled())
+        return True
+
+    def enabled(self):
+        """Ingeschakelde coins (minstens BTC), zoals main.reload_coins() vroeger."""
+        with self._lock:
+            coins = list(self._enabled)
+        return coins or [dict(FALLBACK_BTC)]
+
+    def all_coins(self):
+        """Kopie van alle coins, om in setup-mode te bewerken."""
+        with self._lock:
+            return copy.deepcopy(self._coins)
+
+    def get(self, coin_id):
+        return self.by_id.get(coin_id)
+
+    def get_by_coingecko_id(self, coingecko_id):
+        return self.by_coingecko_id.get(coingecko_id)
@@ -0,0 +1,128 @@
+# compositor.py
+"""
+Damage-tracking compositor voor de partiële dashboard-updates.
+Benoemde regio's (klok, BTC-prijs, coin-box) worden alleen als "damage"
+gemarkeerd als hun inhoud echt verandert; overlappende damage-rechthoeken
+worden samengevoegd en in één pass naar het framebuffer geschreven.
+"""
+
+import time
+from collections import OrderedDict
+
+from metrics import RENDER_SECONDS
+
+def union_rect(a, b):
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+
+def intersect_rect(a, b):
+    r = (max(a[0], b[0]), max(a[1], b[1]), min(a[2], b[2]), min(a[3], b[3]))
+    if r[2] <= r[0] or r[3] <= r[1]:
+        return None
+    return r
+
+def merge_rects(rects):
+    """Voeg overlappende/aansluitende rechthoeken samen tot ze disjunct zijn."""
+    merged = list(rects)
+    changed = True
+    while changed:
+        changed = False
+        out = []
+        for r in merged:
+            for i, o in enumerate(out):
+                if r[0] <= o[2] and o[0] <= r[2] and r[1] <= o[3] and o[1] <= r[3]:
+                    out[i] = union_rect(o, r)
+                    changed = True
+                    break
+            else:
+                out.append(r)
+        merged = out
+    return merged
+
+class Compositor:
+    """
+    Houdt de achtergrond (zonder dynamische tekst) en de regio's bij die er
+    bovenop getekend worden. Een regio heeft een content-key, een box in
+    schermcoördinaten en een paint(img, origin)-functie die z'n inhoud op
+    img tekent, waarbij origin de schermpositie van img's linkerbovenhoek is.
+    """
+
+    def __init__(self, width, height, blit):
+        self.width = width
+        self.height = height
+        self.base = None
+        self._blit = blit
+        self._regions = OrderedDict()
+        self._damage = []
+        self.stats = {"flushes": 0, "rects": 0, "pixels": 0}
+
+    def reset(self, base, regions=None):
+        """
+        Nieuwe achtergrond die al volledig op het scherm staat. regions zijn
+        de regio's die al in dat frame zitten: {naam: (key, box, paint, clip)}.
+        Alle andere regio's worden vergeten en bij de volgende set opnieuw getekend.
+        """
+        self.base = base
+        self._regions.clear()
+        self._damage = []
+        for name, (key, box, paint, clip) in (regions or {}).items():
+            self._regions[name] = {"key": key, "box": box, "paint": paint, "clip": clip}
+
+    def key(self, name):
+        region = self._regions.get(name)
+        return region["key"] if region is not None else None
+
+    def set_region(self, name, key, box, paint, damage=None, clip=False):
+        """
+        Werk een regio bij. Alleen bij een andere key of box komt er damage:
+        standaard de oude plus de nieuwe box, of de opgegeven damage-rect
+        (bv. alleen de gewijzigde cijfers van de klok).
+        Geeft True terug als er damage is bijgekomen.
+        """
+        old = self._regions.get(name)
+        if old is not None and old["key"] == key and old["box"] == box:
+            return False
+        if old is None or damage is None:
+            damage = union_rect(old["box"] if old is not None else None, box)
+        self._regions[name] = {"key": key, "box": box, "paint": paint, "clip": clip}
+        self._add_damage(damage)
+        return True
+
+    def _add_damage(self, rect):
+        if rect is None:
+            return
+        rect = intersect_rect(rect, (0, 0, self.width, self.height))
+        if rect is not None:
+            self._damage.append(rect)
+
+    def flush(self):
+        """Schrijf alle samengevoegde damage in één pass weg. Geeft #rects terug."""
+        if self.base is None or not self._damage:
+            self._damage = []
+            return 0
+        rects = merge_rects(self._damage)
+        self._damage = []
+        for rect in rects:
+            img = self.base.crop(rect)
+            for name, region in self._regions.items():
+                area = intersect_rect(region["box"], rect) if region["clip"] else rect
+                if area is None or intersect_rect(region["box"], rect) is None:
+                    continue
+                t0 = time.perf_counter()
+                if area == rect:
+                    region["paint"](img, (rect[0], rect[1]))
+                else:
+                    # Tekenen binnen de regio-box houden (zoals de oude crop)
+                    rel = (area[0] - rect[0], area[1] - rect[1], area[2] - rect[0], area[3] - rect[1])
+                    sub = img.crop(rel)
+                    region["paint"](sub, (area[0], area[1]))
+                    img.paste(sub, rel[:2])
+                RENDER_SECONDS.observe(time.perf_counter() - t0, name)
+            self._blit(img, rect[0], rect[1])
+            self.stats["pixels"] += (rect[2] - rect[0]) * (rect[3] - rect[1])
+        self.stats["flushes"] += 1
+        self.stats["rects"] += len(rects)
+        return len(rects)
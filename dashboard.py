@@ -3,25 +3,29 @@
 
 import os
 import time
-from PIL import Image, ImageDraw, ImageFont
-
-WIDTH, HEIGHT = 480, 320
-FRAMEBUFFER = "/dev/fb1"
+from PIL import Image
+from rgb565 import encode_rgb565
+from framebuffer import get_framebuffer
+from glyphs import GlyphAtlas, draw_text
+from compositor import Compositor, union_rect
+from sparkline import Sparkline
+from layout import get_layout, REFERENCE
+from metrics import RENDER_SECONDS
+from tracing import traced
+from fx import display_currency, format_price
+
+# None = standaard display-backend (zie framebuffer.py)
+FRAMEBUFFER = None
 BG_FOLDER = "backgrounds"
 BG_FALLBACK = os.path.join(BG_FOLDER, "btc-bg.png")
-textbox_offset = 60
 
-CLOCK_X = 270
-CLOCK_Y = 10
-CLOCK_W = 200
-CLOCK_H = 55
+# Waarden van het referentie-ontwerp (480x320); per display zie view.layout
+_reference = get_layout(*REFERENCE)
+textbox_offset = _reference.content_offset
+SPARK_POINTS = _reference.spark_points
 
-FONT_BIG = "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"
-FONT_SMALL = "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"
-font_main = ImageFont.truetype(FONT_BIG, 36)
-font_value = ImageFont.truetype(FONT_BIG, 48)
-font_time = ImageFont.truetype(FONT_BIG, 28)
-font_date = ImageFont.truetype(FONT_SMALL, 20)
+# Verouderde prijzen (snapshot/offline) grijs tonen
+STALE_COLOR = (150,150,150)
 
 def hex_to_rgb(hex_color, fallback=(247,147,26)):
     try:
@@ -30,168 +34,320 @@ def hex_to_rgb(hex_color, fallback=(247,147,26)):
     except:
         return fallback
 
-def draw_dashboard(btc_price, btc_color, coin, coin_price):
-    coin_id = coin["id"]
-    coin_bg = os.path.join(BG_FOLDER, f"{coin_id}-bg.png")
-    if not os.path.isfile(coin_bg):
-        coin_bg = BG_FALLBACK
-    full_bg = Image.open(coin_bg).convert("RGB").resize((WIDTH, HEIGHT))
-    draw = ImageDraw.Draw(full_bg)
-
-    label = "BTC"
-    price_text = "$" + (str(btc_price) if btc_price is not None else "N/A")
-    right_offset = textbox_offset
-    btc_color_rgb = btc_color
-
-    label_bbox = draw.textbbox((0, 0), label, font=font_main)
-    label_w = label_bbox[2] - label_bbox[0]
-    label_h = label_bbox[3] - label_bbox[1]
-    price_bbox = draw.textbbox((0, 0), price_text, font=font_value)
-    price_w = price_bbox[2] - price_bbox[0]
-    price_h = price_bbox[3] - price_bbox[1]
-    btc_label_y = int(HEIGHT * 0.35) - label_h
-    btc_price_y = btc_label_y + label_h + 5
-
-    global _btc_label_y, _btc_price_y, _btc_price_h
-    _btc_label_y = btc_label_y
-    _btc_price_y = btc_price_y
-    _btc_price_h = price_h
-
-    # BTC-label en prijs worden direct op de achtergrond getekend!
-    draw.text(((WIDTH - label_w)//2 + right_offset, btc_label_y), label, font=font_main, fill=btc_color_rgb)
-    draw.text(((WIDTH - price_w)//2 + right_offset, btc_price_y), price_text, font=font_value, fill=(255,255,255))
-
-    global _full_bg_cache
-    _full_bg_cache = full_bg.copy()
-
-    img_rot = full_bg.rotate(180)
-    rgb565 = bytearray()
-    for pixel in img_rot.getdata():
-        r = pixel[0] >> 3
-        g = pixel[1] >> 2
-        b = pixel[2] >> 3
-        value = (r << 11) | (g << 5) | b
-        rgb565.append(value & 0xFF)
-        rgb565.append((value >> 8) & 0xFF)
-    with open(FRAMEBUFFER, 'wb') as f:
-        f.write(rgb565)
-
-def update_clock_area(btc_color=(247,147,26)):
-    global _full_bg_cache
-    if '_full_bg_cache' not in globals():
-        return
-
-    img = _full_bg_cache.crop((CLOCK_X, CLOCK_Y, CLOCK_X + CLOCK_W, CLOCK_Y + CLOCK_H))
-    draw = ImageDraw.Draw(img)
-    t = time.localtime()
-    now_str = time.strftime("%H:%M:%S", t)
-    date_str = time.strftime("%a %d %b %Y", t)
-    time_color = (255,255,255)
-    date_color = btc_color
-    draw.text((10, 0), now_str, font=font_time, fill=time_color)
-    draw.text((10, 30), date_str, font=font_date, fill=date_color)
-
-    img_rot = img.rotate(180)
-    rgb565 = bytearray()
-    for pixel in img_rot.getdata():
-        r = pixel[0] >> 3
-        g = pixel[1] >> 2
-        b = pixel[2] >> 3
-        val = (r << 11) | (g << 5) | b
-        rgb565.append(val & 0xFF)
-        rgb565.append((val >> 8) & 0xFF)
-
-    fb_x = WIDTH - CLOCK_X - CLOCK_W
-    fb_y = HEIGHT - CLOCK_Y - CLOCK_H
-    fb_offset = (fb_y * WIDTH + fb_x) * 2
-
-    with open(FRAMEBUFFER, "r+b") as f:
-        for row in range(CLOCK_H):
-            f.seek(fb_offset + row * WIDTH * 2)
-            start = row * CLOCK_W * 2
-            end = start + CLOCK_W * 2
-            f.write(rgb565[start:end])
-
-def update_coin_value_area_variable(coin_symbol, coin_value, coin_color=(255,255,255), right_offset=60):
-    global _full_bg_cache, _btc_price_y, _btc_price_h, _prev_coin_box
-    if '_full_bg_cache' not in globals():
-        return
-    if '_btc_price_y' not in globals() or '_btc_price_h' not in globals():
-        _btc_price_y = int(HEIGHT * 0.35) + 5
-        _btc_price_h = 48
-
-    symbol_text = coin_symbol.upper()
-    value_text = "$" + (str(coin_value) if coin_value is not None else "N/A")
-
-    symbol_bbox = font_main.getbbox(symbol_text)
-    symbol_w = symbol_bbox[2] - symbol_bbox[0]
-    symbol_h = symbol_bbox[3] - symbol_bbox[1]
-    value_bbox = font_value.getbbox(value_text)
-    value_w = value_bbox[2] - value_bbox[0]
-    value_h = value_bbox[3] - value_bbox[1]
-
-    box_w = max(symbol_w, value_w) + 40
-    box_h = symbol_h + value_h + 25
-    box_x = (WIDTH - box_w)//2 + right_offset
-    box_y = _btc_price_y + _btc_price_h + 20
-
-    # UNION met vorige box voor anti-ghosting
-    if '_prev_coin_box' in globals() and _prev_coin_box:
-        prev_x, prev_y, prev_w, prev_h = _prev_coin_box
-        min_x = min(box_x, prev_x)
-        min_y = min(box_y, prev_y)
-        max_x = max(box_x + box_w, prev_x + prev_w)
-        max_y = max(box_y + box_h, prev_y + prev_h)
-        box_x, box_y = min_x, min_y
-        box_w, box_h = max_x - min_x, max_y - min_y
-
-    # Begrens box binnen het scherm:
-    if box_x < 0:
-        box_x = 0
-    if box_y < 0:
-        box_y = 0
-    if box_x + box_w > WIDTH:
-        box_w = WIDTH - box_x
-    if box_y + box_h > HEIGHT:
-        box_h = HEIGHT - box_y
-    if box_w <= 0 or box_h <= 0:
-        return  # Skip deze draw, want onzichtbaar of fout
-
-
-    # Sla nieuwe box op voor de volgende iteratie
-    _prev_coin_box = (box_x, box_y, box_w, box_h)
-
-    # Knip uit bg en teken tekst
-    img = _full_bg_cache.crop((box_x, box_y, box_x + box_w, box_y + box_h))
-    draw = ImageDraw.Draw(img)
-
-    # Tekst centreren
-    symbol_x = (box_w - symbol_w)//2
-    symbol_y = 7
-    value_x = (box_w - value_w)//2
-    value_y = symbol_y + symbol_h + 8
-
-    draw.text((symbol_x, symbol_y), symbol_text, font=font_main, fill=coin_color)
-    draw.text((value_x, value_y), value_text, font=font_value, fill=(255,255,255))
-
-    img_rot = img.rotate(180)
-    rgb565 = bytearray()
-    for pixel in img_rot.getdata():
-        r = pixel[0] >> 3
-        g = pixel[1] >> 2
-        b = pixel[2] >> 3
-        val = (r << 11) | (g << 5) | b
-        rgb565.append(val & 0xFF)
-        rgb565.append((val >> 8) & 0xFF)
-
-    fb_x = WIDTH - box_x - box_w
-    fb_y = HEIGHT - box_y - box_h
-    fb_offset = (fb_y * WIDTH + fb_x) * 2
-
-    with open(FRAMEBUFFER, "r+b") as f:
-        for row in range(box_h):
-            f.seek(fb_offset + row * WIDTH * 2)
-            start = row * box_w * 2
-            end = start + box_w * 2
-            f.write(rgb565[start:end])
-
+class DashboardView:
+    """
+    Het dashboard op één display: layout voor de grootte van dat display,
+    eigen glyph-atlassen (fonts op de geschaalde grootte), compositor en
+    sparkline. Eén view wordt steeds vanuit één thread bijgewerkt;
+    render_dashboard() mag daarnaast vanuit een worker (prefetch).
+    spec=None volgt dashboard.FRAMEBUFFER / de standaard-backend;
+    currency=None toont de ingestelde valuta (fx.display_currency()).
+    """
+
+    def __init__(self, spec=None, currency=None):
+        self.spec = spec
+        self._currency = currency
+        self._display = None
+        self.layout = None
+        self._compositor = None
+        # Layout van het BTC-blok; de coin-box komt eronder
+        self._state = {}
+
+    @property
+    def display(self):
+        if self._display is None:
+            self._display = get_framebuffer(self.spec if self.spec is not None else FRAMEBUFFER)
+            self._setup(self._display.width, self._display.height)
+        return self._display
+
+    @property
+    def currency(self):
+        return self._currency or display_currency()
+
+    def _setup(self, width, height):
+        layout = self.layout = get_layout(width, height)
+        # Voorgerasterde glyphs per font: klok en prijzen zonder FreeType per update.
+        # Fonts worden pas bij het eerste gebruik geladen (of vooraf via warm_fonts()).
+        self.atlases = {name: GlyphAtlas(font, f"{name}@{font[1]}") for name, font in layout.fonts.items()}
+        # Regio's: "btc_price", "clock", "coin" en "sparkline" boven op de achtergrond
+        self._compositor = Compositor(width, height, self._blit_screen_region)
+        self._sparkline = Sparkline(layout.spark_w, layout.spark_h, layout.spark_step)
+        self._state = {"btc_price_y": layout.btc_label_bottom + layout.btc_gap,
+                       "btc_price_h": layout.btc_price_h}
+
+    def ensure(self):
+        """Display openen en layout/atlassen klaarzetten (idempotent)."""
+        self.display
+        return self
+
+    def warm_fonts(self):
+        """Laad en rasteriseer alle fonts van deze view (bv. op een achtergrond-thread)."""
+        self.ensure()
+        for name, atlas in self.atlases.items():
+            if name != "hud":  # alleen met --hud nodig, laadt dan vanzelf
+                atlas.warm()
+
+    def _blit_screen_region(self, img, x, y):
+        """Schrijf een uitsnede op schermpositie (x, y) naar het framebuffer (evt. gedraaid)."""
+        display = self.display
+        w, h = img.size
+        rgb565 = encode_rgb565(img, display.rotate)
+        if display.rotate:
+            display.blit(display.width - x - w, display.height - y - h, w, h, rgb565)
+        else:
+            display.blit(x, y, w, h, rgb565)
+
+    def _btc_region(self, btc_price, btc_color, stale=False):
+        """
+        BTC-label + prijs als compositor-regio: (key, box, paint, layout).
+        """
+        lay = self.layout
+        atlas_main, atlas_value = self.atlases["main"], self.atlases["value"]
+        label = "BTC"
+        price_text = format_price(btc_price, self.currency)
+        right_offset = lay.content_offset
+        btc_color_rgb = tuple(btc_color)
+        price_color = STALE_COLOR if stale else (255,255,255)
+
+        label_bbox = atlas_main.bbox(label)
+        label_w = label_bbox[2] - label_bbox[0]
+        label_h = label_bbox[3] - label_bbox[1]
+        price_bbox = atlas_value.bbox(price_text)
+        price_w = price_bbox[2] - price_bbox[0]
+        price_h = price_bbox[3] - price_bbox[1]
+        btc_label_y = lay.btc_label_bottom - label_h
+        btc_price_y = btc_label_y + label_h + lay.btc_gap
+
+        label_xy = ((lay.width - label_w)//2 + right_offset, btc_label_y)
+        price_xy = ((lay.width - price_w)//2 + right_offset, btc_price_y)
+        box = union_rect(
+            (label_xy[0] + label_bbox[0], label_xy[1] + label_bbox[1], label_xy[0] + label_bbox[2], label_xy[1] + label_bbox[3]),
+            (price_xy[0] + price_bbox[0], price_xy[1] + price_bbox[1], price_xy[0] + price_bbox[2], price_xy[1] + price_bbox[3]))
+
+        def paint(img, origin):
+            draw_text(img, (label_xy[0] - origin[0], label_xy[1] - origin[1]), atlas_main, label, btc_color_rgb)
+            draw_text(img, (price_xy[0] - origin[0], price_xy[1] - origin[1]), atlas_value, price_text, price_color)
+
+        layout = {"btc_price_y": btc_price_y, "btc_price_h": price_h}
+        return (price_text, btc_color_rgb, stale), box, paint, layout
+
+    @traced()
+    def render_dashboard(self, btc_price, btc_color, coin, btc_stale=False):
+        """
+        Rendert het volledige dashboard-frame (achtergrond + BTC-label/prijs)
+        zonder naar het framebuffer te schrijven. Veilig vanuit een worker-thread.
+        Geeft een frame-dict terug met het beeld, de RGB565-data en de layout.
+        """
+        display = self.display
+        t0 = time.perf_counter()
+        coin_id = coin["id"]
+        coin_bg = os.path.join(BG_FOLDER, f"{coin_id}-bg.png")
+        if not os.path.isfile(coin_bg):
+            coin_bg = BG_FALLBACK
+        background = Image.open(coin_bg).convert("RGB").resize((display.width, display.height))
+
+        # BTC-label en prijs worden direct op het frame getekend!
+        key, box, paint, layout = self._btc_region(btc_price, btc_color, btc_stale)
+        full_bg = background.copy()
+        paint(full_bg, (0, 0))
+        RENDER_SECONDS.observe(time.perf_counter() - t0, "frame")
+
+        return {
+            "key": (coin_id, btc_price, tuple(btc_color), bool(btc_stale), self.currency),
+            "background": background,
+            "image": full_bg,
+            "rgb565": encode_rgb565(full_bg, display.rotate),
+            "btc_region": (key, box, paint, False),
+            "layout": layout,
+        }
+
+    @traced()
+    def present_frame(self, frame):
+        """
+        Zet een (eventueel vooraf gerenderd) frame op het scherm: één buffer-copy
+        naar het framebuffer. Klok en coin-box worden daarna opnieuw getekend.
+        """
+        self._state.update(frame["layout"])
+        self._compositor.reset(frame["background"], {"btc_price": frame["btc_region"]})
+        self.display.write_frame(frame["rgb565"])
+
+    @traced()
+    def draw_dashboard(self, btc_price, btc_color, coin, coin_price, btc_stale=False):
+        self.present_frame(self.render_dashboard(btc_price, btc_color, coin, btc_stale))
+
+    @traced()
+    def flush(self):
+        """Schrijf alle openstaande damage (klok/BTC/coin) in één pass weg."""
+        return self._compositor.flush() if self._compositor is not None else 0
+
+    @traced()
+    def update_btc_price_area(self, btc_price, btc_color=(247,147,26), flush=True, stale=False):
+        """BTC-prijs tussen rotaties bijwerken; doet niets als de tekst gelijk blijft."""
+        self.ensure()
+        key, box, paint, layout = self._btc_region(btc_price, btc_color, stale)
+        if self._compositor.key("btc_price") == key:
+            return
+        self._state.update(layout)
+        self._compositor.set_region("btc_price", key, box, paint)
+        if flush:
+            self._compositor.flush()
+
+    @traced()
+    def update_clock_area(self, btc_color=(247,147,26), flush=True, now=None):
+        if self._compositor is None or self._compositor.base is None:
+            return
+
+        lay = self.layout
+        atlas_time, atlas_date = self.atlases["time"], self.atlases["date"]
+        t = time.localtime(now)
+        now_str = time.strftime("%H:%M:%S", t)
+        date_str = time.strftime("%a %d %b %Y", t)
+        time_color = (255,255,255)
+        date_color = tuple(btc_color)
+        key = (now_str, date_str, date_color)
+        text_x = lay.clock_x + lay.clock_inset
+
+        # Zelfde datum/kleur: alleen de cijfercellen die veranderd zijn (bv. seconden)
+        damage = None
+        prev = self._compositor.key("clock")
+        if prev is not None and prev[1:] == key[1:]:
+            cell = atlas_time.changed_box(prev[0], now_str)
+            if cell is None:
+                return
+            damage = (text_x + cell[0], lay.clock_y + cell[1], text_x + cell[2], lay.clock_y + cell[3])
+
+        def paint(img, origin):
+            x, y = text_x - origin[0], lay.clock_y - origin[1]
+            atlas_time.draw(img, (x, y), now_str, time_color)
+            atlas_date.draw(img, (x, y + lay.clock_date_dy), date_str, date_color)
+
+        self._compositor.set_region("clock", key, lay.clock_box(), paint, damage=damage, clip=True)
+        if flush:
+            self._compositor.flush()
+
+    @traced()
+    def update_coin_value_area_variable(self, coin_symbol, coin_value, coin_color=(255,255,255), right_offset=None, flush=True, stale=False):
+        if self._compositor is None or self._compositor.base is None:
+            return
+
+        lay = self.layout
+        atlas_main, atlas_value = self.atlases["main"], self.atlases["value"]
+        if right_offset is None:
+            right_offset = lay.content_offset
+        symbol_text = coin_symbol.upper()
+        value_text = format_price(coin_value, self.currency)
+        coin_color = tuple(coin_color)
+        value_color = STALE_COLOR if stale else (255,255,255)
+        key = (symbol_text, value_text, coin_color, right_offset, stale)
+        if self._compositor.key("coin") == key:
+            return  # Niets veranderd: geen meet-, teken- of schrijfwerk
+
+        symbol_bbox = atlas_main.bbox(symbol_text)
+        symbol_w = symbol_bbox[2] - symbol_bbox[0]
+        symbol_h = symbol_bbox[3] - symbol_bbox[1]
+        value_bbox = atlas_value.bbox(value_text)
+        value_w = value_bbox[2] - value_bbox[0]
+        value_h = value_bbox[3] - value_bbox[1]
+
+        box_w = max(symbol_w, value_w) + lay.coin_pad_x
+        box_h = symbol_h + value_h + lay.coin_pad_y
+        box_x = (lay.width - box_w)//2 + right_offset
+        box_y = self._state["btc_price_y"] + self._state["btc_price_h"] + lay.coin_top_gap
+
+        # Tekst centreren
+        symbol_x = box_x + (box_w - symbol_w)//2
+        symbol_y = box_y + lay.coin_symbol_dy
+        value_x = box_x + (box_w - value_w)//2
+        value_y = symbol_y + symbol_h + lay.coin_value_gap
+
+        def paint(img, origin):
+            draw_text(img, (symbol_x - origin[0], symbol_y - origin[1]), atlas_main, symbol_text, coin_color)
+            draw_text(img, (value_x - origin[0], value_y - origin[1]), atlas_value, value_text, value_color)
+
+        # De oude box wordt door de compositor meegenomen als damage (anti-ghosting)
+        box = (box_x, box_y, box_x + box_w, box_y + box_h)
+        self._state["coin_box"] = box
+        self._compositor.set_region("coin", key, box, paint, clip=True)
+        if flush:
+            self._compositor.flush()
+
+    @traced()
+    def update_sparkline_area(self, coin_id, total, values, line_color=(255,255,255), flush=True):
+        """
+        Sparkline van de getoonde coin. total/values komen van
+        price.get_price_points(coin, view.layout.spark_points); bij één nieuw
+        punt wordt de mask alleen verschoven en het nieuwe lijnstuk getekend.
+        """
+        if self._compositor is None or self._compositor.base is None or "coin_box" not in self._state:
+            return
+        lay = self.layout
+        # Historie (en dus mask) verschilt per valuta
+        self._sparkline.update((coin_id, self.currency), total, values)
+        mask = self._sparkline.mask
+        line_color = tuple(line_color)
+        x = (lay.width - lay.spark_w)//2 + lay.content_offset
+        y = min(self._state["coin_box"][3] + lay.spark_gap, lay.height - lay.spark_h)
+
+        def paint(img, origin):
+            img.paste(line_color, (x - origin[0], y - origin[1]), mask)
+
+        box = (x, y, x + lay.spark_w, y + lay.spark_h)
+        self._compositor.set_region("sparkline", (self._sparkline.key, line_color), box, paint)
+        if flush:
+            self._compositor.flush()
+
+    def update_hud(self, lines, flush=True):
+        """Debug-HUD linksonder: een paar regels tekst op een zwart vlak."""
+        if self._compositor is None or self._compositor.base is None:
+            return
+        lines = tuple(lines)
+        if self._compositor.key("hud") == lines:
+            return
+        lay = self.layout
+        atlas = self.atlases["hud"]
+        pad = lay.hud_pad
+        w = max(atlas.bbox(line)[2] for line in lines) + 2 * pad
+        h = len(lines) * lay.hud_line_h + 2 * pad
+        x, y = lay.hud_x, lay.height - lay.hud_bottom - h
+
+        def paint(img, origin):
+            left, top = x - origin[0], y - origin[1]
+            img.paste((0,0,0), (left, top, left + w, top + h))
+            for i, line in enumerate(lines):
+                # Tekst verandert elke seconde: direct uit de atlas, niet via de LRU
+                atlas.draw(img, (left + pad, top + pad + i * lay.hud_line_h), line, (0,255,0))
+
+        self._compositor.set_region("hud", lines, (x, y, x + w, y + h), paint)
+        if flush:
+            self._compositor.flush()
+
+# Het dashboard op het standaard-display (het touch-LCD). De functies
+# hieronder zijn de oude module-API en werken op deze view.
+default_view = DashboardView()
+
+def warm_fonts():
+    default_view.warm_fonts()
+
+def render_dashboard(btc_price, btc_color, coin, btc_stale=False):
+    return default_view.render_dashboard(btc_price, btc_color, coin, btc_stale)
+
+def present_frame(frame):
+    default_view.present_frame(frame)
+
+def draw_dashboard(btc_price, btc_color, coin, coin_price, btc_stale=False):
+    default_view.draw_dashboard(btc_price, btc_color, coin, coin_price, btc_stale)
+
+def flush_dashboard():
+    return default_view.flush()
+
+def update_btc_price_area(btc_price, btc_color=(247,147,26), flush=True, stale=False):
+    default_view.update_btc_price_area(btc_price, btc_color, flush, stale)
+
+def update_clock_area(btc_color=(247,147,26), flush=True, now=None):
+    default_view.update_clock_area(btc_color, flush, now)
+
+def update_coin_value_area_variable(coin_symbol, coin_value, coin_color=(255,255,255), right_offset=None, flush=True, stale=False):
+    default_view.update_coin_value_area_variable(coin_symbol, coin_value, coin_color, right_offset, flush, stale)
+
+def update_sparkline_area(coin_id, total, values, line_color=(255,255,255), flush=True):
+    default_view.update_sparkline_area(coin_id, total, values, line_color, flush)
@@ -0,0 +1,87 @@
+# display_worker.py
+"""
+Eigen render-thread per extra display. Het hoofd-display (het touch-LCD)
+wordt door de scheduler in main.py bijgewerkt; elk extra display (bv. HDMI
+op een andere resolutie) krijgt een DisplayWorker met een eigen
+DashboardView, zodat een traag frame daar de klok op het LCD niet ophoudt.
+De prijsfeed is gedeeld: alle views lezen dezelfde cache uit price.py.
+"""
+
+import threading
+import time
+
+class DisplayWorker:
+    """
+    submit(naam, func) zet werk klaar dat als func(view) op de worker draait.
+    Werk met dezelfde naam dat nog niet gedaan is wordt vervangen: een trage
+    worker slaat tussenstanden over in plaats van achter te gaan lopen.
+    De klok tikt de worker zelf, elke seconde.
+    """
+
+    def __init__(self, view, clock_color=(247,147,26)):
+        self.view = view
+        self.clock_color = clock_color
+        self.name = view.spec or "default"
+        self._cond = threading.Condition()
+        self._pending = {}
+        self._running = False
+        self._thread = None
+        self.stats = {"runs": 0, "jobs": 0, "replaced": 0, "total_ms": 0.0, "max_ms": 0.0}
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name=f"display {self.name}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+
+    def submit(self, name, func):
+        with self._cond:
+            # Achteraan opnieuw inplannen, zodat de volgorde van submit() blijft kloppen
+            if self._pending.pop(name, None) is not None:
+                self.stats["replaced"] += 1
+            self._pending[name] = func
+            self._cond.notify()
+
+    def report(self):
+        runs = self.stats["runs"]
+        avg = self.stats["total_ms"] / runs if runs else 0.0
+        return {"runs": runs, "jobs": self.stats["jobs"], "replaced": self.stats["replaced"],
+                "avg_ms": avg, "max_ms": self.stats["max_ms"]}
+
+    def reset_stats(self):
+        self.stats.update(runs=0, jobs=0, replaced=0, total_ms=0.0, max_ms=0.0)
+
+    def _run(self):
+        view = self.view
+        view.warm_fonts()
+        print(f"[DISPLAY] {self.name}: {view.layout}")
+        while True:
+            with self._cond:
+                # Wakker op nieuw werk of op de volgende hele seconde (klok)
+                tick = int(time.time()) + 1
+                while self._running and not self._pending:
+                    remaining = tick - time.time()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if not self._running:
+                    return
+                jobs, self._pending = self._pending, {}
+            t0 = time.perf_counter()
+            for func in jobs.values():
+                try:
+                    func(view)
+                except Exception as e:
+                    print(f"[WARNING] Display {self.name}: {e}")
+            view.update_clock_area(self.clock_color, flush=False, now=time.time())
+            view.flush()
+            ms = (time.perf_counter() - t0) * 1000
+            self.stats["runs"] += 1
+            self.stats["jobs"] += len(jobs)
+            self.stats["total_ms"] += ms
+            self.stats["max_ms"] = max(self.stats["max_ms"], ms)
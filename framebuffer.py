@@ -0,0 +1,324 @@
+# framebuffer.py
+"""
+Display-backends met een RGB565 schaduwkopie in het geheugen. Blits
+vergelijken met de schaduw en schrijven alleen de stukken (spans) die echt
+veranderd zijn.
+
+Backends (kies met DASHBOARD_DISPLAY, --display of set_default_display()):
+    /dev/fb1 of fb:/dev/fb1    framebuffer-device (mmap)
+    file:/tmp/fb.raw           gewoon bestand met ruwe RGB565-frames
+    memory:                    alleen in het geheugen (benchmarks, headless)
+    png:/tmp/frames/           PNG per gewijzigde blit (of png:/tmp/dash.png: steeds overschrijven)
+
+Achter de spec mogen opties na komma's: een grootte (",1280x720") en de
+oriëntatie (",rot0" of ",rot180"). Standaard 180° gedraaid, want het LCD
+zit op z'n kop; een HDMI-scherm wil meestal ",rot0". Zonder grootte wordt
+die van een /dev/fbN uit sysfs gelezen, anders 480x320.
+"""
+
+import mmap
+import os
+import re
+import stat
+import threading
+import time
+
+from metrics import WRITE_SECONDS, WRITE_BYTES
+
+DEFAULT_DEVICE = os.environ.get("DASHBOARD_DISPLAY") or os.environ.get("DASHBOARD_FRAMEBUFFER", "/dev/fb1")
+BYTES_PER_PIXEL = 2
+DEFAULT_SIZE = (480, 320)
+
+def _first_diff(a, b):
+    """Index van de eerste byte waar a en b verschillen (binary search op slices)."""
+    lo, hi = 0, len(a)
+    while hi - lo > 16:
+        mid = (lo + hi) // 2
+        if a[lo:mid] == b[lo:mid]:
+            lo = mid
+        else:
+            hi = mid
+    for i in range(lo, hi):
+        if a[i] != b[i]:
+            return i
+    return hi
+
+def _last_diff(a, b):
+    """Index net na de laatste byte waar a en b verschillen."""
+    lo, hi = 0, len(a)
+    while hi - lo > 16:
+        mid = (lo + hi) // 2
+        if a[mid:hi] == b[mid:hi]:
+            hi = mid
+        else:
+            lo = mid
+    for i in range(hi - 1, lo - 1, -1):
+        if a[i] != b[i]:
+            return i + 1
+    return lo
+
+def decode_rgb565(data, width, height, rotate=True):
+    """RGB565-framebufferdata terug naar een RGB-image in schermoriëntatie."""
+    from PIL import Image
+    img = Image.frombuffer("RGB", (width, height), data, "raw", "BGR;16", 0, 1)
+    if not rotate:
+        return img
+    return img.transpose(getattr(Image, "Transpose", Image).ROTATE_180)
+
+class Display:
+    """
+    Basis voor alle backends. Coördinaten zijn in framebuffer-ruimte (met
+    rotate dus al 180° gedraaid), data is RGB565 zoals encode_rgb565() die
+    levert. Subklassen schrijven gewijzigde spans weg in _write() en ronden
+    een blit af in _sync().
+    """
+
+    def __init__(self, path, width=480, height=320, rotate=True):
+        self.path = path
+        self.width = width
+        self.height = height
+        self.rotate = rotate
+        self.stride = width * BYTES_PER_PIXEL
+        self.size = self.stride * height
+        self.lock = threading.Lock()
+        self.stats = {"syscalls": 0, "bytes": 0, "spans": 0, "blits": 0}
+        self.last_blit = {"syscalls": 0, "bytes": 0, "spans": 0}
+        self.shadow = bytearray(self.size)
+
+    def _write(self, off, chunk):
+        """Eén gewijzigde span wegschrijven; geeft het aantal syscalls terug."""
+        return 0
+
+    def _sync(self):
+        """Na een blit met wijzigingen; geeft het aantal syscalls terug."""
+        return 0
+
+    def close(self):
+        pass
+
+    def blit(self, x, y, w, h, data):
+        """
+        Schrijf een w*h RGB565-blok op (x, y). Alleen rijen/spans die afwijken
+        van de schaduwkopie worden naar de backend geschreven.
+        Geeft het aantal geschreven bytes terug.
+        """
+        row_bytes = w * BYTES_PER_PIXEL
+        if len(data) < row_bytes * h:
+            raise ValueError("blit data too short for region")
+        t0 = time.perf_counter()
+        syscalls = spans = written = 0
+        with self.lock:
+            shadow = self.shadow
+            base = y * self.stride + x * BYTES_PER_PIXEL
+            for row in range(h):
+                off = base + row * self.stride
+                src = data[row * row_bytes:(row + 1) * row_bytes]
+                dst = shadow[off:off + row_bytes]
+                if src == dst:
+                    continue
+                # Span op pixelgrens (2 bytes) afronden
+                start = _first_diff(src, dst) & ~1
+                end = (_last_diff(src, dst) + 1) & ~1
+                chunk = src[start:end]
+                shadow[off + start:off + end] = chunk
+                syscalls += self._write(off + start, chunk)
+                spans += 1
+                written += end - start
+            if spans:
+                syscalls += self._sync()
+            self.last_blit = {"syscalls": syscalls, "bytes": written, "spans": spans}
+            self.stats["syscalls"] += syscalls
+            self.stats["bytes"] += written
+            self.stats["spans"] += spans
+            self.stats["blits"] += 1
+        WRITE_SECONDS.observe(time.perf_counter() - t0, self.path)
+        WRITE_BYTES.inc(written, self.path)
+        return written
+
+    def write_frame(self, data, diff=True):
+        """
+        Volledig frame (width*height RGB565) schrijven, standaard diff-based.
+        diff=False schrijft alles in één keer: sneller als vrijwel elke rij
+        verandert (animaties).
+        """
+        if diff:
+            return self.blit(0, 0, self.width, self.height, data)
+        if len(data) < self.size:
+            raise ValueError("frame data too short")
+        t0 = time.perf_counter()
+        with self.lock:
+            self.shadow[:] = data[:self.size]
+            syscalls = self._write(0, self.shadow) + self._sync()
+            self.last_blit = {"syscalls": syscalls, "bytes": self.size, "spans": 1}
+            self.stats["syscalls"] += syscalls
+            self.stats["bytes"] += self.size
+            self.stats["spans"] += 1
+            self.stats["blits"] += 1
+        WRITE_SECONDS.observe(time.perf_counter() - t0, self.path)
+        WRITE_BYTES.inc(self.size, self.path)
+        return self.size
+
+    def fill(self, value=0):
+        """Hele scherm met één RGB565-kleur vullen (0 = zwart)."""
+        pixel = bytes((value & 0xFF, (value >> 8) & 0xFF))
+        return self.write_frame(pixel * (self.width * self.height))
+
+    def to_image(self):
+        """Huidige inhoud als RGB-image in schermoriëntatie (terug gedraaid)."""
+        with self.lock:
+            data = bytes(self.shadow)
+        return decode_rgb565(data, self.width, self.height, self.rotate)
+
+class Framebuffer(Display):
+    """
+    Langlevend framebuffer-device: één keer openen + mmap.
+
+    Een gewoon bestand mag /dev/fb1 vervangen (handig voor tests/off-device):
+    het wordt dan op de juiste grootte gezet en na elke blit ge-msynct.
+    Alleen met create=True wordt een ontbrekend pad aangemaakt; een device
+    dat (nog) niet bestaat is een fout, anders schrijft het dashboard
+    ongemerkt naar een bestand dat later het echte device verbergt.
+    """
+
+    def __init__(self, path=DEFAULT_DEVICE, width=480, height=320, rotate=True, create=False):
+        super().__init__(path, width, height, rotate)
+        try:
+            self._fd = os.open(path, os.O_RDWR | (os.O_CREAT if create else 0), 0o644)
+        except FileNotFoundError:
+            print(f"[ERROR] Display device {path} not found (is the fbtft driver loaded?)")
+            raise
+        self._regular = stat.S_ISREG(os.fstat(self._fd).st_mode)
+        if self._regular and os.fstat(self._fd).st_size < self.size:
+            os.ftruncate(self._fd, self.size)
+        try:
+            self._mm = mmap.mmap(self._fd, self.size, mmap.MAP_SHARED,
+                                 mmap.PROT_READ | mmap.PROT_WRITE)
+            self.shadow = bytearray(self._mm[:self.size])
+        except (OSError, ValueError) as e:
+            # Sommige drivers ondersteunen geen mmap: val terug op pwrite()
+            print(f"[WARNING] mmap of {path} failed ({e}), using pwrite fallback")
+            self._mm = None
+            self.shadow = bytearray(os.pread(self._fd, self.size, 0).ljust(self.size, b"\x00"))
+
+    def _write(self, off, chunk):
+        if self._mm is not None:
+            self._mm[off:off + len(chunk)] = chunk
+            return 0
+        os.pwrite(self._fd, chunk, off)
+        return 1
+
+    def _sync(self):
+        if self._mm is not None and self._regular:
+            self._mm.flush()
+            return 1
+        return 0
+
+    def close(self):
+        with self.lock:
+            if self._mm is not None:
+                self._mm.close()
+                self._mm = None
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+class MemoryDisplay(Display):
+    """Alleen de schaduwkopie: headless draaien en benchmarks zonder I/O."""
+
+class PngDisplay(Display):
+    """
+    Schrijft na elke blit met wijzigingen een PNG (schermoriëntatie).
+    Eindigt path op .png dan wordt dat ene bestand steeds overschreven,
+    anders komen er genummerde frames in die map.
+    """
+
+    def __init__(self, path, width=480, height=320, rotate=True):
+        super().__init__(path, width, height, rotate)
+        self.single = path.lower().endswith(".png")
+        if not self.single:
+            os.makedirs(path, exist_ok=True)
+        self.frames = 0
+
+    def _sync(self):
+        # Wordt binnen self.lock aangeroepen: schaduw direct decoderen
+        img = decode_rgb565(bytes(self.shadow), self.width, self.height, self.rotate)
+        self.frames += 1
+        target = self.path if self.single else os.path.join(self.path, f"frame-{self.frames:06d}.png")
+        tmp = target + ".tmp"
+        img.save(tmp, "PNG")
+        os.replace(tmp, target)
+        return 1
+
+def _sysfs_size(path):
+    """(breedte, hoogte) van /dev/fbN volgens sysfs, of None. Alleen 16 bpp wordt ondersteund."""
+    m = re.fullmatch(r"/dev/(fb\d+)", path)
+    if m is None:
+        return None
+    base = f"/sys/class/graphics/{m.group(1)}"
+    try:
+        with open(f"{base}/virtual_size") as f:
+            width, height = (int(v) for v in f.read().strip().split(","))
+        with open(f"{base}/bits_per_pixel") as f:
+            bpp = int(f.read().strip())
+    except (OSError, ValueError):
+        return None
+    if bpp != BYTES_PER_PIXEL * 8:
+        raise ValueError(f"{path} is {bpp} bpp, only RGB565 (16 bpp) is supported "
+                         f"(e.g. framebuffer_depth=16 in config.txt)")
+    return width, height
+
+def parse_spec(spec):
+    """'fb:/dev/fb0,1280x720,rot0' -> ('fb:/dev/fb0', (1280, 720), False)."""
+    base, *options = spec.split(",")
+    size = None
+    rotate = True
+    for option in options:
+        option = option.strip()
+        m = re.fullmatch(r"(\d+)x(\d+)", option)
+        if m:
+            size = (int(m.group(1)), int(m.group(2)))
+        elif option in ("rot0", "rot180"):
+            rotate = option == "rot180"
+        else:
+            raise ValueError(f"unknown display option {option!r} in {spec!r}")
+    return base, size, rotate
+
+def open_display(spec, width=None, height=None):
+    """Backend voor een display-spec (zie module-docstring)."""
+    base, size, rotate = parse_spec(spec)
+    kind, sep, arg = base.partition(":")
+    if not sep or kind not in ("fb", "file", "memory", "png"):
+        # Geen prefix: een device- of bestandspad, zoals vroeger
+        kind, arg = "fb", base
+    if size is None and kind == "fb":
+        size = _sysfs_size(arg)
+    if size is None:
+        size = (width or DEFAULT_SIZE[0], height or DEFAULT_SIZE[1])
+    if kind == "memory":
+        return MemoryDisplay(spec, *size, rotate=rotate)
+    if kind == "png":
+        return PngDisplay(arg, *size, rotate=rotate)
+    # Bestanden mogen aangemaakt worden, devices onder /dev niet
+    create = kind == "file" or not arg.startswith("/dev/")
+    return Framebuffer(arg, *size, rotate=rotate, create=create)
+
+_framebuffers = {}
+_framebuffers_lock = threading.Lock()
+
+def set_default_display(spec):
+    """Standaard-backend voor alle schermen (bv. vanuit --display)."""
+    global DEFAULT_DEVICE
+    DEFAULT_DEVICE = spec
+
+def get_framebuffer(path=None, width=None, height=None):
+    """
+    Gedeelde display-instantie per spec (wordt maar één keer geopend).
+    path=None geeft de standaard-backend.
+    """
+    path = path or DEFAULT_DEVICE
+    with _framebuffers_lock:
+        fb = _framebuffers.get(path)
+        if fb is None:
+            fb = open_display(path, width, height)
+            _framebuffers[path] = fb
+        return fb
@@ -0,0 +1,145 @@
+# fx.py
+"""
+Valuta's voor de prijzen en een kleine FX-tabel.
+DASHBOARD_CURRENCIES (of main.py --currency) is een lijst als "eur,gbp":
+de eerste wordt getoond, ze worden allemaal in dezelfde CoinGecko-call
+opgevraagd. USD komt er altijd bij: dat is de basis van de FX-tabel.
+
+De FX-tabel wordt geleerd uit die CoinGecko-antwoorden (eur/usd per coin,
+mediaan over de batch). Binance geeft alleen USDT-prijzen; die worden
+daarmee lokaal omgerekend in plaats van met extra requests.
+"""
+
+import os
+import threading
+import time
+
+BASE_CURRENCY = "usd"
+
+# code: (voor, achter) het bedrag
+SYMBOLS = {
+    "usd": ("$", ""),
+    "eur": ("€", ""),
+    "gbp": ("£", ""),
+    "jpy": ("¥", ""),
+    "chf": ("CHF ", ""),
+    "aud": ("A$", ""),
+    "cad": ("C$", ""),
+}
+
+def _parse(codes):
+    if isinstance(codes, str):
+        codes = codes.split(",")
+    out = [c.strip().lower() for c in codes if c.strip()]
+    return out or [BASE_CURRENCY]
+
+_display = BASE_CURRENCY
+_fetch = (BASE_CURRENCY,)
+
+def set_currencies(codes):
+    """Eerste valuta wordt getoond; alle (plus USD) worden opgehaald."""
+    global _display, _fetch
+    codes = _parse(codes)
+    _display = codes[0]
+    _fetch = tuple(dict.fromkeys(codes + [BASE_CURRENCY]))
+
+def display_currency():
+    return _display
+
+def fetch_currencies():
+    """Valuta's voor de CoinGecko vs_currencies-parameter."""
+    return _fetch
+
+set_currencies(os.environ.get("DASHBOARD_CURRENCIES", BASE_CURRENCY))
+
+def price_key(coingecko_id, currency=None):
+    """
+    Sleutel in de prijs-cache. USD blijft het kale coingecko-id (zoals in
+    oudere snapshots en in de stream), andere valuta's krijgen ":eur" erbij.
+    """
+    currency = currency or _display
+    return coingecko_id if currency == BASE_CURRENCY else f"{coingecko_id}:{currency}"
+
+def split_key(key):
+    """Omgekeerde van price_key(): 'bitcoin:eur' -> ('bitcoin', 'eur')."""
+    coingecko_id, _, currency = key.partition(":")
+    return coingecko_id, currency or BASE_CURRENCY
+
+def format_price(value, currency=None):
+    """'$65000.0', '€0.1234'; 'N/A' als er (nog) geen prijs is."""
+    prefix, suffix = SYMBOLS.get(currency or _display, ((currency or _display).upper() + " ", ""))
+    return prefix + (str(value) if value is not None else "N/A") + suffix
+
+def _decimals(value):
+    text = repr(float(value))
+    if "e" in text:
+        return 8
+    return min(8, len(text.partition(".")[2]))
+
+class FxTable:
+    """
+    Koersen per valuta t.o.v. USD, met de tijd van de laatste update.
+    learn() leest ze af uit quotes die USD én de andere valuta hebben;
+    fill() rekent quotes met alleen USD om naar de ontbrekende valuta's.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.rates = {BASE_CURRENCY: (1.0, 0.0)}   # valuta -> (koers, timestamp)
+
+    def learn(self, quotes, now=None):
+        """quotes: iterable van {valuta: prijs}. Geeft de bijgewerkte valuta's terug."""
+        ratios = {}
+        for q in quotes:
+            usd = q.get(BASE_CURRENCY)
+            if not usd:
+                continue
+            for currency, price in q.items():
+                if currency != BASE_CURRENCY and price:
+                    ratios.setdefault(currency, []).append(price / usd)
+        now = time.time() if now is None else now
+        with self._lock:
+            for currency, values in ratios.items():
+                values.sort()
+                # Mediaan: één coin met een afwijkende quote trekt de koers niet scheef
+                self.rates[currency] = (values[len(values) // 2], now)
+        return list(ratios)
+
+    def rate(self, currency):
+        entry = self.rates.get(currency)
+        return entry[0] if entry is not None else None
+
+    def fill(self, quotes, currencies):
+        """
+        Vul quotes ({valuta: prijs}, met USD) aan met de ontbrekende valuta's,
+        afgerond op evenveel decimalen als de USD-prijs. Valuta's zonder
+        bekende koers blijven weg.
+        """
+        usd = quotes.get(BASE_CURRENCY)
+        if usd is None:
+            return quotes
+        missing = [c for c in currencies if c not in quotes]
+        if not missing:
+            return quotes
+        out = dict(quotes)
+        digits = _decimals(usd)
+        for currency in missing:
+            rate = self.rate(currency)
+            if rate is not None:
+                out[currency] = round(usd * rate, digits)
+        return out
+
+    def entries(self):
+        """{valuta: [koers, timestamp]} voor de snapshot (zonder USD)."""
+        with self._lock:
+            return {c: [r, round(ts, 1)] for c, (r, ts) in self.rates.items() if c != BASE_CURRENCY}
+
+    def restore(self, entries):
+        """Koersen uit de snapshot; nieuwere koersen blijven staan."""
+        with self._lock:
+            for currency, (rate, ts) in entries.items():
+                if currency not in self.rates or self.rates[currency][1] < ts:
+                    self.rates[currency] = (float(rate), float(ts))
+
+# Gedeelde tabel voor price.py en de snapshot
+fx_table = FxTable()
@@ -0,0 +1,181 @@
+# glyphs.py
+"""
+Glyph-atlas tekstrenderer.
+Per font worden de glyphs één keer gerasterd naar alpha-masks; dynamische
+strings (klok, prijzen) worden daarna opgebouwd door die masks op de
+gecachte achtergrond te plakken, zonder FreeType per update.
+"""
+
+import threading
+from collections import OrderedDict
+from PIL import Image, ImageChops
+
+# Alles wat klok, datum en prijzen nodig hebben (printable ASCII + valutatekens)
+DEFAULT_CHARSET = "".join(chr(c) for c in range(32, 127)) + "€£¥"
+
+RENDER_CACHE_SIZE = 128
+_render_cache = OrderedDict()
+_render_cache_lock = threading.Lock()
+
+def _union(a, b):
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+
+class GlyphAtlas:
+    """
+    Voorgerasterde glyphs (mask + offset) en advance/kerning-tabellen voor
+    één FreeType-font. Posities volgen de layout van font.getlength(), dus
+    het resultaat komt overeen met ImageDraw.text().
+    font mag ook (pad, grootte) zijn: dan wordt het font (en de charset)
+    pas geladen bij het eerste gebruik of bij warm().
+    """
+
+    def __init__(self, font, name=None, charset=DEFAULT_CHARSET):
+        if isinstance(font, tuple):
+            self._source, self._font = font, None
+            default_name = f"{font[0]}@{font[1]}"
+        else:
+            self._source, self._font = None, font
+            default_name = f"{getattr(font, 'path', 'font')}@{getattr(font, 'size', '?')}"
+        self.name = name or default_name
+        self.charset = charset
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._glyphs = {}
+        self._pairs = {}
+        if self._font is not None:
+            self._preload()
+
+    @property
+    def font(self):
+        if self._font is None:
+            self.warm()
+        return self._font
+
+    def warm(self):
+        """Font laden en de charset rasteren (idempotent, thread-safe)."""
+        with self._load_lock:
+            if self._font is None:
+                from PIL import ImageFont
+                self._font = ImageFont.truetype(*self._source)
+                self._preload()
+        return self
+
+    def _preload(self):
+        for ch in self.charset:
+            self.glyph(ch)
+
+    def glyph(self, ch):
+        """(mask, (ox, oy), advance) voor één teken; onbekende tekens worden lui toegevoegd."""
+        g = self._glyphs.get(ch)
+        if g is None:
+            mask, offset = self.font.getmask2(ch, "L")
+            # Naar een los PIL-image kopiëren zodat we het kunnen plakken
+            img = Image.frombytes("L", mask.size, bytes(mask)) if mask.size[0] and mask.size[1] else None
+            g = (img, offset, self.font.getlength(ch))
+            with self._lock:
+                self._glyphs[ch] = g
+        return g
+
+    def _pair_advance(self, a, b):
+        """Advance van a gevolgd door b, inclusief kerning."""
+        key = a + b
+        adv = self._pairs.get(key)
+        if adv is None:
+            adv = self.font.getlength(key) - self.glyph(b)[2]
+            with self._lock:
+                self._pairs[key] = adv
+        return adv
+
+    def positions(self, text):
+        """Pen-x per teken (afgerond op hele pixels)."""
+        xs = []
+        pen = 0.0
+        for i, ch in enumerate(text):
+            xs.append(int(round(pen)))
+            if i + 1 < len(text):
+                pen += self._pair_advance(ch, text[i + 1])
+        return xs
+
+    def ink_box(self, ch, pen_x):
+        img, (ox, oy), _adv = self.glyph(ch)
+        if img is None:
+            return None
+        return (pen_x + ox, oy, pen_x + ox + img.size[0], oy + img.size[1])
+
+    def bbox(self, text):
+        """Zelfde betekenis als font.getbbox(text), maar zonder FreeType."""
+        return render_text(self, text)[1]
+
+    def draw(self, image, xy, text, fill):
+        """Plak de glyphs van text op image met linkerbovenhoek xy."""
+        x0, y0 = xy
+        for ch, px in zip(text, self.positions(text)):
+            img, (ox, oy), _adv = self.glyph(ch)
+            if img is not None:
+                image.paste(fill, (x0 + px + ox, y0 + oy), img)
+
+    def changed_box(self, old_text, new_text):
+        """
+        Box (relatief t.o.v. de tekst-origin) die opnieuw getekend moet worden
+        om old_text in new_text te veranderen, of None als er niets wijzigt.
+        Bij gelijke lengte en layout zijn dat alleen de gewijzigde cellen.
+        """
+        if old_text == new_text:
+            return None
+        old_xs = self.positions(old_text)
+        new_xs = self.positions(new_text)
+        box = None
+        if len(old_text) != len(new_text) or old_xs != new_xs:
+            for ch, px in zip(old_text, old_xs):
+                box = _union(box, self.ink_box(ch, px))
+            for ch, px in zip(new_text, new_xs):
+                box = _union(box, self.ink_box(ch, px))
+            return box
+        for a, b, px in zip(old_text, new_text, new_xs):
+            if a != b:
+                box = _union(box, self.ink_box(a, px))
+                box = _union(box, self.ink_box(b, px))
+        return box
+
+def render_text(atlas, text):
+    """
+    Volledige string als één alpha-mask: (mask, (left, top, right, bottom)).
+    Resultaten staan in een begrensde LRU op (font, string).
+    """
+    key = (atlas.name, text)
+    with _render_cache_lock:
+        hit = _render_cache.get(key)
+        if hit is not None:
+            _render_cache.move_to_end(key)
+            return hit
+    box = None
+    for ch, px in zip(text, atlas.positions(text)):
+        box = _union(box, atlas.ink_box(ch, px))
+    if box is None:
+        result = (None, (0, 0, 0, 0))
+    else:
+        mask = Image.new("L", (box[2] - box[0], box[3] - box[1]), 0)
+        for ch, px in zip(text, atlas.positions(text)):
+            img, (ox, oy), _adv = atlas.glyph(ch)
+            if img is not None:
+                # Overlappende glyphs: maximum van de alpha's
+                x, y = px + ox - box[0], oy - box[1]
+                under = mask.crop((x, y, x + img.size[0], y + img.size[1]))
+                mask.paste(ImageChops.lighter(under, img), (x, y))
+        result = (mask, box)
+    with _render_cache_lock:
+        _render_cache[key] = result
+        _render_cache.move_to_end(key)
+        while len(_render_cache) > RENDER_CACHE_SIZE:
+            _render_cache.popitem(last=False)
+    return result
+
+def draw_text(image, xy, atlas, text, fill):
+    """Tekent text via de LRU-cache op image (zoals ImageDraw.text)."""
+    mask, box = render_text(atlas, text)
+    if mask is not None:
+        image.paste(fill, (xy[0] + box[0], xy[1] + box[1]), mask)
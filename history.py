@@ -0,0 +1,47 @@
+# history.py
+"""
+Compacte prijs-historie per coin: ring-buffer met vaste capaciteit in
+typed arrays (geen lijsten met objecten), dus constant geheugen per coin
+hoe lang het dashboard ook draait.
+"""
+
+from array import array
+
+class PriceHistory:
+    """
+    Ring-buffer van (timestamp, prijs) als twee array('d')'s.
+    total telt alle appends ooit; daarmee kan een renderer zien hoeveel
+    nieuwe punten er sinds de vorige keer bijgekomen zijn.
+    """
+
+    __slots__ = ("capacity", "times", "prices", "head", "count", "total")
+
+    def __init__(self, capacity=240):
+        self.capacity = capacity
+        self.times = array("d", bytes(8 * capacity))
+        self.prices = array("d", bytes(8 * capacity))
+        self.head = 0       # volgende schrijfpositie
+        self.count = 0
+        self.total = 0
+
+    def append(self, timestamp, price):
+        self.times[self.head] = timestamp
+        self.prices[self.head] = price
+        self.head = (self.head + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+        self.total += 1
+
+    def __len__(self):
+        return self.count
+
+    def last(self, n=None):
+        """De laatste n prijzen (oud -> nieuw) als array('d')."""
+        n = self.count if n is None else min(n, self.count)
+        start = (self.head - n) % self.capacity
+        if start + n <= self.capacity:
+            return self.prices[start:start + n]
+        return self.prices[start:] + self.prices[:self.head]
+
+    def nbytes(self):
+        return (len(self.times) + len(self.prices)) * self.times.itemsize
@@ -0,0 +1,304 @@
+# hub.py
+"""
+Hub-modus voor meerdere dashboards op één LAN: één Pi (main.py --hub) haalt
+de prijzen op zoals altijd en verspreidt ze via UDP-multicast; de andere
+Pi's (main.py --hub-client) zetten wat ze ontvangen in hun eigen prijs-cache
+en pollen zelf alleen nog als de hub stil valt. Zo gaat er per gebouw één
+set API-requests naar CoinGecko/Binance in plaats van één per Pi.
+
+Pakketten (big-endian, hooguit MAX_PAYLOAD bytes, dus nooit gefragmenteerd):
+    header  "BP" | versie u8 | soort u8 | hub-id u32 | seq u32 | verzonden f64 | aantal u16
+    entry   sleutel-lengte u8 | sleutel (utf-8, fx.price_key) | prijs f64 | timestamp u32
+soort DELTA bevat alleen wat sinds het vorige pakket veranderde; elke
+FULL_INTERVAL seconden volgt de volledige stand. Die dient ook als
+heartbeat en repareert verloren deltas. Er is geen authenticatie: alleen
+gebruiken op een vertrouwd netwerk.
+"""
+
+import os
+import random
+import socket
+import struct
+import threading
+import time
+from collections import deque
+
+from fx import fx_table, split_key
+from price import current_snapshot, set_quotes, wait_for_change
+from tracing import span
+
+HUB_GROUP = os.environ.get("DASHBOARD_HUB_GROUP", "239.255.42.99")
+HUB_PORT = int(os.environ.get("DASHBOARD_HUB_PORT", "50999"))
+# IP-adres van de netwerkinterface voor multicast (leeg = standaardroute)
+HUB_INTERFACE = os.environ.get("DASHBOARD_HUB_INTERFACE", "")
+
+MAGIC = b"BP"
+PROTOCOL_VERSION = 1
+KIND_DELTA = 1
+KIND_FULL = 2
+
+# Past in één Ethernet-frame (1500 - IP/UDP-headers, met marge)
+MAX_PAYLOAD = 1400
+HEADER = struct.Struct("!2sBBIIdH")
+ENTRY = struct.Struct("!dI")
+
+FULL_INTERVAL = 10.0
+# Wijzigingen die vlak na elkaar komen (één price_updater-cyclus) in één pakket
+COALESCE = 0.02
+
+def encode_packets(kind, hub_id, seq, entries, sent=None):
+    """
+    entries: {sleutel: (prijs, timestamp)}. Geeft (pakketten, volgende seq)
+    terug; een FULL zonder entries is één leeg pakket (heartbeat).
+    """
+    sent = time.time() if sent is None else sent
+    packets = []
+    body = []
+    size = HEADER.size
+    for key, (price, ts) in entries.items():
+        raw = key.encode("utf-8")[:255]
+        entry = bytes((len(raw),)) + raw + ENTRY.pack(price, int(ts))
+        if body and size + len(entry) > MAX_PAYLOAD:
+            packets.append(HEADER.pack(MAGIC, PROTOCOL_VERSION, kind, hub_id, seq, sent, len(body)) + b"".join(body))
+            seq += 1
+            body, size = [], HEADER.size
+        body.append(entry)
+        size += len(entry)
+    if body or not packets:
+        packets.append(HEADER.pack(MAGIC, PROTOCOL_VERSION, kind, hub_id, seq, sent, len(body)) + b"".join(body))
+        seq += 1
+    return packets, seq
+
+def decode_packet(data):
+    """(soort, hub-id, seq, verzonden, {sleutel: (prijs, timestamp)}); ValueError bij onzin."""
+    if len(data) < HEADER.size:
+        raise ValueError("short packet")
+    magic, version, kind, hub_id, seq, sent, count = HEADER.unpack_from(data)
+    if magic != MAGIC or version != PROTOCOL_VERSION:
+        raise ValueError("not a price packet")
+    entries = {}
+    offset = HEADER.size
+    try:
+        for _ in range(count):
+            n = data[offset]
+            key = data[offset + 1:offset + 1 + n].decode("utf-8")
+            price, ts = ENTRY.unpack_from(data, offset + 1 + n)
+            entries[key] = (price, float(ts))
+            offset += 1 + n + ENTRY.size
+    except (IndexError, struct.error, UnicodeDecodeError) as e:
+        raise ValueError(f"truncated packet: {e}")
+    return kind, hub_id, seq, sent, entries
+
+def _multicast_interface(interface):
+    return socket.inet_aton(interface or "0.0.0.0")
+
+class PriceHub:
+    """
+    Zendt de prijs-cache (current_snapshot()) uit: direct na elke wijziging
+    een DELTA, elke full_interval de volledige stand. Leest de snapshot
+    lock-vrij; de price_updater merkt er niets van.
+    """
+
+    def __init__(self, group=HUB_GROUP, port=HUB_PORT, interface=HUB_INTERFACE, ttl=1,
+                 full_interval=FULL_INTERVAL, coalesce=COALESCE):
+        self.address = (group, port)
+        self.interface = interface
+        self.ttl = ttl
+        self.full_interval = full_interval
+        self.coalesce = coalesce
+        self.hub_id = random.getrandbits(32)
+        self._seq = 0
+        self._sock = None
+        self._running = False
+        self.stats = {"packets": 0, "bytes": 0, "entries": 0, "full": 0, "delta": 0}
+
+    def start(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, self.ttl)
+        # Ook clients op dezelfde machine (bv. een tweede scherm, of de benchmark)
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 1)
+        if self.interface:
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, _multicast_interface(self.interface))
+        self._sock = sock
+        self._running = True
+        threading.Thread(target=self._run, name="hub", daemon=True).start()
+        print(f"[HUB] Broadcasting prices to {self.address[0]}:{self.address[1]}")
+        return self
+
+    def stop(self):
+        self._running = False
+
+    def send(self, kind, entries):
+        packets, self._seq = encode_packets(kind, self.hub_id, self._seq, entries)
+        for packet in packets:
+            try:
+                self._sock.sendto(packet, self.address)
+            except OSError as e:
+                print(f"[WARNING] Hub send failed: {e}")
+                continue
+            self.stats["packets"] += 1
+            self.stats["bytes"] += len(packet)
+        self.stats["entries"] += len(entries)
+        self.stats["full" if kind == KIND_FULL else "delta"] += 1
+
+    def _run(self):
+        version = -1
+        next_full = 0.0
+        while self._running:
+            snap = wait_for_change(version, timeout=max(0.0, next_full - time.time()))
+            if not self._running:
+                return
+            now = time.time()
+            if now >= next_full:
+                next_full = now + self.full_interval
+                self.send(KIND_FULL, {k: (p, snap.times.get(k, now)) for k, p in snap.prices.items()})
+            elif snap.version > version:
+                time.sleep(self.coalesce)
+                snap = current_snapshot()
+                changed = [k for k, v in snap.versions.items() if v > version]
+                self.send(KIND_DELTA, {k: (snap.prices[k], snap.times.get(k, now)) for k in changed})
+            version = snap.version
+
+def feed_prices(entries):
+    """
+    Ontvangen {sleutel: (prijs, timestamp)} in de prijs-cache zetten. Alleen
+    wat nieuwer is dan de cache telt (een FULL herhaalt vooral oude
+    waarden en mag de historie niet vullen). Timestamps zijn hele seconden:
+    binnen dezelfde seconde telt een andere prijs als nieuwer.
+    """
+    snap = current_snapshot()
+    by_coin = {}
+    for key, (price, ts) in entries.items():
+        cached = snap.times.get(key, 0.0)
+        if cached > ts or (cached == ts and snap.prices.get(key) == price):
+            continue
+        coingecko_id, currency = split_key(key)
+        quotes, newest = by_coin.get(coingecko_id, ({}, 0.0))
+        quotes[currency] = price
+        by_coin[coingecko_id] = (quotes, max(newest, ts))
+    if not by_coin:
+        return 0
+    # Valuta's die de hub niet ophaalt rekent deze Pi zelf om
+    fx_table.learn(quotes for quotes, _ts in by_coin.values())
+    for coingecko_id, (quotes, ts) in by_coin.items():
+        set_quotes(coingecko_id, quotes, ts)
+    return len(by_coin)
+
+class HubClient:
+    """
+    Gebruik zoals PriceStream: price_updater krijgt client.covered_ids en
+    client.lost mee. Zolang de hub verse prijzen stuurt worden die coins
+    niet zelf opgehaald; valt de hub langer dan quiet_after stil, dan pollt
+    deze Pi weer zelf. De wachttijd heeft per client wat jitter, zodat niet
+    het hele gebouw in dezelfde seconde CoinGecko aanroept.
+    """
+
+    # Ouder dan dit (seconden) telt een prijs van de hub niet als "gedekt"
+    MAX_QUOTE_AGE = 180.0
+    QUIET_AFTER = 30.0
+    QUIET_JITTER = 15.0
+    LATENCY_LOG_SIZE = 1024
+
+    def __init__(self, feed=feed_prices, group=HUB_GROUP, port=HUB_PORT, interface=HUB_INTERFACE,
+                 quiet_after=None):
+        self.feed = feed
+        self.group = group
+        self.port = port
+        self.interface = interface
+        if quiet_after is None:
+            quiet_after = self.QUIET_AFTER + random.uniform(0, self.QUIET_JITTER)
+        self.quiet_after = quiet_after
+        self.healthy = threading.Event()
+        # Wordt gezet als de hub stil valt: price_updater pollt dan meteen
+        self.lost = threading.Event()
+        self._quote_times = {}
+        self._seq = {}
+        self._last_heard = 0.0
+        self._lock = threading.Lock()
+        self._running = False
+        self._sock = None
+        self.latencies = deque(maxlen=self.LATENCY_LOG_SIZE)
+        self.stats = {"packets": 0, "bytes": 0, "entries": 0, "gaps": 0, "invalid": 0}
+
+    def covered_ids(self):
+        """Coingecko-id's waarvoor de hub recent een prijs stuurde (leeg als de hub stil is)."""
+        if not self.healthy.is_set():
+            return set()
+        now = time.time()
+        with self._lock:
+            return {i for i, t in self._quote_times.items() if now - t < self.MAX_QUOTE_AGE}
+
+    def wait_ready(self, timeout=None):
+        """Wacht op de eerste prijzen van de hub; False na timeout (standaard quiet_after)."""
+        return self.healthy.wait(self.quiet_after if timeout is None else timeout)
+
+    def open(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind(("", self.port))
+        membership = socket.inet_aton(self.group) + _multicast_interface(self.interface)
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, membership)
+        sock.settimeout(1.0)
+        self._sock = sock
+        return self
+
+    def start(self):
+        if self._sock is None:
+            self.open()
+        self._running = True
+        threading.Thread(target=self._run, name="hub-client", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._running = False
+
+    def handle_packet(self, data, now=None):
+        """Eén pakket verwerken; geeft het aantal entries terug."""
+        now = time.time() if now is None else now
+        try:
+            kind, hub_id, seq, sent, entries = decode_packet(data)
+        except ValueError:
+            self.stats["invalid"] += 1
+            return 0
+        self.stats["packets"] += 1
+        self.stats["bytes"] += len(data)
+        self.stats["entries"] += len(entries)
+        self.latencies.append(now - sent)
+        # Per hub (een herstarte hub krijgt een nieuw id); verloren deltas herstelt de volgende FULL
+        prev = self._seq.get(hub_id)
+        if prev is not None and seq > prev + 1:
+            self.stats["gaps"] += seq - prev - 1
+        self._seq[hub_id] = seq
+        self._last_heard = now
+        if not entries:
+            return 0
+        with span("hub packet", "price", kind=kind, entries=len(entries)):
+            self.feed(entries)
+        with self._lock:
+            for key, (_price, ts) in entries.items():
+                coingecko_id = split_key(key)[0]
+                if ts > self._quote_times.get(coingecko_id, 0.0):
+                    self._quote_times[coingecko_id] = ts
+        if not self.healthy.is_set():
+            print(f"[HUB] Receiving prices from hub {hub_id:08x}")
+            self.healthy.set()
+        return len(entries)
+
+    def _run(self):
+        while self._running:
+            try:
+                data = self._sock.recv(65535)
+            except socket.timeout:
+                data = None
+            except OSError as e:
+                print(f"[WARNING] Hub client receive failed: {e}")
+                time.sleep(1.0)
+                data = None
+            now = time.time()
+            if data:
+                self.handle_packet(data, now)
+            if self.healthy.is_set() and now - self._last_heard > self.quiet_after:
+                print("[HUB] Hub went quiet, polling takes over")
+                self.healthy.clear()
+                self.lost.set()
+        self._sock.close()
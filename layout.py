@@ -0,0 +1,114 @@
+# layout.py
+"""
+Resolutie-onafhankelijke layout voor het dashboard.
+DASHBOARD beschrijft het ontwerp in referentie-pixels (480x320, het 3.5"
+LCD); get_layout() rekent dat één keer per display-grootte om naar echte
+pixels en cachet het resultaat. Op 480x320 komen alle waarden exact
+overeen met het oorspronkelijke ontwerp.
+"""
+
+import threading
+
+REFERENCE = (480, 320)
+
+FONT_BOLD = "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"
+FONT_REGULAR = "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"
+
+DASHBOARD = {
+    # naam: (font, grootte)
+    "fonts": {
+        "main": (FONT_BOLD, 36),
+        "value": (FONT_BOLD, 48),
+        "time": (FONT_BOLD, 28),
+        "date": (FONT_REGULAR, 20),
+        "hud": (FONT_REGULAR, 12),
+    },
+    # Klok rechtsboven; touch_width is het double-tap gebied langs de rechterrand
+    "clock": {"right": 10, "top": 10, "width": 200, "height": 55, "inset": 10, "date_dy": 30,
+              "touch_width": 52},
+    # Horizontale verschuiving van BTC-blok, coin-box en sparkline t.o.v. het midden
+    "content_offset": 60,
+    # Onderkant van het BTC-label als fractie van de hoogte, dan de prijs eronder
+    "btc": {"label_bottom": 0.35, "gap": 5, "price_h": 48},
+    "coin_box": {"top_gap": 20, "pad_x": 40, "pad_y": 25, "symbol_dy": 7, "value_gap": 8},
+    "sparkline": {"width": 160, "height": 30, "step": 2, "gap": 4},
+    # Debug-HUD (main.py --hud) linksonder
+    "hud": {"left": 4, "bottom": 4, "line_h": 14, "pad": 2},
+}
+
+class Layout:
+    """
+    Het dashboard-ontwerp in pixels voor één display-grootte. Afstanden
+    schalen met min(breedte, hoogte) t.o.v. de referentie, zodat het beeld
+    nooit buiten een display met een andere verhouding valt.
+    """
+
+    def __init__(self, width, height, spec=DASHBOARD):
+        self.width = width
+        self.height = height
+        self.scale = min(width / REFERENCE[0], height / REFERENCE[1])
+        px = self.px
+
+        self.fonts = {name: (path, max(6, px(size))) for name, (path, size) in spec["fonts"].items()}
+
+        clock = spec["clock"]
+        self.clock_w = px(clock["width"])
+        self.clock_h = px(clock["height"])
+        self.clock_x = width - px(clock["right"]) - self.clock_w
+        self.clock_y = px(clock["top"])
+        self.clock_inset = px(clock["inset"])
+        self.clock_date_dy = px(clock["date_dy"])
+        self.clock_touch_w = px(clock["touch_width"])
+
+        self.content_offset = px(spec["content_offset"])
+
+        btc = spec["btc"]
+        self.btc_label_bottom = int(height * btc["label_bottom"])
+        self.btc_gap = px(btc["gap"])
+        self.btc_price_h = px(btc["price_h"])
+
+        box = spec["coin_box"]
+        self.coin_top_gap = px(box["top_gap"])
+        self.coin_pad_x = px(box["pad_x"])
+        self.coin_pad_y = px(box["pad_y"])
+        self.coin_symbol_dy = px(box["symbol_dy"])
+        self.coin_value_gap = px(box["value_gap"])
+
+        spark = spec["sparkline"]
+        self.spark_step = max(1, px(spark["step"]))
+        self.spark_w = px(spark["width"]) // self.spark_step * self.spark_step
+        self.spark_h = px(spark["height"])
+        self.spark_gap = px(spark["gap"])
+        self.spark_points = self.spark_w // self.spark_step + 1
+
+        hud = spec["hud"]
+        self.hud_x = px(hud["left"])
+        self.hud_bottom = px(hud["bottom"])
+        self.hud_line_h = px(hud["line_h"])
+        self.hud_pad = px(hud["pad"])
+
+    def px(self, value):
+        """Referentie-pixels naar pixels op dit display."""
+        return int(round(value * self.scale))
+
+    def clock_box(self):
+        return (self.clock_x, self.clock_y, self.clock_x + self.clock_w, self.clock_y + self.clock_h)
+
+    def in_clock_area(self, x, y):
+        """Touch-gebied van de klok: een strook langs de rechterrand."""
+        return x >= self.width - self.clock_touch_w
+
+    def __repr__(self):
+        return f"<Layout {self.width}x{self.height} scale={self.scale:.2f}>"
+
+_layouts = {}
+_layouts_lock = threading.Lock()
+
+def get_layout(width, height):
+    """Gecachte Layout per display-grootte."""
+    key = (width, height)
+    with _layouts_lock:
+        layout = _layouts.get(key)
+        if layout is None:
+            layout = _layouts[key] = Layout(width, height)
+        return layout
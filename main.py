@@ -3,15 +3,32 @@ import time
 import sys
 import termios
 import tty
-from calibration import load_calibration
-from dashboard import draw_dashboard, update_clock_area, update_coin_value_area_variable, textbox_offset
-from setup_screen import setup_touch_listener
-from touchscreen import double_tap_detector
-from price import price_updater, get_cached_price
+from calibration import load_calibration, scale_touch
+from dashboard import (draw_dashboard, render_dashboard, present_frame, warm_fonts, flush_dashboard,
+                       update_clock_area, default_view, DashboardView)
+from display_worker import DisplayWorker
+import metrics
+import tracing
+from prefetch import FramePrefetcher
+from touchscreen import get_dispatcher, is_in_clock_area
+from price import (price_updater, get_cached_price, get_price_points, is_price_stale, add_price_listener,
+                   set_price, current_snapshot, coin_key)
+import fx
+from snapshot import load_snapshot, SnapshotWriter
+from scheduler import Scheduler
+from coin_registry import CoinRegistry, FALLBACK_BTC
 from utils import clear_framebuffer, hex_to_rgb
-import json
+from framebuffer import set_default_display, get_framebuffer
+from startup import StartupTrace, run_parallel, show_splash, save_last_frame
 
 ui_mode = {'dashboard': True}
+ROTATE_INTERVAL = 20
+STATS_INTERVAL = 600
+# Zo vaak het getoonde frame bewaren als startbeeld (300 KB, SD-kaart sparen)
+LAST_FRAME_INTERVAL = 1800
+
+# Main loop wordt alleen wakker op events/deadlines (zie scheduler.py)
+scheduler = Scheduler()
 
 def wait_for_keypress():
     print("\nPress any key to exit...")
@@ -28,91 +45,277 @@ def switch_to_setup():
         return
     print(">>> Switching to SETUP mode!")
     ui_mode['dashboard'] = False
+    scheduler.notify("mode")
 
 def switch_to_dashboard():
     print(">>> Returning to DASHBOARD mode!")
     ui_mode['dashboard'] = True
 
-def reload_coins(config_file="coins.json", show_all=False):
-    with open(config_file, "r") as f:
-        cfg = json.load(f)
-    if show_all:
-        return cfg.get("coins", [])
-    coins = [coin for coin in cfg.get("coins", []) if coin.get("show", True)]
-    if not coins:
-        coins = [{"id": "btc", "symbol": "BTC", "color": "#f7931a", "show": True}]
-    return coins
+# Prijs-cache op schijf: warme start en offline gebruik
+snapshot_writer = SnapshotWriter()
 
 def main():
-    calib = load_calibration()
-    clear_framebuffer()
-    coins = reload_coins()
+    # --startup-trace: tijd per fase tot het eerste echte frame
+    trace = StartupTrace("--startup-trace" in sys.argv)
+    # --display memory: / file:/tmp/fb.raw / png:/tmp/frames/ (standaard /dev/fb1).
+    # Mag vaker: de eerste is het touch-LCD, de rest toont hetzelfde dashboard
+    # (bv. --display fb:/dev/fb0,rot0 voor HDMI op z'n eigen resolutie)
+    display_specs = [sys.argv[i + 1] for i, arg in enumerate(sys.argv[:-1]) if arg == "--display"]
+    if display_specs:
+        set_default_display(display_specs[0])
+    trace.mark("interpreter + imports")
+    # --currency eur,gbp (of DASHBOARD_CURRENCIES): de eerste wordt getoond, alle in één CoinGecko-call
+    if "--currency" in sys.argv:
+        fx.set_currencies(sys.argv[sys.argv.index("--currency") + 1])
+    # --metrics: Prometheus /metrics op 127.0.0.1:9101; --hud: samenvatting op het scherm
+    if "--metrics" in sys.argv:
+        metrics.start_server()
+    # --trace trace.json: spans per thread als Chrome trace (bij afsluiten en op SIGUSR1)
+    if "--trace" in sys.argv:
+        tracing.start(sys.argv[sys.argv.index("--trace") + 1])
+    hud = None
+    if "--hud" in sys.argv:
+        metrics.enable()
+        hud = metrics.HudSampler(get_framebuffer().path)
+    # Direct een beeld: het laatst getoonde frame (of splash) in plaats van zwart
+    splash = show_splash(get_framebuffer())
+    trace.mark(f"splash ({splash})")
+    # Eén input-thread voor alle schermen; --record-input legt ruwe events vast voor replay
+    dispatcher = get_dispatcher()
+    if "--record-input" in sys.argv:
+        dispatcher.record(sys.argv[sys.argv.index("--record-input") + 1])
+    # Laatst bekende prijzen (geen "$N/A" bij boot), coins.json (wordt alleen
+    # opnieuw geparsed als het bestand verandert), kalibratie en fonts tegelijk
+    loaded = run_parallel({
+        "snapshot": load_snapshot,
+        "coins.json": CoinRegistry,
+        "calibration": load_calibration,
+        "fonts": warm_fonts,
+    }, trace)
+    trace.mark("state (parallel)")
+    if loaded["snapshot"]:
+        print(f"[INFO] Restored {loaded['snapshot']} prices from snapshot")
+    dispatcher.scale = scale_touch
+    registry = loaded["coins.json"]
+    coins = registry.enabled()
     ## Get BTC Coin info from json 
-    btc_coin = next((c for c in coins if c["id"] == "btc"), None)
+    btc_coin = registry.get("btc")
     if btc_coin is None:
-        # Fallback: voeg een dummy BTC coin toe (optioneel log melding)
-        btc_coin = {"id": "btc", "symbol": "BTC", "color": "#f7931a", "show": True}
-        coins.insert(0, btc_coin)
+        # Fallback: dummy BTC coin (optioneel log melding)
+        btc_coin = dict(FALLBACK_BTC)
         print("WARNING: No BTC coin found in coins.json, using fallback BTC.")
 
     btc_color = hex_to_rgb(btc_coin["color"])
 
-    t_price = threading.Thread(target=price_updater, args=(coins,), daemon=True)
-    t_price.start()
-    t_touch = threading.Thread(target=double_tap_detector, args=(switch_to_setup,), daemon=True)
-    t_touch.start()
+    def price_coins():
+        # BTC wordt altijd opgehaald, ook als hij niet in de rotatie zit
+        enabled = registry.enabled()
+        if any(c["id"] == "btc" for c in enabled):
+            return enabled
+        return [btc_coin] + enabled
+
+    # Optioneel: prijzen van een hub op het LAN (--hub-client) of live via een
+    # Binance-stream; polling blijft in beide gevallen de fallback
+    hub_client = None
+    if "--hub-client" in sys.argv:
+        from hub import HubClient
+        hub_client = HubClient().start()
+        price_kwargs = {"skip_ids": hub_client.covered_ids, "wake": hub_client.lost}
+    elif "--stream" in sys.argv:
+        from stream import PriceStream
+        stream = PriceStream(price_coins, set_price).start()
+        price_kwargs = {"skip_ids": stream.covered_ids, "wake": stream.lost}
+        # Aangezette/uitgezette coins: opnieuw abonneren
+        registry.add_listener(lambda enabled: stream.refresh())
+    else:
+        price_kwargs = {"wake": threading.Event()}
+    # Nieuw ingeschakelde coins direct ophalen
+    registry.add_listener(lambda enabled: price_kwargs["wake"].set())
+
+    def run_prices():
+        if hub_client is not None and not hub_client.wait_ready():
+            print("[HUB] No hub heard, fetching prices directly")
+        price_updater(price_coins, **price_kwargs)
 
-    last_rot_time = time.time()
-    coin_index = 0
-    last_clock_str = ""
-    _prev_coin_box = None
+    t_price = threading.Thread(target=run_prices, name="price", daemon=True)
+    lcd = get_framebuffer()
+    dispatcher.subscribe({"double_tap"}, where=lambda g: is_in_clock_area(g.x, g.y, lcd.width, lcd.height),
+                         callback=lambda g: switch_to_setup())
+    dispatcher.start()
+
+    # last_rot_time op de monotone klok van de scheduler (NTP-sprongen tellen niet)
+    state = {"coins": coins, "coin_index": 0, "last_rot_time": scheduler.clock.monotonic(), "rot_timer": None}
 
     btc_price = get_cached_price(btc_coin)
-    show_coin = coins[coin_index]
-    show_coin_price = get_cached_price(show_coin)
-    draw_dashboard(btc_price, btc_color, show_coin, show_coin_price)
+    show_coin = coins[0]
+    frame = render_dashboard(btc_price, btc_color, show_coin, is_price_stale(btc_coin))
+    trace.mark("render first frame")
+    present_frame(frame)
+    trace.mark("write first frame")
+    # Pas na het eerste frame: de prijs-thread laadt requests en gaat het netwerk op
+    t_price.start()
+    # --hub: deze Pi haalt op en verspreidt de prijzen naar --hub-client dashboards
+    if "--hub" in sys.argv:
+        from hub import PriceHub
+        PriceHub().start()
+
+    def paint_values(view, show_coin):
+        # Regio's markeren alleen damage als hun inhoud verandert
+        cur = view.currency
+        view.update_btc_price_area(get_cached_price(btc_coin, cur), btc_color, flush=False,
+                                   stale=is_price_stale(btc_coin, currency=cur))
+        view.update_coin_value_area_variable(show_coin["symbol"], get_cached_price(show_coin, cur), hex_to_rgb(show_coin["color"]),
+                                             flush=False, stale=is_price_stale(show_coin, currency=cur))
+        total, values = get_price_points(show_coin, view.layout.spark_points, cur)
+        view.update_sparkline_area(show_coin["id"], total, values, hex_to_rgb(show_coin["color"]), flush=False)
+
+    # Extra displays: eigen view en render-thread, zelfde prijs-cache
+    mirrors = [DisplayWorker(DashboardView(spec), btc_color).start() for spec in display_specs[1:]]
+
+    def show_on_mirrors(show_coin, new_frame=False):
+        for worker in mirrors:
+            if new_frame:
+                worker.submit("frame", lambda view: view.present_frame(view.render_dashboard(
+                    get_cached_price(btc_coin, view.currency), btc_color, show_coin,
+                    is_price_stale(btc_coin, currency=view.currency))))
+            worker.submit("values", lambda view: paint_values(view, show_coin))
+
+    show_on_mirrors(show_coin, new_frame=True)
+
+    # Volgende coin alvast op de achtergrond renderen
+    prefetcher = FramePrefetcher().start()
+    # --transition slide|dissolve: geanimeerde overgang naar het vooraf gerenderde frame
+    transition = None
+    if "--transition" in sys.argv:
+        from transition import TransitionEngine
+        transition = TransitionEngine(lcd, lcd.width, lcd.height, mode=sys.argv[sys.argv.index("--transition") + 1])
+
+    def refresh_values(new_frame=False):
+        coins = state["coins"]
+        show_coin = coins[state["coin_index"]]
+        # Herrendert alleen als de volgende coin of de BTC-prijs veranderd is
+        next_coin = coins[(state["coin_index"] + 1) % len(coins)]
+        prefetcher.prepare(next_coin, get_cached_price(btc_coin), btc_color, state["last_rot_time"] + ROTATE_INTERVAL,
+                           btc_stale=is_price_stale(btc_coin))
+        paint_values(default_view, show_coin)
+        show_on_mirrors(show_coin, new_frame)
+
+    seen = {"version": -1}
 
-    while True:
+    def on_price():
+        if not ui_mode['dashboard']:
+            return
+        # O(1) check: niets veranderd voor BTC of de getoonde coin -> geen werk
+        snap = current_snapshot()
+        show_coin = state["coins"][state["coin_index"]]
+        ids = (coin_key(btc_coin), coin_key(show_coin))
+        if not snap.changed_since(seen["version"], ids):
+            return
+        seen["version"] = snap.version
+        refresh_values()
+        flush_dashboard()
+
+    def on_second(now):
         if ui_mode['dashboard']:
-            now = time.time()
-            t_struct = time.localtime(now)
-            now_str = time.strftime("%H:%M:%S", t_struct)
-
-            btc_price = get_cached_price(btc_coin)
-
-            # Live reload na elke rotatie
-            if now - last_rot_time >= 20:
-                coins = reload_coins()
-                if not coins:
-                    coins = [{"id": "btc", "symbol": "BTC", "color": "#f7931a", "show": True}]
-                coin_index = coin_index % len(coins)
-                coin_index = (coin_index + 1) % len(coins)
-                last_rot_time = now
-                show_coin = coins[coin_index]
-                show_coin_price = get_cached_price(show_coin)
-                draw_dashboard(btc_price, btc_color, show_coin, show_coin_price)
-                last_clock_str = ""
-                _prev_coin_box = None
-            else:
-                show_coin = coins[coin_index]
-                show_coin_price = get_cached_price(show_coin)
-
-            update_coin_value_area_variable(show_coin["symbol"], show_coin_price, hex_to_rgb(show_coin["color"]), textbox_offset)
-
-            if now_str != last_clock_str:
-                update_clock_area(btc_color)
-                last_clock_str = now_str
-
-            time.sleep(0.1)
+            update_clock_area(btc_color, flush=False, now=now)
+            if hud is not None:
+                default_view.update_hud(hud.lines(now), flush=False)
+            flush_dashboard()
+
+    def schedule_rotation(start):
+        state["last_rot_time"] = start
+        state["rot_timer"] = scheduler.call_at(start + ROTATE_INTERVAL, on_rotate)
+
+    def on_rotate(now):
+        # Live reload na elke rotatie (alleen als coins.json veranderd is)
+        registry.reload_if_changed()
+        coins = registry.enabled()
+        state["coins"] = coins
+        state["coin_index"] = (state["coin_index"] % len(coins) + 1) % len(coins)
+        deadline = state["last_rot_time"] + ROTATE_INTERVAL
+        # Ver te laat (lange handler): vanaf nu verder tellen, geen inhaal-burst
+        schedule_rotation(max(deadline, now))
+        if not ui_mode['dashboard']:
+            return
+        show_coin = coins[state["coin_index"]]
+        btc_price = get_cached_price(btc_coin)
+        btc_stale = is_price_stale(btc_coin)
+        frame = prefetcher.take(show_coin, btc_price, btc_color, deadline, btc_stale)
+        if frame is not None:
+            if transition is not None:
+                transition.run(get_framebuffer().shadow, frame["rgb565"])
+            present_frame(frame)
         else:
-            # Setup altijd met alle coins, niet gefilterd!
-            setup_touch_listener(reload_coins(show_all=True), switch_to_dashboard)
-            time.sleep(0.1)
+            draw_dashboard(btc_price, btc_color, show_coin, get_cached_price(show_coin), btc_stale)
+        refresh_values(new_frame=True)
+        update_clock_area(btc_color, flush=False)
+        flush_dashboard()
+
+    def on_mode():
+        if ui_mode['dashboard']:
+            return
+        from setup_screen import setup_touch_listener
+        # Setup altijd met alle coins, niet gefilterd! Blokkeert tot SAVE.
+        setup_touch_listener(registry.all_coins(), switch_to_dashboard)
+        # Rotatie-interval opnieuw laten beginnen, zoals bij het opstarten
+        scheduler.cancel(state["rot_timer"])
+        schedule_rotation(scheduler.clock.monotonic())
+        registry.reload_if_changed()
+        state["coins"] = registry.enabled()
+        state["coin_index"] %= len(state["coins"])
+        show_coin = state["coins"][state["coin_index"]]
+        draw_dashboard(get_cached_price(btc_coin), btc_color, show_coin, get_cached_price(show_coin), is_price_stale(btc_coin))
+        refresh_values(new_frame=True)
+        on_second(time.time())
+
+    def on_coins():
+        # Set ingeschakelde coins gewijzigd (setup of handmatig coins.json aangepast)
+        state["coins"] = registry.enabled()
+        state["coin_index"] %= len(state["coins"])
+        if ui_mode['dashboard']:
+            refresh_values()
+            flush_dashboard()
+
+    def on_stats(now):
+        r = scheduler.report()
+        print(f"[SCHED] {r['wakeups_per_min']:.1f} wake-ups/min, tick lateness avg {r['lateness_avg_ms']:.1f} ms, max {r['lateness_max_ms']:.1f} ms")
+        scheduler.reset_stats()
+        for worker in mirrors:
+            w = worker.report()
+            print(f"[DISPLAY] {worker.name}: {w['runs']} updates ({w['replaced']} superseded), "
+                  f"avg {w['avg_ms']:.1f} ms, max {w['max_ms']:.1f} ms")
+            worker.reset_stats()
+        scheduler.call_later(STATS_INTERVAL, on_stats)
+
+    def on_save_frame(now):
+        if ui_mode['dashboard']:
+            save_last_frame(get_framebuffer())
+        scheduler.call_later(LAST_FRAME_INTERVAL, on_save_frame)
+
+    add_price_listener(lambda coingecko_id: scheduler.notify("price"))
+    add_price_listener(snapshot_writer.mark_dirty)
+    scheduler.on("price", on_price)
+    scheduler.on("mode", on_mode)
+    scheduler.on("coins", on_coins)
+    registry.add_listener(lambda enabled: scheduler.notify("coins"))
+    scheduler.every_second(on_second)
+    schedule_rotation(state["last_rot_time"])
+    scheduler.call_later(STATS_INTERVAL, on_stats)
+    scheduler.call_later(LAST_FRAME_INTERVAL, on_save_frame)
+
+    on_price()
+    on_second(time.time())
+    trace.mark("values + clock")
+    trace.report()
+    scheduler.run()
 
 if __name__ == "__main__":
     try:
         main()
     except KeyboardInterrupt:
+        snapshot_writer.flush()
+        if ui_mode['dashboard']:
+            save_last_frame(get_framebuffer())
         print("\nExiting dashboard... cleaning LCD screen.")
         clear_framebuffer()
         time.sleep(0.5)
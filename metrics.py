@@ -0,0 +1,228 @@
+# metrics.py
+"""
+Runtime-metrics in Prometheus-tekstformaat: counters en latency-histogrammen
+voor elke stap (fetch per provider, render per regio, RGB565-encode, writes
+naar het display, tick-lateness van de main loop).
+Standaard uit; dan is elke observe()/inc() alleen een check van `enabled`.
+start_server() biedt /metrics aan op een lokale poort (main.py --metrics).
+"""
+
+import bisect
+import os
+import threading
+import time
+
+METRICS_HOST = os.environ.get("DASHBOARD_METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.environ.get("DASHBOARD_METRICS_PORT", "9101"))
+
+# Seconden: van sub-ms (encode, kleine blits) tot seconden (API-calls)
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+enabled = False
+
+def enable(on=True):
+    global enabled
+    enabled = on
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    """Oplopende teller; labels worden positioneel meegegeven: inc(n, "coingecko", "ok")."""
+
+    type = "counter"
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, *labels):
+        if not enabled:
+            return
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def label_values(self):
+        return list(self._values)
+
+    def expose(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_number(value)}"
+
+class Histogram:
+    """
+    Prometheus-histogram met vaste buckets. Per label-combinatie ook de
+    laatste waarde (voor de debug-HUD).
+    """
+
+    type = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [counts per bucket (+Inf laatst), sum, count, last]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        if not enabled:
+            return
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0, value]
+            series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+            series[3] = value
+
+    def last(self, *labels):
+        series = self._series.get(labels)
+        return series[3] if series is not None else None
+
+    def totals(self, *labels):
+        """(som, aantal) voor één label-combinatie."""
+        series = self._series.get(labels)
+        return (series[1], series[2]) if series is not None else (0.0, 0)
+
+    def label_values(self):
+        return list(self._series)
+
+    def expose(self):
+        with self._lock:
+            items = sorted((labels, (list(s[0]), s[1], s[2])) for labels, s in self._series.items())
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, labels, ('le', _number(bound)))} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_number(total)}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}"
+
+class Gauge:
+    """Waarde die pas bij het uitlezen berekend wordt: func() -> getal."""
+
+    type = "gauge"
+
+    def __init__(self, name, help, func):
+        self.name = name
+        self.help = help
+        self.func = func
+
+    def expose(self):
+        try:
+            value = self.func()
+        except Exception:
+            return
+        yield f"{self.name} {_number(value)}"
+
+def _rss_bytes():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+_started = time.time()
+
+FETCH_SECONDS = Histogram("dashboard_fetch_seconds", "API latency per provider (successful fetches).", ("provider",))
+FETCH_TOTAL = Counter("dashboard_fetch_total", "Fetch attempts per provider and result.", ("provider", "result"))
+RENDER_SECONDS = Histogram("dashboard_render_seconds", "Time spent painting a region (or a full frame).", ("region",))
+ENCODE_SECONDS = Histogram("dashboard_encode_seconds", "RGB565 encode time per image.")
+ENCODE_PIXELS = Counter("dashboard_encode_pixels_total", "Pixels encoded to RGB565.")
+WRITE_SECONDS = Histogram("dashboard_display_write_seconds", "Time per blit/frame write to a display.", ("display",))
+WRITE_BYTES = Counter("dashboard_display_bytes_total", "Bytes written to a display.", ("display",))
+TICK_LATENESS = Histogram("dashboard_tick_lateness_seconds", "How late main-loop timers fire.")
+PREFETCH_LEAD = Histogram("dashboard_prefetch_lead_seconds", "How long before the rotation deadline a prefetched frame was ready.",
+                          buckets=(0.0, 0.1, 0.5, 1, 2, 5, 10, 20))
+PREFETCH_TOTAL = Counter("dashboard_prefetch_total", "Rotation frames taken from the prefetcher, per result.", ("result",))
+
+REGISTRY = [
+    FETCH_SECONDS, FETCH_TOTAL, RENDER_SECONDS, ENCODE_SECONDS, ENCODE_PIXELS,
+    WRITE_SECONDS, WRITE_BYTES, TICK_LATENESS, PREFETCH_LEAD, PREFETCH_TOTAL,
+    Gauge("process_cpu_seconds_total", "CPU time of this process.", time.process_time),
+    Gauge("process_resident_memory_bytes", "Resident set size.", _rss_bytes),
+    Gauge("dashboard_uptime_seconds", "Seconds since start.", lambda: round(time.time() - _started, 1)),
+]
+
+def render():
+    """Alle metrics in Prometheus text exposition format (0.0.4)."""
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        lines.extend(metric.expose())
+    return "\n".join(lines) + "\n"
+
+def start_server(host=METRICS_HOST, port=METRICS_PORT):
+    """Zet metrics aan en serveer /metrics op een daemon-thread. Geeft de server terug."""
+    # http.server pas hier: rgb565/scheduler importeren dit module bij het opstarten
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            body = render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    enable()
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    print(f"[METRICS] Serving http://{host}:{server.server_address[1]}/metrics")
+    return server
+
+class HudSampler:
+    """
+    Korte samenvatting voor de debug-HUD: laatste tick-lateness, encode en
+    fetch per provider, en bytes per seconde naar het display sinds de
+    vorige sample.
+    """
+
+    def __init__(self, display=None):
+        self.display = display
+        self._prev = None
+
+    def lines(self, now=None):
+        now = time.time() if now is None else now
+        written = sum(WRITE_BYTES.value(*labels) for labels in WRITE_BYTES.label_values()
+                      if self.display is None or labels == (self.display,))
+        rate = 0.0
+        if self._prev is not None and now > self._prev[0]:
+            rate = (written - self._prev[1]) / (now - self._prev[0])
+        self._prev = (now, written)
+        late = TICK_LATENESS.last() or 0.0
+        enc_total, enc_count = ENCODE_SECONDS.totals()
+        enc = enc_total / enc_count if enc_count else 0.0
+        fetch = " ".join(f"{labels[0][:2]} {FETCH_SECONDS.last(*labels) * 1000:.0f}ms"
+                         for labels in sorted(FETCH_SECONDS.label_values()))
+        return (f"tick +{late * 1000:.1f}ms  enc {enc * 1000:.2f}ms  {rate / 1024:.1f}KB/s",
+                f"fetch {fetch or '-'}")
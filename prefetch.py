@@ -0,0 +1,106 @@
+# prefetch.py
+"""
+Achtergrond-prefetch van het volgende rotatie-frame.
+Een worker rendert het frame van de volgende coin (al ge-encodeerd en
+gedraaid) ruim voor de rotatie-deadline, zodat de wissel zelf alleen nog
+een buffer-copy is en de klok/prijs niet blijven hangen.
+"""
+
+import threading
+import time
+
+from dashboard import render_dashboard
+from fx import display_currency
+from metrics import PREFETCH_LEAD, PREFETCH_TOTAL
+
+class FramePrefetcher:
+    """
+    prepare() geeft aan welk frame er straks nodig is; de worker rendert het
+    opnieuw zodra coin, BTC-prijs, kleur of stale-markering verandert. take() geeft het frame
+    terug als het klopt met wat er op de deadline getoond moet worden.
+    """
+
+    def __init__(self, render=render_dashboard):
+        self._render = render
+        self._cond = threading.Condition()
+        self._wanted = None      # (coin, btc_price, btc_color, btc_stale, deadline)
+        self._frame = None
+        self._ready_at = None
+        self._running = False
+        self._thread = None
+        self.stats = {"hits": 0, "misses": 0, "renders": 0, "last_lead": None, "last_render": None}
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._worker, name="prefetch", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+
+    @staticmethod
+    def _key(coin, btc_price, btc_color, btc_stale):
+        return (coin["id"], btc_price, tuple(btc_color), bool(btc_stale), display_currency())
+
+    def prepare(self, coin, btc_price, btc_color, deadline, btc_stale=False):
+        """Vraag (opnieuw) een frame aan; goedkoop als er niets veranderd is."""
+        with self._cond:
+            wanted = (coin, btc_price, btc_color, bool(btc_stale), deadline)
+            if self._wanted is not None and self._wanted[1:] == wanted[1:] \
+                    and self._wanted[0]["id"] == coin["id"]:
+                return
+            self._wanted = wanted
+            self._cond.notify()
+
+    def take(self, coin, btc_price, btc_color, deadline=None, btc_stale=False):
+        """
+        Haal het vooraf gerenderde frame op, of None als het niet (meer) klopt
+        (ook als de BTC-prijs intussen stale werd of weer vers is).
+        Registreert hoeveel seconden vóór de deadline (time.monotonic(), zoals
+        de scheduler-timers) het klaar was.
+        """
+        key = self._key(coin, btc_price, btc_color, btc_stale)
+        with self._cond:
+            frame, ready_at = self._frame, self._ready_at
+            if frame is None or frame["key"] != key:
+                self.stats["misses"] += 1
+                PREFETCH_TOTAL.inc(1, "miss")
+                return None
+            self._frame = None
+            self._wanted = None
+        self.stats["hits"] += 1
+        if deadline is None:
+            deadline = time.monotonic()
+        self.stats["last_lead"] = deadline - ready_at
+        # Geen log per rotatie: alleen zichtbaar via --metrics
+        PREFETCH_TOTAL.inc(1, "hit")
+        PREFETCH_LEAD.observe(self.stats["last_lead"])
+        return frame
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while self._running and (self._wanted is None or (
+                        self._frame is not None and
+                        self._frame["key"] == self._key(*self._wanted[:4]))):
+                    self._cond.wait()
+                if not self._running:
+                    return
+                coin, btc_price, btc_color, btc_stale, _deadline = self._wanted
+            t0 = time.perf_counter()
+            try:
+                frame = self._render(btc_price, btc_color, coin, btc_stale)
+            except Exception as e:
+                print(f"[ERROR] Prefetch render failed for {coin.get('id')}: {e}")
+                with self._cond:
+                    if self._wanted is not None and self._wanted[0] is coin:
+                        self._wanted = None
+                continue
+            with self._cond:
+                self._frame = frame
+                self._ready_at = time.monotonic()
+                self.stats["renders"] += 1
+                self.stats["last_render"] = time.perf_counter() - t0
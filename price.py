@@ -1,63 +1,231 @@
 # price.py
 """
 Prijs-updates & API-logica voor het dashboard.
+De cache bevat per coin een prijs per valuta (sleutels via fx.price_key):
+alles uit één CoinGecko-call, Binance-prijzen (USDT) via de FX-tabel.
 """
 
 import threading
+from array import array
 import time
-import requests
+from history import PriceHistory
+from tracing import span
+from fx import fetch_currencies, format_price, fx_table, price_key
 
-price_cache = {}
+HISTORY_CAPACITY = 240
+# Ouder dan dit (seconden) wordt een prijs als verouderd getoond
+STALE_AFTER = 600
+
+class PriceSnapshot:
+    """
+    Onveranderlijke versie van de prijs-cache. Wordt nooit gemuteerd, dus
+    readers hebben geen lock nodig: pak current_snapshot() en lees.
+    version stijgt bij elke wijziging; versions[id] is de versie waarin die
+    coin voor het laatst veranderde (O(1) "veranderd sinds N?").
+    """
+
+    __slots__ = ("version", "prices", "times", "versions")
+
+    def __init__(self, version, prices, times, versions):
+        self.version = version
+        self.prices = prices
+        self.times = times
+        self.versions = versions
+
+    def get(self, coingecko_id):
+        return self.prices.get(coingecko_id)
+
+    def changed_since(self, version, coin_ids=None):
+        """Is er (voor deze coins) iets veranderd na versie version?"""
+        if coin_ids is None:
+            return self.version > version
+        versions = self.versions
+        return any(versions.get(i, 0) > version for i in coin_ids)
+
+_snapshot = PriceSnapshot(0, {}, {}, {})
+# Alleen voor writers: readers lezen lock-vrij de gepubliceerde snapshot
 price_cache_lock = threading.Lock()
+_price_changed = threading.Condition(price_cache_lock)
+# Ring-buffer per coin met elke update (constant geheugen)
+price_history = {}
+price_listeners = []
+
+def current_snapshot():
+    """De laatst gepubliceerde PriceSnapshot (lock-vrij)."""
+    return _snapshot
 
-def price_updater(coins, update_interval=60):
+def add_price_listener(callback, coin_ids=None):
+    """
+    Registreer callback(coingecko_id); wordt aangeroepen (vanuit de
+    price-thread) zodra een prijs echt verandert. Met coin_ids alleen voor
+    die coins.
+    """
+    price_listeners.append((callback, frozenset(coin_ids) if coin_ids is not None else None))
+
+def wait_for_change(version, timeout=None, coin_ids=None):
+    """
+    Blokkeer tot er (voor coin_ids) een snapshot nieuwer dan version is, of
+    tot de timeout. Geeft de actuele snapshot terug.
+    """
+    with _price_changed:
+        _price_changed.wait_for(lambda: _snapshot.changed_since(version, coin_ids), timeout)
+        return _snapshot
+
+def _publish(updates):
+    """updates: {coingecko_id: (prijs, timestamp)}. Aanroepen met de lock vast."""
+    global _snapshot
+    old = _snapshot
+    version = old.version + 1
+    prices = dict(old.prices)
+    times = dict(old.times)
+    versions = dict(old.versions)
+    changed = []
+    for coingecko_id, (price, ts) in updates.items():
+        if prices.get(coingecko_id) != price:
+            changed.append(coingecko_id)
+            versions[coingecko_id] = version
+        prices[coingecko_id] = price
+        times[coingecko_id] = ts
+    if not changed:
+        version = old.version
+    _snapshot = PriceSnapshot(version, prices, times, versions)
+    if changed:
+        _price_changed.notify_all()
+    return changed
+
+def set_price(coingecko_id, price, currency="usd"):
+    """
+    Schrijf een prijs in de cache (ook gebruikt door de streaming-modus).
+    Een USD-prijs wordt via de FX-tabel ook in de andere valuta's gezet.
+    """
+    set_quotes(coingecko_id, {currency: price})
+
+def set_quotes(coingecko_id, quotes, ts=None):
+    """
+    Prijzen van één coin in meerdere valuta's ({valuta: prijs}) in één
+    snapshot-versie. Ontbrekende valuta's worden uit de USD-prijs
+    omgerekend. Listeners krijgen de cache-sleutel (fx.price_key).
+    ts: tijd van de quote (bv. van de hub), standaard nu.
+    """
+    quotes = fx_table.fill(quotes, fetch_currencies())
+    now = time.time() if ts is None else ts
+    keyed = {price_key(coingecko_id, currency): price for currency, price in quotes.items()}
+    with price_cache_lock:
+        changed = _publish({key: (price, now) for key, price in keyed.items()})
+        for key, price in keyed.items():
+            history = price_history.get(key)
+            if history is None:
+                history = price_history[key] = PriceHistory(HISTORY_CAPACITY)
+            history.append(now, price)
+    for key in changed:
+        for callback, coin_ids in list(price_listeners):
+            if coin_ids is None or key in coin_ids:
+                callback(key)
+
+def restore_prices(entries):
+    """
+    Vul de cache met eerder opgeslagen {coingecko_id: (prijs, timestamp)}
+    (warm start). Nieuwere waarden in de cache blijven staan.
+    """
+    with price_cache_lock:
+        times = _snapshot.times
+        _publish({i: e for i, e in entries.items() if times.get(i, 0) < e[1]})
+
+def snapshot_prices():
+    """{coingecko_id: (prijs, timestamp)} van de hele cache."""
+    snap = _snapshot
+    return {i: (p, snap.times.get(i, 0.0)) for i, p in snap.prices.items()}
+
+def fetch_prices(coins, registry):
+    """
+    Eén update-cyclus via de provider-registry (goedkoopste gezonde provider
+    per coin, met fallback). Geeft {coingecko_id: ({valuta: prijs}, bron)} terug.
+    """
+    results = registry.fetch(coins)
+    for coin in coins:
+        coingecko_id = coin.get("coingecko_id", coin.get("id"))
+        if coingecko_id not in results:
+            print(f"[WARNING] {coin['symbol']} not found in any API (ID: {coingecko_id})")
+    return results
+
+def update_prices(coins, registry, symbols=None):
+    """
+    Eén cyclus: ophalen, FX-tabel bijwerken en alles in de cache zetten.
+    Geeft het resultaat van fetch_prices() terug.
+    """
+    symbols = symbols or {}
+    results = fetch_prices(coins, registry)
+    # Eerst de koersen bijwerken, dan pas USDT-prijzen (Binance) omrekenen
+    fx_table.learn(quotes for quotes, _source in results.values())
+    for coingecko_id, (quotes, source) in results.items():
+        set_quotes(coingecko_id, quotes)
+        tag = "INFO" if source == "coingecko" else source.upper()
+        shown = _snapshot.prices.get(price_key(coingecko_id))
+        print(f"[{tag}] Updated {symbols.get(coingecko_id, coingecko_id)} price: {format_price(shown)}")
+    return results
+
+def price_updater(coins, update_interval=60, transport=None, registry=None, skip_ids=None, wake=None):
     """
     Haalt periodiek (standaard elke 60s) de prijzen op voor de opgegeven coins.
     Updatet een thread-safe cache.
+    coins mag ook een callable zijn (bv. CoinRegistry.enabled), dan wordt de
+    lijst elke cyclus opnieuw opgevraagd.
+    skip_ids: optionele callable met coingecko-id's die al live gestreamd worden.
+    wake: optioneel threading.Event om direct een nieuwe cyclus te starten
+    (bv. als de stream wegvalt).
     """
+    # Pas hier importeren: requests laden kost bij het opstarten ~0,1 s op een Pi
+    from transport import get_transport
+    from providers import default_registry
+    registry = registry or default_registry(transport or get_transport(), fetch_currencies())
+    get_coins = coins if callable(coins) else (lambda: coins)
     while True:
-        ids = [coin.get("coingecko_id", coin.get("id")) for coin in coins]
-        ids_param = ",".join(ids)
+        if wake is not None:
+            # Vóór het ophalen wissen: een wake tijdens deze cyclus blijft staan
+            # en levert direct nog een cyclus op in plaats van verloren te gaan
+            wake.clear()
         try:
-            url = f"https://api.coingecko.com/api/v3/simple/price?ids={ids_param}&vs_currencies=usd"
-            r = requests.get(url, timeout=8)
-            prices = r.json()
-            for coin in coins:
-                coingecko_id = coin.get("coingecko_id", coin.get("id"))
-                price = prices.get(coingecko_id, {}).get("usd")
-                if price is not None:
-                    with price_cache_lock:
-                        price_cache[coingecko_id] = float(price)
-                    print(f"[INFO] Updated {coin['symbol']} price: {price}")
-                else:
-                    # Fallback: probeer Binance
-                    try:
-                        binance_symbol = coin.get("binance_symbol")
-                        if binance_symbol:
-                            binance_url = f"https://api.binance.com/api/v3/ticker/price?symbol={binance_symbol}"
-                            r_bin = requests.get(binance_url, timeout=8)
-                            if r_bin.ok:
-                                price_bin = float(r_bin.json().get("price", 0))
-                                if price_bin > 0:
-                                    with price_cache_lock:
-                                        price_cache[coingecko_id] = price_bin
-                                    print(f"[BINANCE] Updated {coin['symbol']} price: {price_bin}")
-                                else:
-                                    print(f"[WARNING] {coin['symbol']} not found at Binance ({binance_symbol}): {r_bin.text}")
-                            else:
-                                print(f"[WARNING] {coin['symbol']} Binance API error: {r_bin.text}")
-                        else:
-                            print(f"[WARNING] {coin['symbol']} not found in any API (ID: {coingecko_id})")
-                    except Exception as e2:
-                        print(f"[ERROR] Fallback failed for {coingecko_id}: {e2}")
+            coins = get_coins()
+            symbols = {coin.get("coingecko_id", coin.get("id")): coin["symbol"] for coin in coins}
+            skip = skip_ids() if skip_ids else ()
+            active = [c for c in coins if c.get("coingecko_id", c.get("id")) not in skip]
+            if active:
+                with span("price_updater cycle", "price", coins=len(active)):
+                    update_prices(active, registry, symbols)
         except Exception as e:
-            print(f"[ERROR] API call failed: {e}")
-        time.sleep(update_interval)
+            # Eén mislukte cyclus (of listener) mag de prijs-thread niet stoppen
+            print(f"[ERROR] Price update failed: {e}")
+        if wake is not None:
+            wake.wait(update_interval)
+        else:
+            time.sleep(update_interval)
+
+def coin_key(coin, currency=None):
+    """Cache-sleutel van een coin in een valuta (standaard de getoonde)."""
+    return price_key(coin.get("coingecko_id", coin.get("id")), currency)
+
+def get_cached_price(coin, currency=None):
+    """
+    Haalt de laatst bekende prijs op voor de coin (of None). Lock-vrij.
+    currency=None is de getoonde valuta.
+    """
+    return _snapshot.prices.get(coin_key(coin, currency))
 
-def get_cached_price(coin):
+def get_price_points(coin, n, currency=None):
     """
-    Haalt de laatst bekende prijs op voor de coin (of None).
+    Consistente snapshot van de historie: (totaal aantal updates ooit,
+    laatste n prijzen als array). (0, lege array) als er nog niets is.
     """
-    coingecko_id = coin.get("coingecko_id", coin.get("id"))
     with price_cache_lock:
-        return price_cache.get(coingecko_id)
+        history = price_history.get(coin_key(coin, currency))
+        if history is None:
+            return 0, array("d")
+        return history.total, history.last(n)
+
+def is_price_stale(coin, max_age=STALE_AFTER, currency=None):
+    """
+    True als er wel een prijs is, maar die ouder is dan max_age seconden
+    (bv. uit de snapshot na een reboot zonder netwerk).
+    """
+    ts = _snapshot.times.get(coin_key(coin, currency))
+    return ts is not None and time.time() - ts > max_age
@@ -0,0 +1,243 @@
+# providers.py
+"""
+Pluggable prijs-providers met health score, exponential backoff, circuit
+breaker en een request-budget per minuut. De updater kiest per coin de
+goedkoopste gezonde provider; nieuwe exchanges registreren zich via
+ProviderRegistry.register().
+"""
+
+import time
+
+import requests
+
+from metrics import FETCH_SECONDS, FETCH_TOTAL
+from tracing import span
+
+class ProviderError(Exception):
+    """Provider gaf een fout of onbruikbaar antwoord."""
+
+class RateLimited(ProviderError):
+    """HTTP 429: provider wil dat we even wachten (retry_after in seconden)."""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class PriceProvider:
+    """
+    Basisklasse. Subklassen zetten name/cost/requests_per_minute en
+    implementeren supports() en fetch().
+    cost is relatief: lager = liever gebruiken.
+    """
+
+    name = "provider"
+    cost = 1.0
+    requests_per_minute = 60
+
+    def supports(self, coin):
+        return True
+
+    def fetch(self, coins):
+        """{coingecko_id: {valuta: prijs}} voor (een deel van) de coins."""
+        raise NotImplementedError
+
+def _raise_for_status(r, name):
+    # 418: Binance-ban na het negeren van 429's; ook dan Retry-After volgen
+    if r.status_code in (429, 418):
+        retry_after = r.headers.get("Retry-After")
+        try:
+            retry_after = float(retry_after) if retry_after else None
+        except ValueError:
+            retry_after = None
+        raise RateLimited(f"{name} rate limited (HTTP {r.status_code})", retry_after)
+    if not r.ok:
+        raise ProviderError(f"{name} HTTP {r.status_code}: {r.text[:200]}")
+
+class CoinGeckoProvider(PriceProvider):
+    name = "coingecko"
+    cost = 1.0
+    # Free tier: ~30 calls/min, we houden marge
+    requests_per_minute = 20
+
+    def __init__(self, transport, currencies=("usd",)):
+        self.transport = transport
+        # Alle valuta's in dezelfde call: meer valuta's kost geen extra requests
+        self.currencies = tuple(currencies)
+
+    def fetch(self, coins):
+        ids = [coin.get("coingecko_id", coin.get("id")) for coin in coins]
+        r = self.transport.get(f"{self.transport.coingecko_url}/api/v3/simple/price",
+                               params={"ids": ",".join(ids), "vs_currencies": ",".join(self.currencies)})
+        _raise_for_status(r, self.name)
+        prices = r.json()
+        out = {}
+        for coingecko_id in ids:
+            entry = prices.get(coingecko_id, {})
+            quotes = {c: float(entry[c]) for c in self.currencies if entry.get(c) is not None}
+            if quotes:
+                out[coingecko_id] = quotes
+        return out
+
+class BinanceProvider(PriceProvider):
+    """USDT-paren, als USD; andere valuta's rekent price.py om via de FX-tabel."""
+
+    name = "binance"
+    cost = 2.0
+    requests_per_minute = 120
+
+    def __init__(self, transport):
+        self.transport = transport
+
+    def supports(self, coin):
+        return bool(coin.get("binance_symbol"))
+
+    def fetch(self, coins):
+        try:
+            prices = self.transport.binance_ticker_prices([c["binance_symbol"] for c in coins])
+        except requests.HTTPError as e:
+            if e.response is not None:
+                _raise_for_status(e.response, self.name)
+            raise ProviderError(f"{self.name}: {e}")
+        except requests.RequestException as e:
+            raise ProviderError(f"{self.name}: {e}")
+        out = {}
+        for coin in coins:
+            price = prices.get(coin["binance_symbol"])
+            if price:
+                out[coin.get("coingecko_id", coin.get("id"))] = {"usd": price}
+        if not out:
+            # Telt als fout: anders blijft de health op 1.0 en grijpt backoff nooit in
+            raise ProviderError(f"{self.name}: none of {len(coins)} symbols resolved")
+        return out
+
+class ProviderState:
+    """
+    Gezondheid van één provider: EWMA health score (1.0 = alles lukt),
+    exponential backoff na fouten, circuit breaker en een token-bucket
+    request-budget per minuut.
+    """
+
+    BACKOFF_BASE = 5.0
+    BACKOFF_MAX = 600.0
+    BREAKER_THRESHOLD = 3
+    BREAKER_COOLDOWN = 300.0
+    HEALTH_ALPHA = 0.3
+
+    def __init__(self, provider, now):
+        self.provider = provider
+        self.health = 1.0
+        self.failures = 0
+        self.blocked_until = 0.0
+        self.circuit = "closed"        # closed / open / half-open
+        self.tokens = float(provider.requests_per_minute)
+        self.last_refill = now
+        self.last_latency = None
+
+    def _refill(self, now):
+        rate = self.provider.requests_per_minute / 60.0
+        self.tokens = min(float(self.provider.requests_per_minute),
+                          self.tokens + (now - self.last_refill) * rate)
+        self.last_refill = now
+
+    def available(self, now):
+        """Mag er nu een request naar deze provider?"""
+        self._refill(now)
+        if now < self.blocked_until:
+            return False
+        if self.circuit == "open":
+            # Na de cooldown één proef-request toestaan
+            self.circuit = "half-open"
+        return self.tokens >= 1.0
+
+    def spend(self):
+        self.tokens -= 1.0
+
+    def record_success(self, latency):
+        self.health += self.HEALTH_ALPHA * (1.0 - self.health)
+        self.failures = 0
+        self.blocked_until = 0.0
+        self.circuit = "closed"
+        self.last_latency = latency
+
+    def record_failure(self, now, retry_after=None):
+        self.health += self.HEALTH_ALPHA * (0.0 - self.health)
+        self.failures += 1
+        backoff = min(self.BACKOFF_MAX, self.BACKOFF_BASE * (2 ** (self.failures - 1)))
+        if retry_after is not None:
+            backoff = max(backoff, retry_after)
+        if self.circuit == "half-open" or self.failures >= self.BREAKER_THRESHOLD:
+            self.circuit = "open"
+            backoff = max(backoff, self.BREAKER_COOLDOWN)
+        self.blocked_until = now + backoff
+
+    def rank(self):
+        """Sorteersleutel: goedkoopste gezonde provider eerst."""
+        return (self.provider.cost / max(self.health, 0.05), self.provider.name)
+
+class ProviderRegistry:
+    """
+    Houdt de providers en hun state bij en haalt prijzen op via de
+    goedkoopste gezonde provider per coin, met doorvallen naar de volgende.
+    """
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self.states = {}
+
+    def register(self, provider):
+        self.states[provider.name] = ProviderState(provider, self.clock())
+        return provider
+
+    def fetch(self, coins):
+        """{coingecko_id: ({valuta: prijs}, providernaam)} voor alle coins die ergens lukten."""
+        results = {}
+        remaining = list(coins)
+        tried = set()
+        while remaining:
+            now = self.clock()
+            candidates = [s for s in sorted(self.states.values(), key=ProviderState.rank)
+                          if s.provider.name not in tried]
+            if not candidates:
+                break
+            # Elke coin gaat naar de goedkoopste provider die hem kent en beschikbaar is
+            state = next((s for s in candidates
+                          if any(s.provider.supports(c) for c in remaining) and s.available(now)), None)
+            if state is None:
+                break
+            tried.add(state.provider.name)
+            subset = [c for c in remaining if state.provider.supports(c)]
+            state.spend()
+            t0 = time.perf_counter()
+            try:
+                with span(f"fetch {state.provider.name}", "price", coins=len(subset)):
+                    prices = state.provider.fetch(subset)
+            except RateLimited as e:
+                FETCH_TOTAL.inc(1, state.provider.name, "rate_limited")
+                print(f"[WARNING] {state.provider.name}: {e}, backing off")
+                state.record_failure(self.clock(), e.retry_after)
+                continue
+            except Exception as e:
+                FETCH_TOTAL.inc(1, state.provider.name, "error")
+                print(f"[ERROR] {state.provider.name} failed: {e}")
+                state.record_failure(self.clock())
+                continue
+            latency = time.perf_counter() - t0
+            state.record_success(latency)
+            FETCH_SECONDS.observe(latency, state.provider.name)
+            FETCH_TOTAL.inc(1, state.provider.name, "ok")
+            for coingecko_id, quotes in prices.items():
+                results[coingecko_id] = (quotes, state.provider.name)
+            remaining = [c for c in remaining if c.get("coingecko_id", c.get("id")) not in results]
+        return results
+
+    def report(self):
+        return {name: {"health": round(s.health, 2), "circuit": s.circuit,
+                       "failures": s.failures, "tokens": round(s.tokens, 1)}
+                for name, s in self.states.items()}
+
+def default_registry(transport, currencies=("usd",)):
+    """CoinGecko (goedkoopst, alle valuta's) en Binance, zoals voorheen."""
+    registry = ProviderRegistry()
+    registry.register(CoinGeckoProvider(transport, currencies))
+    registry.register(BinanceProvider(transport))
+    return registry
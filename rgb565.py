@@ -0,0 +1,59 @@
+# rgb565.py
+"""
+Snelle RGB565-encoder voor het framebuffer.
+Draait het beeld 180° en pakt de pixels in één batch (in C, via Pillow) in
+plaats van per pixel in Python.
+"""
+
+import time
+
+from PIL import Image, ImageChops
+
+from metrics import ENCODE_SECONDS, ENCODE_PIXELS
+
+# Oudere Pillow-versies (Raspberry Pi OS) kennen Image.Transpose nog niet
+ROTATE_180 = getattr(Image, "Transpose", Image).ROTATE_180
+
+# Lookup-tabellen per kanaal. De bitvelden overlappen niet, dus optellen == OR.
+#   low byte:  GGGBBBBB  (g bits 2..4, b bits 3..7)
+#   high byte: RRRRRGGG  (r bits 3..7, g bits 5..7)
+_LO_G = [((v >> 2) & 0x07) << 5 for v in range(256)]
+_LO_B = [v >> 3 for v in range(256)]
+_HI_R = [v & 0xF8 for v in range(256)]
+_HI_G = [v >> 5 for v in range(256)]
+
+def encode_rgb565(image, rotate=True):
+    """
+    Zet een PIL-image om naar little-endian RGB565 bytes voor het framebuffer.
+    Met rotate=True wordt het beeld eerst 180° gedraaid (LCD zit op z'n kop).
+    Output is byte-identiek aan de oude getdata()-loop.
+    """
+    t0 = time.perf_counter()
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    if rotate:
+        image = image.transpose(ROTATE_180)
+    r, g, b = image.split()
+    lo = ImageChops.add(g.point(_LO_G), b.point(_LO_B))
+    hi = ImageChops.add(r.point(_HI_R), g.point(_HI_G))
+    # "LA" heeft precies twee 8-bit kanalen -> interleaved lo/hi per pixel
+    data = Image.merge("LA", (lo, hi)).tobytes()
+    ENCODE_SECONDS.observe(time.perf_counter() - t0)
+    ENCODE_PIXELS.inc(image.size[0] * image.size[1])
+    return data
+
+def encode_rgb565_reference(image, rotate=True):
+    """
+    Oude per-pixel implementatie; alleen nog voor benchmark/verificatie.
+    """
+    if rotate:
+        image = image.rotate(180)
+    rgb565 = bytearray()
+    for pixel in image.convert("RGB").getdata():
+        r = pixel[0] >> 3
+        g = pixel[1] >> 2
+        b = pixel[2] >> 3
+        value = (r << 11) | (g << 5) | b
+        rgb565.append(value & 0xFF)
+        rgb565.append((value >> 8) & 0xFF)
+    return bytes(rgb565)
@@ -0,0 +1,197 @@
+# scheduler.py
+"""
+Event-gedreven deadline-scheduler voor de main loop.
+Wordt alleen wakker op echte gebeurtenissen (seconde-grens, prijs-update,
+rotatie-deadline, mode-switch) en slaapt de rest van de tijd.
+De klok is injecteerbaar, zodat alles met een virtuele klok te testen is.
+
+Deadlines staan op de monotone klok: een sprong in de wandklok (NTP-sync
+na het booten, de Pi heeft geen RTC) laat geen timers te vroeg of in een
+burst afgaan. Alleen every_second() richt zich op de wandklok, want dat is
+de getoonde tijd.
+"""
+
+import functools
+import heapq
+import itertools
+import math
+import threading
+import time
+
+from metrics import TICK_LATENESS
+from tracing import span
+
+class SystemClock:
+    """Echte tijd: time.time() (wandklok), time.monotonic() en een echte Condition.wait()."""
+
+    def time(self):
+        return time.time()
+
+    def monotonic(self):
+        return time.monotonic()
+
+    def wait(self, cond, timeout):
+        cond.wait(timeout)
+
+class VirtualClock:
+    """
+    Virtuele klok voor tests: wait() springt direct naar de deadline in
+    plaats van te slapen. jump() verzet alleen de wandklok (zoals NTP).
+    """
+
+    def __init__(self, start=0.0):
+        self.now = start
+        self.wall_offset = 0.0
+
+    def time(self):
+        return self.now + self.wall_offset
+
+    def monotonic(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+    def jump(self, seconds):
+        self.wall_offset += seconds
+
+    def wait(self, cond, timeout):
+        if timeout is not None and timeout > 0:
+            self.now += timeout
+
+class Scheduler:
+    """
+    Timers (call_at/call_later/every_second) en events (on/notify).
+    notify() is thread-safe en maakt de loop direct wakker.
+    call_at() en timer-callbacks gebruiken clock.monotonic(); alleen
+    every_second() geeft de wandklok-tijd door.
+    """
+
+    # Klein beetje na de seconde-grens, zodat localtime() al de nieuwe seconde geeft
+    SECOND_SLACK = 0.002
+
+    def __init__(self, clock=None):
+        self.clock = clock or SystemClock()
+        self._cond = threading.Condition()
+        self._timers = []
+        self._seq = itertools.count()
+        self._cancelled = set()
+        self._handlers = {}
+        self._pending = []
+        self._running = False
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.stats = {
+            "started": self.clock.monotonic(),
+            "wakeups": 0,
+            "timers": 0,
+            "events": 0,
+            "lateness_total": 0.0,
+            "lateness_max": 0.0,
+        }
+
+    # --- timers ---
+
+    def call_at(self, when, callback):
+        """Roep callback(now) aan op monotone tijd when. Geeft een handle voor cancel()."""
+        with self._cond:
+            handle = next(self._seq)
+            heapq.heappush(self._timers, (when, handle, callback))
+            self._cond.notify()
+        return handle
+
+    def call_later(self, delay, callback):
+        return self.call_at(self.clock.monotonic() + delay, callback)
+
+    def cancel(self, handle):
+        with self._cond:
+            self._cancelled.add(handle)
+
+    def _next_second(self, tick):
+        wall = self.clock.time()
+        return self.call_later(math.floor(wall) + 1 + self.SECOND_SLACK - wall, tick)
+
+    def every_second(self, callback):
+        """callback(now) precies na elke seconde-grens van de wandklok (now = wandklok)."""
+        @functools.wraps(callback)
+        def tick(_now):
+            callback(self.clock.time())
+            self._next_second(tick)
+        return self._next_second(tick)
+
+    # --- events ---
+
+    def on(self, event, callback):
+        """Registreer callback() voor een event-naam (bv. "price", "mode")."""
+        self._handlers.setdefault(event, []).append(callback)
+
+    def notify(self, event):
+        """Thread-safe: meld een event, de loop wordt direct wakker."""
+        with self._cond:
+            if event not in self._pending:
+                self._pending.append(event)
+            self._cond.notify()
+
+    # --- loop ---
+
+    def run_once(self):
+        """
+        Slaap tot de eerstvolgende deadline of event en verwerk alles wat dan
+        klaarstaat. Geeft False terug als er niets meer te doen is.
+        """
+        with self._cond:
+            if not self._pending:
+                if not self._timers:
+                    if not self._running:
+                        return False
+                    self.clock.wait(self._cond, None)
+                else:
+                    timeout = self._timers[0][0] - self.clock.monotonic()
+                    if timeout > 0:
+                        self.clock.wait(self._cond, timeout)
+            now = self.clock.monotonic()
+            events, self._pending = self._pending, []
+            due = []
+            while self._timers and self._timers[0][0] <= now:
+                when, handle, callback = heapq.heappop(self._timers)
+                if handle in self._cancelled:
+                    self._cancelled.discard(handle)
+                    continue
+                due.append((when, callback))
+        self.stats["wakeups"] += 1
+        for event in events:
+            self.stats["events"] += 1
+            for callback in self._handlers.get(event, []):
+                with span(callback.__name__, "scheduler", event=event):
+                    callback()
+        for when, callback in due:
+            lateness = now - when
+            self.stats["timers"] += 1
+            self.stats["lateness_total"] += lateness
+            self.stats["lateness_max"] = max(self.stats["lateness_max"], lateness)
+            TICK_LATENESS.observe(lateness)
+            with span(callback.__name__, "scheduler"):
+                callback(now)
+        return True
+
+    def run(self):
+        self._running = True
+        while self._running:
+            self.run_once()
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+
+    def report(self):
+        """Samenvatting: wake-ups per minuut en gemiddelde/max tick-lateness."""
+        s = self.stats
+        minutes = max(self.clock.monotonic() - s["started"], 1e-9) / 60.0
+        avg = s["lateness_total"] / s["timers"] if s["timers"] else 0.0
+        return {
+            "wakeups_per_min": s["wakeups"] / minutes,
+            "lateness_avg_ms": avg * 1000,
+            "lateness_max_ms": s["lateness_max"] * 1000,
+        }
@@ -0,0 +1,175 @@
+# search_index.py
+"""
+Incrementele zoekindex voor het setup-scherm.
+Unigram/bigram posting-lists (typed arrays) over symbol en naam, zodat een
+zoekopdracht alleen kandidaten bekijkt die de zeldzaamste bigram bevatten.
+Typ je een letter bij en is het vorige resultaat al volledig geteld, dan
+wordt dat verder gefilterd in plaats van de posting-list.
+Exacte symbol-matches komen altijd eerst; resultaten worden lui opgebouwd,
+dus de eerste pagina is snel, ook bij 15k+ coins.
+"""
+
+import threading
+from array import array
+
+# Scheidt symbol en naam, zodat een zoekterm niet over de grens matcht
+_SEP = "\x00"
+
+class SearchResult:
+    """
+    Lui resultaat: gedraagt zich als een (read-only) lijst van items.
+    Slicen haalt alleen op wat nodig is; len() telt (eenmalig) alles.
+    """
+
+    def __init__(self, index, query, head, candidates, verify):
+        self.index = index
+        self.query = query
+        self._head = set(head)
+        self._ids = list(head)
+        self._gen = self._tail(candidates, verify)
+        self.done = False
+
+    def _tail(self, candidates, verify):
+        texts = self.index.texts
+        head = self._head
+        q = self.query
+        for i in candidates:
+            if i in head:
+                continue
+            if verify and q not in texts[i]:
+                continue
+            yield i
+
+    def _ensure(self, n=None):
+        ids = self._ids
+        gen = self._gen
+        while not self.done and (n is None or len(ids) < n):
+            try:
+                ids.append(next(gen))
+            except StopIteration:
+                self.done = True
+        return ids
+
+    def ids(self):
+        """Alle match-indices (volledig opgebouwd)."""
+        return self._ensure()
+
+    def __len__(self):
+        return len(self._ensure())
+
+    def __getitem__(self, key):
+        get_item = self.index.get_item
+        if isinstance(key, slice):
+            stop = key.stop
+            ids = self._ensure(None if stop is None or stop < 0 else stop)
+            return [get_item(i) for i in ids[key]]
+        ids = self._ensure(None if key < 0 else key + 1)
+        return get_item(ids[key])
+
+    def __iter__(self):
+        n = 0
+        while True:
+            ids = self._ensure(n + 1)
+            if n >= len(ids):
+                return
+            yield self.index.get_item(ids[n])
+            n += 1
+
+class SearchIndex:
+    """
+    texts: lijst van (symbol, naam); get_item(i) geeft het i-de item terug.
+    Volgorde van texts is ook de rangorde binnen de niet-exacte matches.
+    """
+
+    def __init__(self, texts, get_item):
+        self.get_item = get_item
+        self.texts = [f"{s}{_SEP}{n}".lower() for s, n in texts]
+        self.size = len(self.texts)
+        self._exact = {}
+        for i, (s, _n) in enumerate(texts):
+            self._exact.setdefault(s.lower(), []).append(i)
+        self._grams = None
+        self._build_lock = threading.Lock()
+        self._last = None
+
+    def warm(self):
+        """Index alvast opbouwen (bv. in een thread bij het openen van setup)."""
+        with self._build_lock:
+            if self._grams is None:
+                self._build()
+
+    def _build(self):
+        grams = {}
+        for i, t in enumerate(self.texts):
+            seen = set(t)
+            seen.update(t[j:j + 2] for j in range(len(t) - 1))
+            for g in seen:
+                if _SEP in g:
+                    continue
+                posting = grams.get(g)
+                if posting is None:
+                    posting = grams[g] = array("I")
+                posting.append(i)
+        self._grams = grams
+
+    def search(self, query):
+        q = query.strip().lower()
+        if not q:
+            return SearchResult(self, q, [], range(self.size), False)
+        if self._grams is None:
+            self.warm()
+        head = self._exact.get(q, [])
+        if len(q) == 1:
+            return self._remember(SearchResult(self, q, head, self._grams.get(q, ()), False))
+        postings = [self._grams.get(q[j:j + 2], ()) for j in range(len(q) - 1)]
+        candidates = min(postings, key=len)
+        verify = len(q) > 2
+        # Incrementeel: vorige (volledige) resultaat voor een prefix van q verder filteren
+        last = self._last
+        if last is not None and last.done and q.startswith(last.query) and len(last.ids()) < len(candidates):
+            candidates = sorted(last.ids())
+            verify = True
+        return self._remember(SearchResult(self, q, head, candidates, verify))
+
+    def _remember(self, result):
+        self._last = result
+        return result
+
+class CoinSearch:
+    """
+    Zoeken over de coins uit coins.json plus (optioneel) de volledige catalogus.
+    Geconfigureerde coins staan vooraan; catalogus-coins worden pas een dict als
+    ze getoond worden. Aangezette catalogus-coins geeft adopted() terug, zodat
+    save_settings ze aan coins.json kan toevoegen.
+    """
+
+    DEFAULT_COLOR = "#FFFFFF"
+
+    def __init__(self, coins, catalog=None):
+        self.coins = coins
+        self._n_coins = len(coins)
+        configured = {c.get("coingecko_id", c["id"]) for c in coins}
+        entries = catalog.entries() if catalog is not None else []
+        self.extra = [e for e in entries if e[0] not in configured]
+        self._materialized = {}
+        texts = [(c["symbol"], c.get("name", "")) for c in coins]
+        texts += [(symbol, name) for _id, symbol, name in self.extra]
+        self.index = SearchIndex(texts, self.item)
+
+    def item(self, i):
+        if i < self._n_coins:
+            return self.coins[i]
+        coin = self._materialized.get(i)
+        if coin is None:
+            coingecko_id, symbol, name = self.extra[i - self._n_coins]
+            coin = {"id": coingecko_id, "name": name, "symbol": symbol.upper(),
+                    "color": self.DEFAULT_COLOR, "coingecko_id": coingecko_id, "show": False}
+            self._materialized[i] = coin
+        return coin
+
+    def search(self, text):
+        return self.index.search(text)
+
+    def adopted(self):
+        """Catalogus-coins die in deze sessie zijn aangezet."""
+        return [c for _i, c in sorted(self._materialized.items()) if c.get("show")]
@@ -1,89 +1,282 @@
 """
 Setup-/zoek-scherm: coin toggles, search, keyboard, scroll, save.
+
+De statische delen (achtergrond, header, SAVE, scroll-pijlen, keyboard)
+worden één keer gerenderd en als lagen bewaard; toetsen liggen als
+voorge-encodeerde RGB565-tiles klaar (normaal en ingedrukt). Een tap werkt
+via de compositor alleen bij wat veranderde: één toggle-box, de zoektekst
+of de zichtbare lijst bij scrollen.
+
+Het ontwerp is in vaste pixels voor het 480x320 touch-LCD; de oriëntatie
+(rot0/rot180) komt van het display. Op een scherm met een andere grootte
+weigert setup (coins.json dan met de hand aanpassen).
 """
 
 from PIL import Image, ImageDraw, ImageFont
 import json
+import threading
+import time
+from collections import deque
+from rgb565 import encode_rgb565
+from framebuffer import get_framebuffer
+from catalog import CoinCatalog
+from search_index import CoinSearch
+from compositor import Compositor
+from glyphs import GlyphAtlas, draw_text
+from touchscreen import get_dispatcher
 
 WIDTH, HEIGHT = 480, 320
 FONT_SMALL = "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"
 CONFIG_FILE = "coins.json"
+FRAMEBUFFER = None
 
-def draw_coin_toggle_list(coins, scroll=0, search_text="", search_focused=False):
-    matches = []
-    st = search_text.strip().lower()
-    for coin in coins:
-        if st == "" or st in coin['symbol'].lower() or st in coin['name'].lower():
-            matches.append(coin)
-    visible = matches[scroll:scroll+6]
-    image = Image.new("RGB", (WIDTH, HEIGHT), (30,30,60))
-    draw = ImageDraw.Draw(image)
-    font = ImageFont.truetype(FONT_SMALL, 26)
-    font_search = ImageFont.truetype(FONT_SMALL, 24)
-    draw.rectangle([0, 0, WIDTH, 55], fill=(50,50,90))
-    draw.text((20, 10), "SETUP: Toggle/Search", fill=(255,255,255), font=font)
-    draw.rectangle([20, 55, WIDTH-20, 95], fill=(60,60,100))
-    draw.text((30, 65), f"Search: {search_text}", fill=(255,255,255), font=font_search)
-    if search_focused:
-        draw.rectangle([18, 53, WIDTH-18, 97], outline=(80,255,80), width=2)
-    for i, coin in enumerate(visible):
-        y = 105 + i*40
-        toggle_box = [30, y, 70, y+30]
-        fill = (90,230,90) if coin.get("show", True) else (130,130,130)
-        draw.rectangle(toggle_box, fill=fill)
+BG_COLOR = (30,30,60)
+ROWS = 6
+ROW_Y = 105
+ROW_H = 40
+TOGGLE_BOX = (30, 0, 70, 30)  # relatief t.o.v. de rij
+SCROLL_X = WIDTH - 60
+
+SAVE_RECT = (WIDTH - 110 - 18, 12, WIDTH - 18, 12 + 40)
+
+KEYS = [
+    "QWERTYUIOP",
+    "ASDFGHJKL",
+    "ZXCVBNM<-"
+]
+KEY_W = 38
+KEY_H = 38
+KEY_GAP = 4
+KEY_COLOR = (80,80,80)
+KEY_PRESSED_COLOR = (150,150,210)
+_keyboard_height = len(KEYS) * KEY_H + (len(KEYS) - 1) * KEY_GAP
+KEY_START_Y = HEIGHT - 70 - _keyboard_height - 10
+KEY_START_X = (WIDTH - (10 * KEY_W + 9 * KEY_GAP)) // 2
+
+catalog = CoinCatalog()
+_search = None
+
+def coin_search(coins):
+    """Zoekindex voor deze setup-sessie (opnieuw opgebouwd voor een nieuwe coins-lijst)."""
+    global _search
+    if _search is None or _search.coins is not coins:
+        _search = CoinSearch(coins, catalog)
+    return _search
+
+def _key_rects():
+    """{teken: (x0, y0, x1, y1)} inclusief, zoals ImageDraw.rectangle."""
+    rects = {}
+    for row_idx, row in enumerate(KEYS):
+        yk = KEY_START_Y + row_idx * (KEY_H + KEY_GAP)
+        for col_idx, char in enumerate(row):
+            xk = KEY_START_X + col_idx * (KEY_W + KEY_GAP)
+            rects[char] = (xk, yk, xk + KEY_W, yk + KEY_H)
+    return rects
+
+KEY_RECTS = _key_rects()
+
+def key_at(x, y):
+    """Teken onder (x, y) op het keyboard, of None."""
+    for char, (x0, y0, x1, y1) in KEY_RECTS.items():
+        if x0 <= x <= x1 and y0 <= y <= y1:
+            return char
+    return None
+
+def _display():
+    return get_framebuffer(FRAMEBUFFER)
+
+def _encode(img):
+    return encode_rgb565(img, _display().rotate)
+
+def _blit_encoded(rect, data):
+    """Voorge-encodeerde tile (schermcoördinaten, exclusieve rect) direct wegschrijven."""
+    display = _display()
+    w, h = rect[2] - rect[0], rect[3] - rect[1]
+    if display.rotate:
+        display.blit(WIDTH - rect[0] - w, HEIGHT - rect[1] - h, w, h, data)
+    else:
+        display.blit(rect[0], rect[1], w, h, data)
+
+def _blit_screen_region(img, x, y):
+    """Uitsnede op schermpositie (x, y) naar het framebuffer, evt. gedraaid (zoals dashboard.py)."""
+    w, h = img.size
+    _blit_encoded((x, y, x + w, y + h), _encode(img))
+
+def supported():
+    """None als setup op dit display kan, anders de reden."""
+    display = _display()
+    if (display.width, display.height) != (WIDTH, HEIGHT):
+        return f"setup screen needs a {WIDTH}x{HEIGHT} display, {display.path} is {display.width}x{display.height}"
+    return None
+
+class SetupScreen:
+    """
+    Eén instantie per proces; lagen, fonts en tiles worden lui bij de eerste
+    setup-sessie opgebouwd en daarna hergebruikt.
+    """
+
+    def __init__(self):
+        self.compositor = Compositor(WIDTH, HEIGHT, _blit_screen_region)
+        self.font = None
+        self.font_search = None
+        self.base = None
+        self.keyboard = None
+        self.key_tiles = {}
+        self.shown = False
+        self._search_text = None
+        self.latencies = {"tap": deque(maxlen=256), "press": deque(maxlen=256)}
+
+    def _build_layers(self):
+        self.font = ImageFont.truetype(FONT_SMALL, 26)
+        self.font_search = ImageFont.truetype(FONT_SMALL, 24)
+        self.atlas = GlyphAtlas(self.font, "setup")
+        self.atlas_search = GlyphAtlas(self.font_search, "setup_search")
+
+        base = Image.new("RGB", (WIDTH, HEIGHT), BG_COLOR)
+        draw = ImageDraw.Draw(base)
+        draw.rectangle([0, 0, WIDTH, 55], fill=(50,50,90))
+        draw.text((20, 10), "SETUP: Toggle/Search", fill=(255,255,255), font=self.font)
+        draw.polygon([(SCROLL_X, ROW_Y), (SCROLL_X+30, ROW_Y), (SCROLL_X+15, ROW_Y-20)], fill=(255,255,255))
+        down_y = ROW_Y + ROWS*ROW_H
+        draw.polygon([(SCROLL_X, down_y), (SCROLL_X+30, down_y), (SCROLL_X+15, down_y+20)], fill=(255,255,255))
+        save_left, save_top, save_right, save_bottom = SAVE_RECT
+        draw.rectangle([save_left, save_top, save_right, save_bottom], fill=(60,130,60))
+        draw.text((save_left+17, save_top+10), "SAVE", fill=(255,255,255), font=self.font_search)
+        self.base = base
+
+        # Keyboard als RGBA-laag (de gaten tussen de toetsen blijven doorzichtig)
+        keyboard = Image.new("RGBA", (WIDTH, HEIGHT), (0,0,0,0))
+        draw = ImageDraw.Draw(keyboard)
+        for char, rect in KEY_RECTS.items():
+            draw.rectangle(list(rect), fill=KEY_COLOR)
+            draw.text((rect[0]+10, rect[1]+8), char, font=self.font_search, fill=(255,255,255))
+        self.keyboard_box = (KEY_START_X, KEY_START_Y, max(r[2] for r in KEY_RECTS.values()) + 1,
+                             max(r[3] for r in KEY_RECTS.values()) + 1)
+        self.keyboard = keyboard.crop(self.keyboard_box)
+
+        # Toetsen zijn dekkend en liggen bovenop: tiles mogen direct geblit worden
+        for char, rect in KEY_RECTS.items():
+            box = (rect[0], rect[1], rect[2] + 1, rect[3] + 1)
+            tile = keyboard.crop(box).convert("RGB")
+            pressed = Image.new("RGB", tile.size, KEY_PRESSED_COLOR)
+            ImageDraw.Draw(pressed).text((10, 8), char, font=self.font_search, fill=(255,255,255))
+            self.key_tiles[char] = (box, _encode(tile), _encode(pressed))
+
+    def _search_region(self, search_text, focused):
+        text = f"Search: {search_text}"
+        atlas = self.atlas_search
+
+        def paint(img, origin):
+            draw = ImageDraw.Draw(img)
+            ox, oy = origin
+            draw.rectangle([20-ox, 55-oy, WIDTH-20-ox, 95-oy], fill=(60,60,100))
+            draw_text(img, (30-ox, 65-oy), atlas, text, (255,255,255))
+            if focused:
+                draw.rectangle([18-ox, 53-oy, WIDTH-18-ox, 97-oy], outline=(80,255,80), width=2)
+            # De punt van de scroll-omhoog-pijl valt over de zoekbalk
+            draw.polygon([(SCROLL_X-ox, ROW_Y-oy), (SCROLL_X+30-ox, ROW_Y-oy), (SCROLL_X+15-ox, ROW_Y-20-oy)], fill=(255,255,255))
+
+        return (search_text, focused), (18, 53, WIDTH-17, 98), paint
+
+    def _row_region(self, i, coin):
+        y = ROW_Y + i*ROW_H
+        box = (0, y, WIDTH, y + ROW_H)
+        if coin is None:
+            return None, box, lambda img, origin: None
         text = f"{coin['symbol']} - {coin['name']}"
-        draw.text((80, y), text, fill=(255,255,255), font=font)
-    scroll_up_x = WIDTH - 60
-    scroll_up_y = 105
-    scroll_down_x = WIDTH - 60
-    scroll_down_y = 105 + 6*40
-    draw.polygon([(scroll_up_x, scroll_up_y), (scroll_up_x+30, scroll_up_y), (scroll_up_x+15, scroll_up_y-20)], fill=(255,255,255))
-    draw.polygon([(scroll_down_x, scroll_down_y), (scroll_down_x+30, scroll_down_y), (scroll_down_x+15, scroll_down_y+20)], fill=(255,255,255))
-    
-    # Save-knop rechtsboven
-    save_w = 110
-    save_h = 40
-    save_left = WIDTH - save_w - 18
-    save_right = WIDTH - 18
-    save_top = 12
-    save_bottom = save_top + save_h
-    draw.rectangle([save_left, save_top, save_right, save_bottom], fill=(60,130,60))
-    draw.text((save_left+17, save_top+10), "SAVE", fill=(255,255,255), font=font_search)
-
-    keys = [
-        "QWERTYUIOP",
-        "ASDFGHJKL",
-        "ZXCVBNM<-"
-    ]
-    key_w = 38
-    key_h = 38
-    key_rows = 3
-    key_gap = 4
-    keyboard_height = key_rows * key_h + (key_rows - 1) * key_gap
-    save_button_top = HEIGHT - 70
-    key_start_y = save_button_top - keyboard_height - 10
-    total_key_row_width = 10 * key_w + 9 * key_gap
-    key_start_x = (WIDTH - total_key_row_width) // 2
-    if search_focused:
-        for row_idx, row in enumerate(keys):
-            yk = key_start_y + row_idx * (key_h + key_gap)
-            for col_idx, char in enumerate(row):
-                xk = key_start_x + col_idx * (key_w + key_gap)
-                draw.rectangle([xk, yk, xk+key_w, yk+key_h], fill=(80,80,80))
-                draw.text((xk+10, yk+8), char, font=font_search, fill=(255,255,255))
-    image = image.rotate(180)
-    rgb565 = bytearray()
-    for pixel in image.getdata():
-        r = pixel[0] >> 3
-        g = pixel[1] >> 2
-        b = pixel[2] >> 3
-        value = (r << 11) | (g << 5) | b
-        rgb565.append(value & 0xFF)
-        rgb565.append((value >> 8) & 0xFF)
-    with open("/dev/fb1", 'wb') as f:
-        f.write(rgb565)
-    # Return save-knop coords ook (voor touch):
-    return matches, font, keys, key_start_x, key_start_y, key_w, key_h, key_gap, (save_left, save_top, save_right, save_bottom)
+        show = coin.get("show", True)
+        atlas = self.atlas
+
+        def paint(img, origin):
+            ox, oy = origin
+            fill = (90,230,90) if show else (130,130,130)
+            ImageDraw.Draw(img).rectangle([TOGGLE_BOX[0]-ox, y-oy, TOGGLE_BOX[2]-ox, y+TOGGLE_BOX[3]-oy], fill=fill)
+            draw_text(img, (80-ox, y-oy), atlas, text, (255,255,255))
+
+        return (text, show), box, paint
+
+    def _keyboard_region(self, focused):
+        keyboard = self.keyboard
+        box = self.keyboard_box
+
+        def paint(img, origin):
+            if focused:
+                img.paste(keyboard, (box[0]-origin[0], box[1]-origin[1]), keyboard)
+
+        return focused, box, paint
+
+    def _regions(self, visible, search_text, focused):
+        regions = [("search", self._search_region(search_text, focused))]
+        for i in range(ROWS):
+            regions.append((f"row{i}", self._row_region(i, visible[i] if i < len(visible) else None)))
+        regions.append(("keyboard", self._keyboard_region(focused)))
+        return regions
+
+    def present(self, visible, search_text, focused):
+        """
+        Eerste keer: volledig frame. Daarna alleen damage: toggle-box bij
+        alleen een andere aan/uit-stand, de gewijzigde tekens van de zoektekst,
+        en rijen waarvan de inhoud veranderde (scrollen/zoeken).
+        """
+        if self.base is None:
+            self._build_layers()
+        regions = self._regions(visible, search_text, focused)
+        comp = self.compositor
+        if not self.shown:
+            frame = self.base.copy()
+            for _name, (_key, _box, paint) in regions:
+                paint(frame, (0, 0))
+            _display().write_frame(_encode(frame))
+            comp.reset(self.base, {name: (key, box, paint, True) for name, (key, box, paint) in regions})
+            self.shown = True
+            self._search_text = search_text
+            return
+        for name, (key, box, paint) in regions:
+            old = comp.key(name)
+            damage = None
+            if name == "search" and old is not None and old[1] == focused:
+                changed = self.atlas_search.changed_box(f"Search: {self._search_text}", f"Search: {search_text}")
+                if changed is not None:
+                    damage = (30 + changed[0], 65 + changed[1], 30 + changed[2], 65 + changed[3])
+            elif name.startswith("row") and old is not None and key is not None and old[0] == key[0]:
+                # Alleen de toggle ging om
+                y = box[1]
+                damage = (TOGGLE_BOX[0], y, TOGGLE_BOX[2] + 1, y + TOGGLE_BOX[3] + 1)
+            comp.set_region(name, key, box, paint, damage=damage, clip=True)
+        self._search_text = search_text
+        comp.flush()
+
+    def press_key(self, char, pressed=True):
+        """Directe feedback bij indrukken: voorge-encodeerde tile, geen rendering."""
+        box, normal, down = self.key_tiles[char]
+        _blit_encoded(box, down if pressed else normal)
+
+    def hide(self):
+        """Setup verlaten: volgende keer weer een volledig frame."""
+        self.shown = False
+
+    def record(self, kind, event_time):
+        """Touch-to-pixel: van de kernel-timestamp van het event tot na de blit."""
+        if event_time:
+            self.latencies[kind].append(time.time() - event_time)
+
+    def report(self):
+        out = {}
+        for kind, values in self.latencies.items():
+            if values:
+                ordered = sorted(values)
+                out[kind] = {"n": len(ordered), "p50_ms": round(ordered[len(ordered)//2] * 1000, 1),
+                             "max_ms": round(ordered[-1] * 1000, 1)}
+        return out
+
+_screen = SetupScreen()
+
+def draw_coin_toggle_list(coins, scroll=0, search_text="", search_focused=False):
+    # Lui resultaat: alleen de zichtbare pagina wordt echt opgezocht
+    matches = coin_search(coins).search(search_text)
+    visible = matches[scroll:scroll+ROWS]
+    _screen.present(visible, search_text, search_focused)
+    return matches, _screen.font, KEYS, KEY_START_X, KEY_START_Y, KEY_W, KEY_H, KEY_GAP, SAVE_RECT
 
 def handle_setup_touch(x, y, coins, scroll, search_text, search_focused, matches, font, keys, key_start_x, key_start_y, key_w, key_h, key_gap, save_btn_rect, switch_to_dashboard):
     save_left, save_top, save_right, save_bottom = save_btn_rect
@@ -97,71 +290,100 @@ def handle_setup_touch(x, y, coins, scroll, search_text, search_focused, matches
         return False, scroll-1, search_text, search_focused
     scroll_down_x = WIDTH - 60
     scroll_down_y = 105 + 6*40
-    if scroll_down_x <= x <= scroll_down_x+30 and scroll_down_y <= y <= scroll_down_y+20 and (scroll+6) < len(matches):
+    if scroll_down_x <= x <= scroll_down_x+30 and scroll_down_y <= y <= scroll_down_y+20 and matches[scroll+6:scroll+7]:
         return False, scroll+1, search_text, search_focused
     if 20 <= x <= WIDTH-20 and 55 <= y <= 95:
         return False, scroll, search_text, True
     if search_focused:
-        for row_idx, row in enumerate(keys):
-            yk = key_start_y + row_idx * (key_h + key_gap)
-            for col_idx, char in enumerate(row):
-                xk = key_start_x + col_idx * (key_w + key_gap)
-                if xk <= x <= xk+key_w and yk <= y <= yk+key_h:
-                    if char == "<":
-                        search_text = search_text[:-1]
-                    else:
-                        search_text += char
-                    return False, scroll, search_text, True
-    for i in range(6):
+        char = key_at(x, y)
+        if char is not None:
+            if char == "<":
+                search_text = search_text[:-1]
+            else:
+                search_text += char
+            return False, 0, search_text, True
+    for i, coin in enumerate(matches[scroll:scroll+6]):
         y_coin = 105 + i*40
-        if i < len(matches):
-            coin = matches[scroll+i]
-            text = f"{coin['symbol']} - {coin['name']}"
-            text_bbox = font.getbbox(text)
-            text_w = text_bbox[2] - text_bbox[0]
-            x_name_start = 80
-            x_name_end = x_name_start + text_w
-            toggle_box_x1 = 30
-            toggle_box_x2 = 70
-            if ((toggle_box_x1 <= x <= toggle_box_x2) or
-                (x_name_start - 8 <= x <= x_name_end + 8)) and y_coin <= y <= y_coin+30:
-                orig_idx = coins.index(coin)
-                coins[orig_idx]["show"] = not coins[orig_idx].get("show", True)
-                return False, scroll, search_text, False
+        text = f"{coin['symbol']} - {coin['name']}"
+        text_bbox = font.getbbox(text)
+        text_w = text_bbox[2] - text_bbox[0]
+        x_name_start = 80
+        x_name_end = x_name_start + text_w
+        toggle_box_x1 = 30
+        toggle_box_x2 = 70
+        if ((toggle_box_x1 <= x <= toggle_box_x2) or
+            (x_name_start - 8 <= x <= x_name_end + 8)) and y_coin <= y <= y_coin+30:
+            # matches bevat dezelfde dicts als coins (of catalogus-dicts): direct togglen
+            coin["show"] = not coin.get("show", True)
+            return False, scroll, search_text, False
     return False, scroll, search_text, False
 
 def setup_touch_listener(coins, switch_to_dashboard):
-    import evdev
-    device = evdev.InputDevice('/dev/input/event0')
-    raw_x, raw_y = 0, 0
-    finger_down = False
+    """
+    Setup-sessie op de gedeelde input-thread: down/up geven directe
+    toets-feedback, tap bedient het scherm, swipe scrollt de lijst en een
+    long-press op backspace wist de zoektekst. Blokkeert tot SAVE.
+    Op een display dat niet 480x320 is direct terug naar het dashboard.
+    """
+    reason = supported()
+    if reason is not None:
+        print(f"[WARNING] Cannot open setup: {reason}; edit {CONFIG_FILE} instead")
+        switch_to_dashboard()
+        return
+    gestures = get_dispatcher().subscribe({"down", "up", "tap", "swipe", "long_press"})
+    pressed_key = None
     scroll = 0
     search_text = ""
     search_focused = False
-    while True:
-        matches, font, keys, key_start_x, key_start_y, key_w, key_h, key_gap, save_btn_rect = draw_coin_toggle_list(
-            coins, scroll=scroll, search_text=search_text, search_focused=search_focused)
-        for event in device.read_loop():
-            if event.type == evdev.ecodes.EV_ABS:
-                if event.code == evdev.ecodes.ABS_X:
-                    raw_x = event.value
-                elif event.code == evdev.ecodes.ABS_Y:
-                    raw_y = event.value
-            elif event.type == evdev.ecodes.EV_KEY and event.code == evdev.ecodes.BTN_TOUCH:
-                if event.value == 1:
-                    finger_down = True
-                elif event.value == 0 and finger_down:
-                    finger_down = False
-                    from calibration import scale_touch
-                    x, y = scale_touch(raw_x, raw_y)
-                    should_exit, scroll, search_text, search_focused = handle_setup_touch(
-                        x, y, coins, scroll, search_text, search_focused,
-                        matches, font, keys, key_start_x, key_start_y, key_w, key_h, key_gap, save_btn_rect, switch_to_dashboard)
-                    if should_exit:
-                        return
-                    break
+    # Zoekindex opbouwen terwijl de gebruiker nog niet typt
+    threading.Thread(target=coin_search(coins).index.warm, daemon=True).start()
+    _screen.hide()
+    state = draw_coin_toggle_list(coins, scroll=scroll, search_text=search_text, search_focused=search_focused)
+    try:
+        while True:
+            g = gestures.get()
+            if g.kind == "down":
+                if search_focused:
+                    pressed_key = key_at(g.x, g.y)
+                    if pressed_key is not None:
+                        _screen.press_key(pressed_key)
+                        _screen.record("press", g.t)
+                continue
+            if g.kind == "up":
+                if pressed_key is not None:
+                    _screen.press_key(pressed_key, pressed=False)
+                    pressed_key = None
+                continue
+            if g.kind == "long_press" and search_focused and key_at(g.x, g.y) == "<":
+                search_text, scroll = "", 0
+            elif g.kind in ("tap", "long_press"):
+                # Een trage tap (long-press elders) telt gewoon als tap
+                should_exit, scroll, search_text, search_focused = handle_setup_touch(
+                    g.x, g.y, coins, scroll, search_text, search_focused, *state, switch_to_dashboard)
+                if should_exit:
+                    _screen.hide()
+                    print(f"[SETUP] Touch-to-pixel latency: {_screen.report()}")
+                    return
+            elif g.kind == "swipe":
+                if abs(g.dy) <= abs(g.dx):
+                    continue
+                # Vinger omhoog = verder in de lijst, één rij per ROW_H pixels
+                rows = -int(g.dy / ROW_H) or (-1 if g.dy > 0 else 1)
+                matches = state[0]
+                scroll = max(0, scroll + rows)
+                while scroll > 0 and not matches[scroll+ROWS-1:scroll+ROWS]:
+                    scroll -= 1
+            state = draw_coin_toggle_list(coins, scroll=scroll, search_text=search_text, search_focused=search_focused)
+            _screen.record("tap", g.t)
+    finally:
+        gestures.close()
 
 def save_settings(coins):
+    global _search
+    if _search is not None and _search.coins is coins:
+        # Aangezette catalogus-coins toevoegen aan coins.json
+        coins.extend(_search.adopted())
+        _search = None
     with open("coins.json", "w") as f:
         json.dump({"coins": coins}, f, indent=2)
     print("Coins settings saved.")
@@ -0,0 +1,96 @@
+# snapshot.py
+"""
+Persistente prijs-snapshot voor een warme start en offline gebruik.
+De cache wordt compact (JSON zonder whitespace) met timestamps opgeslagen,
+atomair (tmp-bestand + fsync + rename) en gedebounced, zodat de SD-kaart
+niet bij elke prijs-update beschreven wordt.
+"""
+
+import json
+import os
+import threading
+import time
+
+from fx import fx_table
+from price import restore_prices, snapshot_prices
+
+SNAPSHOT_FILE = "price_snapshot.json"
+SNAPSHOT_VERSION = 1
+MIN_WRITE_INTERVAL = 300
+
+def save_snapshot(path=SNAPSHOT_FILE):
+    """Schrijf de huidige cache atomair weg. Geeft het aantal prijzen terug."""
+    entries = snapshot_prices()
+    data = {"v": SNAPSHOT_VERSION, "saved": round(time.time(), 1),
+            "prices": {i: [p, round(ts, 1)] for i, (p, ts) in entries.items()},
+            # Koersen mee: zonder CoinGecko na een reboot kan Binance (USDT) toch omgerekend worden
+            "fx": fx_table.entries()}
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, separators=(",", ":"))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return len(entries)
+
+def load_snapshot(path=SNAPSHOT_FILE):
+    """
+    Laad de snapshot (als die er is) in de prijs-cache vóór het eerste frame.
+    Geeft het aantal geladen prijzen terug; een kapot bestand wordt genegeerd.
+    """
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+        if data.get("v") != SNAPSHOT_VERSION:
+            return 0
+        entries = {i: (float(p), float(ts)) for i, (p, ts) in data.get("prices", {}).items()}
+        rates = {c: (float(r), float(ts)) for c, (r, ts) in data.get("fx", {}).items()}
+    except FileNotFoundError:
+        return 0
+    except (ValueError, TypeError, AttributeError) as e:
+        print(f"[WARNING] Ignoring unreadable price snapshot {path}: {e}")
+        return 0
+    fx_table.restore(rates)
+    restore_prices(entries)
+    return len(entries)
+
+class SnapshotWriter:
+    """
+    Debounced schrijver: mark_dirty() bij elke prijswijziging (bv. als
+    price-listener), wegschrijven hooguit één keer per min_interval.
+    flush() schrijft direct (bij afsluiten).
+    """
+
+    def __init__(self, path=SNAPSHOT_FILE, min_interval=MIN_WRITE_INTERVAL):
+        self.path = path
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._timer = None
+        self._last_write = 0.0
+        self.writes = 0
+
+    def mark_dirty(self, *_args):
+        with self._lock:
+            self._dirty = True
+            if self._timer is not None:
+                return
+            delay = max(0.0, self._last_write + self.min_interval - time.time())
+            self._timer = threading.Timer(delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._dirty:
+                return
+            self._dirty = False
+            self._last_write = time.time()
+        try:
+            save_snapshot(self.path)
+            self.writes += 1
+        except OSError as e:
+            print(f"[WARNING] Could not write price snapshot: {e}")
@@ -0,0 +1,67 @@
+# sparkline.py
+"""
+Incrementele sparkline als alpha-mask. Bij één nieuw punt binnen de huidige
+schaal schuift de mask een stap op en wordt alleen het nieuwe lijnstuk
+getekend; alleen bij een andere coin of een punt buiten de schaal volgt
+een volledige hertekening.
+"""
+
+from PIL import Image, ImageDraw
+
+class Sparkline:
+    def __init__(self, width=160, height=30, step=2):
+        self.width = width
+        self.height = height
+        self.step = step
+        self.points = width // step + 1
+        self.mask = Image.new("L", (width, height), 0)
+        self.key = None        # (coin-id, history.total) van de huidige mask
+        self.lo = self.hi = None
+        self.last_y = None
+        self.stats = {"full": 0, "incremental": 0}
+
+    def _y(self, price):
+        span = self.hi - self.lo
+        if span <= 0:
+            return self.height // 2
+        return int(round((self.hi - price) / span * (self.height - 3))) + 1
+
+    def _full(self, values):
+        self.mask = Image.new("L", (self.width, self.height), 0)
+        self.lo, self.hi = min(values), max(values)
+        draw = ImageDraw.Draw(self.mask)
+        x0 = self.width - 1 - (len(values) - 1) * self.step
+        coords = [(x0 + i * self.step, self._y(v)) for i, v in enumerate(values)]
+        if len(coords) > 1:
+            draw.line(coords, fill=255, width=2)
+        self.last_y = coords[-1][1]
+        self.stats["full"] += 1
+
+    def _shift_and_append(self, price):
+        # Schuif een stap naar links; crop buiten de rand vult met 0
+        self.mask = self.mask.crop((self.step, 0, self.width + self.step, self.height))
+        y = self._y(price)
+        x1 = self.width - 1
+        ImageDraw.Draw(self.mask).line([(x1 - self.step, self.last_y), (x1, y)], fill=255, width=2)
+        self.last_y = y
+        self.stats["incremental"] += 1
+
+    def update(self, coin_id, total, values):
+        """
+        Werk de mask bij. total = aantal updates ooit (PriceHistory.total),
+        values = laatste self.points prijzen. Geeft True als de mask
+        veranderd is.
+        """
+        key = (coin_id, total)
+        if key == self.key:
+            return False
+        if len(values) < 2:
+            self.mask = Image.new("L", (self.width, self.height), 0)
+            self.last_y = None
+        elif (self.key is not None and self.key[0] == coin_id and total == self.key[1] + 1
+                and self.lo <= values[-1] <= self.hi and self.last_y is not None):
+            self._shift_and_append(values[-1])
+        else:
+            self._full(values)
+        self.key = key
+        return True
@@ -0,0 +1,132 @@
+# startup.py
+"""
+Snel opstarten: eerst zo snel mogelijk een beeld op het LCD (het laatst
+getoonde dashboard-frame als ruwe RGB565, anders een splash), dan de state
+(snapshot, coins.json, kalibratie, fonts) parallel laden en pas daarna het
+eerste echte frame renderen. StartupTrace houdt per fase bij waar de tijd
+zit (main.py --startup-trace).
+"""
+
+import os
+import threading
+import time
+
+LAST_FRAME_FILE = "last_frame.rgb565"
+SPLASH_IMAGE = os.path.join("backgrounds", "btc-bg.png")
+
+def _process_start():
+    """Starttijd van dit proces (time.time()-basis) uit /proc, of None."""
+    try:
+        with open("/proc/self/stat") as f:
+            # Veld 22 (starttime, in clock ticks na boot); de naam kan spaties bevatten
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return time.time() - uptime + start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return None
+
+class StartupTrace:
+    """
+    Fasen vanaf de start van het proces (dus inclusief interpreter en
+    imports). mark(naam) sluit de fase af die sinds de vorige mark liep;
+    taken uit run_parallel() komen er ingesprongen onder te staan.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.origin = _process_start() or time.time()
+        self._last = self.origin
+        self._lock = threading.Lock()
+        self.phases = []  # (naam, start, duur) in seconden t.o.v. origin
+
+    def mark(self, name):
+        now = time.time()
+        with self._lock:
+            self.phases.append((name, self._last - self.origin, now - self._last))
+            self._last = now
+
+    def task(self, name, start, end):
+        with self._lock:
+            self.phases.append(("  " + name, start - self.origin, end - start))
+
+    def total(self):
+        return self._last - self.origin
+
+    def report(self):
+        if not self.enabled:
+            return
+        print(f"[STARTUP] {'phase':<28} {'start ms':>9} {'duration ms':>12}")
+        for name, start, duration in self.phases:
+            print(f"[STARTUP] {name:<28} {start * 1000:9.1f} {duration * 1000:12.1f}")
+        print(f"[STARTUP] first frame after {self.total() * 1000:.1f} ms")
+
+def run_parallel(tasks, trace=None):
+    """
+    {naam: callable} tegelijk uitvoeren op eigen threads en op allemaal
+    wachten. Geeft {naam: resultaat}; de eerste fout wordt hier opnieuw
+    opgegooid.
+    """
+    results = {}
+    errors = {}
+
+    def run(name, func):
+        t0 = time.time()
+        try:
+            results[name] = func()
+        except Exception as e:
+            errors[name] = e
+        finally:
+            if trace is not None:
+                trace.task(name, t0, time.time())
+
+    threads = [threading.Thread(target=run, args=(name, func), name=f"startup-{name}", daemon=True)
+               for name, func in tasks.items()]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    for name in tasks:
+        if name in errors:
+            raise errors[name]
+    return results
+
+def show_splash(display, path=LAST_FRAME_FILE):
+    """
+    Eerste beeld zonder fonts of rendering: het opgeslagen frame (één read,
+    één write), anders de standaard-achtergrond, anders zwart.
+    Geeft de bron terug: "last_frame", "splash" of "blank".
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read(display.size + 1)
+        if len(data) == display.size:
+            display.write_frame(data, diff=False)
+            return "last_frame"
+        print(f"[WARNING] Ignoring {path}: size does not match the display")
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        print(f"[WARNING] Cannot read {path}: {e}")
+    try:
+        from PIL import Image
+        from rgb565 import encode_rgb565
+        image = Image.open(SPLASH_IMAGE).convert("RGB").resize((display.width, display.height))
+    except OSError:
+        display.fill(0)
+        return "blank"
+    display.write_frame(encode_rgb565(image, display.rotate), diff=False)
+    return "splash"
+
+def save_last_frame(display, path=LAST_FRAME_FILE):
+    """Huidige display-inhoud atomair bewaren voor de volgende start."""
+    data = bytes(display.shadow)
+    tmp = f"{path}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"[WARNING] Cannot save last frame to {path}: {e}")
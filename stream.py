@@ -0,0 +1,184 @@
+# stream.py
+"""
+Optionele streaming-modus: abonneert op Binance miniTicker-streams voor de
+ingeschakelde coins en schrijft in dezelfde cache als price_updater.
+Ticks worden samengevoegd tot maximaal één cache-update per display-interval,
+bij verbindingsverlies wordt met backoff opnieuw verbonden en neemt polling
+het over tot de stream weer loopt.
+"""
+
+import json
+import socket
+import threading
+import time
+
+from wsclient import connect
+
+BINANCE_WS_URL = "wss://stream.binance.com:9443"
+
+class PriceStream:
+    """
+    Gebruik: stream = PriceStream(coins, set_price).start()
+    price_updater krijgt stream.covered_ids en stream.lost mee, zodat
+    gestreamde coins niet ook nog gepolld worden zolang de stream gezond is.
+    coins mag ook een callable zijn (bv. CoinRegistry.enabled); refresh()
+    vraagt de lijst dan opnieuw op en abonneert opnieuw als de symbols
+    veranderd zijn.
+    """
+
+    BACKOFF_BASE = 1.0
+    BACKOFF_MAX = 60.0
+    # Zonder berichten langer dan dit: stream als dood beschouwen
+    STALE_AFTER = 30.0
+
+    def __init__(self, coins, set_price, url=BINANCE_WS_URL, display_interval=1.0):
+        self.set_price = set_price
+        self.url = url.rstrip("/")
+        self.display_interval = display_interval
+        self._get_coins = coins if callable(coins) else (lambda: coins)
+        # binance symbol -> coingecko id
+        self.symbols = self._symbols()
+        # Gezet door refresh(): maakt een wachtende stream-thread wakker
+        self._changed = threading.Event()
+        self.healthy = threading.Event()
+        # Wordt gezet als de stream wegvalt: price_updater pollt dan meteen
+        self.lost = threading.Event()
+        self._pending = {}
+        self._last_tick = {}
+        self._lock = threading.Lock()
+        self._running = False
+        self._ws = None
+        self.stats = {"ticks": 0, "flushes": 0, "reconnects": 0, "resubscribes": 0}
+
+    def _symbols(self):
+        return {c["binance_symbol"]: c.get("coingecko_id", c.get("id"))
+                for c in self._get_coins() if c.get("binance_symbol")}
+
+    def refresh(self):
+        """
+        Coin-lijst opnieuw opvragen (bv. na een wijziging in de setup).
+        Geeft True als de symbols veranderden; de stream abonneert dan
+        opnieuw, coins die eruit gingen worden meteen weer gepolld.
+        """
+        symbols = self._symbols()
+        if symbols == self.symbols:
+            return False
+        with self._lock:
+            self.symbols = symbols
+            ids = set(symbols.values())
+            self._pending = {i: p for i, p in self._pending.items() if i in ids}
+            self._last_tick = {i: t for i, t in self._last_tick.items() if i in ids}
+        self._changed.set()
+        self._drop_connection()
+        return True
+
+    def _drop_connection(self):
+        # shutdown() maakt een recv() op de stream-thread direct wakker
+        ws = self._ws
+        if ws is not None:
+            try:
+                ws.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def stream_url(self, symbols=None):
+        streams = "/".join(f"{s.lower()}@miniTicker" for s in sorted(self.symbols if symbols is None else symbols))
+        return f"{self.url}/stream?streams={streams}"
+
+    def covered_ids(self):
+        """
+        Coingecko-id's die nu live binnenkomen: stream gezond én recent een
+        tick gehad (symbols die Binance niet kent blijven dus gepolld).
+        """
+        if not self.healthy.is_set():
+            return set()
+        now = time.time()
+        with self._lock:
+            return {i for i, t in self._last_tick.items() if now - t < self.STALE_AFTER}
+
+    def start(self):
+        self._running = True
+        threading.Thread(target=self._run, name="stream", daemon=True).start()
+        threading.Thread(target=self._flusher, name="stream-flush", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._running = False
+        self.healthy.clear()
+        self._changed.set()
+        ws = self._ws
+        if ws is not None:
+            ws.close()
+
+    def handle_message(self, message):
+        """Eén stream-bericht verwerken; alleen de laatste prijs per coin telt."""
+        data = json.loads(message)
+        data = data.get("data", data)
+        symbol = data.get("s")
+        price = data.get("c") or data.get("p")
+        coingecko_id = self.symbols.get(symbol)
+        if coingecko_id is None or price is None:
+            return
+        with self._lock:
+            self._pending[coingecko_id] = float(price)
+            self._last_tick[coingecko_id] = time.time()
+        self.stats["ticks"] += 1
+
+    def flush(self):
+        """Samengevoegde ticks naar de cache (hooguit één update per coin)."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for coingecko_id, price in pending.items():
+            self.set_price(coingecko_id, price)
+        if pending:
+            self.stats["flushes"] += 1
+        return len(pending)
+
+    def _flusher(self):
+        while self._running:
+            time.sleep(self.display_interval)
+            self.flush()
+
+    def _run(self):
+        failures = 0
+        while self._running:
+            self._changed.clear()
+            # refresh() zet steeds een nieuwe dict: "is not" betekent andere coins
+            subscribed = self.symbols
+            if not subscribed:
+                # Niets te streamen: wachten tot refresh() symbols oplevert
+                self._changed.wait()
+                continue
+            try:
+                self._ws = connect(self.stream_url(subscribed))
+                self._ws.sock.settimeout(self.STALE_AFTER)
+                print(f"[STREAM] Connected, streaming {len(subscribed)} coins")
+                while self._running and self.symbols is subscribed:
+                    message = self._ws.recv()
+                    if message is None:
+                        break
+                    self.handle_message(message)
+                    if not self.healthy.is_set():
+                        self.healthy.set()
+                        failures = 0
+            except Exception as e:
+                if self._running and self.symbols is subscribed:
+                    print(f"[WARNING] Price stream failed: {e}")
+            finally:
+                if self._ws is not None:
+                    self._ws.close()
+                    self._ws = None
+            if self._running and self.symbols is not subscribed:
+                # Andere coins: direct opnieuw verbinden, geen backoff of polling-fallback
+                print(f"[STREAM] Coins changed, resubscribing to {len(self.symbols)} coins")
+                self.stats["resubscribes"] += 1
+                continue
+            if self.healthy.is_set():
+                print("[STREAM] Lost stream, polling takes over")
+                self.healthy.clear()
+                self.lost.set()
+            if not self._running:
+                return
+            failures += 1
+            self.stats["reconnects"] += 1
+            time.sleep(min(self.BACKOFF_MAX, self.BACKOFF_BASE * (2 ** (failures - 1))))
@@ -1,62 +1,349 @@
 # touchscreen.py
 """
-Touchscreen event handling & double-tap detectie.
+Touchscreen event handling: één input-thread voor /dev/input/event0.
+De thread wacht met select() op het device, voert ruwe events aan een
+gesture-recognizer (tap, double-tap, long-press, swipe) en levert de
+gestures af bij de schermen die erop geabonneerd zijn. Ruwe event-streams
+kunnen opgenomen en afgespeeld worden, zodat gestures zonder hardware te
+testen zijn.
 """
 
-import evdev
+import json
+import os
+import queue
+import select
+import threading
 import time
+from collections import deque
 
-# Importeer scale_touch vanuit calibration
-from calibration import scale_touch
+from layout import get_layout
+from tracing import span
 
 TOUCH_DEVICE = '/dev/input/event0'
 
-def is_in_clock_area(x, y, width=480):
-    """Check of een coördinaat in het klokgebied valt (rechtsboven)."""
-    return x >= width - 52  # 480-428 = 52px breed klokgebied
-
-def double_tap_detector(trigger_callback, width=480):
-    """
-    Detecteert double-tap op het klokgebied en roept de callback aan.
-    """
-    device = evdev.InputDevice(TOUCH_DEVICE)
-    last_tap_time = 0
-    DOUBLE_TAP_MAX_INTERVAL = 0.4  # seconden
-    raw_x, raw_y = 0, 0
-    for event in device.read_loop():
-        if event.type == evdev.ecodes.EV_ABS:
-            if event.code == evdev.ecodes.ABS_X:
-                raw_x = event.value
-            elif event.code == evdev.ecodes.ABS_Y:
-                raw_y = event.value
-        elif event.type == evdev.ecodes.EV_KEY and event.code == evdev.ecodes.BTN_TOUCH and event.value == 1:
-            x, y = scale_touch(raw_x, raw_y)
-            now = time.time()
-            if is_in_clock_area(x, y, width):
-                if last_tap_time and (now - last_tap_time < DOUBLE_TAP_MAX_INTERVAL):
-                    print("[TOUCH] Double tap detected in clock area!")
-                    trigger_callback()
-                    last_tap_time = 0
-                else:
-                    last_tap_time = now
-
-def touch_event_reader(callback):
-    """
-    Algemeen event-reader. Roept de callback aan bij elke 'finger up' met geschaalde x, y.
-    """
-    device = evdev.InputDevice(TOUCH_DEVICE)
-    raw_x, raw_y = 0, 0
-    finger_down = False
-    for event in device.read_loop():
-        if event.type == evdev.ecodes.EV_ABS:
-            if event.code == evdev.ecodes.ABS_X:
-                raw_x = event.value
-            elif event.code == evdev.ecodes.ABS_Y:
-                raw_y = event.value
-        elif event.type == evdev.ecodes.EV_KEY and event.code == evdev.ecodes.BTN_TOUCH:
-            if event.value == 1:
-                finger_down = True
-            elif event.value == 0 and finger_down:
-                finger_down = False
-                x, y = scale_touch(raw_x, raw_y)
-                callback(x, y)
+# Linux input-ABI (zoals evdev.ecodes), zodat replay zonder evdev werkt
+EV_SYN, EV_KEY, EV_ABS = 0x00, 0x01, 0x03
+ABS_X, ABS_Y = 0x00, 0x01
+BTN_TOUCH = 0x14a
+
+def is_in_clock_area(x, y, width=480, height=320):
+    """Check of een coördinaat in het klokgebied valt (strook langs de rechterrand)."""
+    return get_layout(width, height).in_clock_area(x, y)
+
+class Gesture:
+    """
+    kind: "down", "up", "tap", "double_tap", "long_press" of "swipe".
+    t is de kernel-timestamp van het event; x/y zijn schermcoördinaten
+    (gelijk aan raw zolang er geen scale is, bv. tijdens kalibratie).
+    """
+
+    def __init__(self, kind, t, pos, raw=None, duration=0.0, dx=0, dy=0):
+        self.kind = kind
+        self.t = t
+        self.x, self.y = pos
+        self.raw = raw if raw is not None else pos
+        self.duration = duration
+        self.dx = dx
+        self.dy = dy
+
+    def __repr__(self):
+        extra = f" d=({self.dx},{self.dy})" if self.kind == "swipe" else ""
+        return f"<Gesture {self.kind} ({self.x},{self.y}) t={self.t:.3f}{extra}>"
+
+class JitterFilter:
+    """
+    Goedkoop filter tegen jitter van het resistieve paneel: mediaan van de
+    laatste 3 ruwe samples per as (weg met uitschieters, bv. bij loslaten),
+    daarna hysteresis in schermpixels (kleine trillingen laten de positie staan).
+    """
+
+    WINDOW = 3
+    HYSTERESIS = 3
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self._xs = deque(maxlen=self.WINDOW)
+        self._ys = deque(maxlen=self.WINDOW)
+        self._out = None
+
+    def raw(self, x, y):
+        self._xs.append(x)
+        self._ys.append(y)
+        return sorted(self._xs)[len(self._xs) // 2], sorted(self._ys)[len(self._ys) // 2]
+
+    def settle(self, pos):
+        out = self._out
+        if out is not None and abs(pos[0] - out[0]) < self.HYSTERESIS and abs(pos[1] - out[1]) < self.HYSTERESIS:
+            return out
+        self._out = pos
+        return pos
+
+class GestureRecognizer:
+    """
+    Pure state machine: feed() met ruwe events (met hun timestamp), poll()
+    voor tijd-gestuurde gestures (long-press). Afstanden worden gemeten na
+    scale(), dus in schermpixels.
+    """
+
+    LONG_PRESS = 0.8
+    DOUBLE_TAP_INTERVAL = 0.4
+    DOUBLE_TAP_DISTANCE = 40
+    SWIPE_MIN = 40
+
+    def __init__(self, scale=None):
+        self.scale = scale
+        self.filter = JitterFilter()
+        self._raw = [0, 0]
+        self._raw_f = (0, 0)      # gefilterde ruwe positie
+        self._touch = None        # BTN_TOUCH-waarde van het lopende frame
+        self._moved = False       # nieuwe ABS-waarden in het lopende frame
+        self._down = None         # (t, pos) van de lopende aanraking
+        self._pos = None
+        self._long_fired = False
+        self._last_tap = None     # (t, pos)
+
+    def _screen(self):
+        raw = self._raw_f = self.filter.raw(*self._raw)
+        pos = self.scale(*raw) if self.scale is not None else raw
+        return self.filter.settle(pos)
+
+    def next_deadline(self):
+        """Tijdstip waarop poll() een long-press kan opleveren, of None."""
+        if self._down is None or self._long_fired:
+            return None
+        return self._down[0] + self.LONG_PRESS
+
+    def poll(self, now):
+        deadline = self.next_deadline()
+        if deadline is None or now < deadline:
+            return []
+        t0, start = self._down
+        if _distance(start, self._pos) >= self.SWIPE_MIN:
+            return []
+        self._long_fired = True
+        self._last_tap = None
+        return [Gesture("long_press", now, start, duration=now - t0)]
+
+    def feed(self, t, type_, code, value):
+        """Eén ruw event; geeft de gestures terug die het afrondt."""
+        if type_ == EV_ABS:
+            if code == ABS_X:
+                self._raw[0] = value
+                self._moved = True
+            elif code == ABS_Y:
+                self._raw[1] = value
+                self._moved = True
+            return []
+        if type_ == EV_KEY and code == BTN_TOUCH:
+            self._touch = value
+            return []
+        if type_ != EV_SYN:
+            return []
+        # Eén SYN-frame compleet: positie en knopstand horen nu bij elkaar
+        out = self.poll(t)
+        touch, self._touch = self._touch, None
+        moved, self._moved = self._moved, False
+        # Alleen frames met nieuwe coördinaten zijn een sample voor het filter
+        if self._down is not None and moved:
+            self._pos = self._screen()
+        if touch == 1 and self._down is None:
+            self.filter.reset()
+            self._pos = self._screen()
+            self._down = (t, self._pos)
+            self._long_fired = False
+            out.append(Gesture("down", t, self._pos, self._raw_f))
+        elif touch == 0 and self._down is not None:
+            out += self._release(t)
+        return out
+
+    def _release(self, t):
+        t0, start = self._down
+        end = self._pos
+        self._down = None
+        raw = self._raw_f
+        out = [Gesture("up", t, end, raw, duration=t - t0)]
+        if self._long_fired:
+            return out
+        dx, dy = end[0] - start[0], end[1] - start[1]
+        if _distance(start, end) >= self.SWIPE_MIN:
+            self._last_tap = None
+            out.append(Gesture("swipe", t, start, duration=t - t0, dx=dx, dy=dy))
+            return out
+        out.append(Gesture("tap", t, end, raw, duration=t - t0))
+        last = self._last_tap
+        if (last is not None and t - last[0] < self.DOUBLE_TAP_INTERVAL
+                and _distance(last[1], end) < self.DOUBLE_TAP_DISTANCE):
+            out.append(Gesture("double_tap", t, end, raw))
+            self._last_tap = None
+        else:
+            self._last_tap = (t, end)
+        return out
+
+def _distance(a, b):
+    return ((a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2) ** 0.5
+
+class Subscription:
+    """
+    Gestures van de opgegeven soorten (en eventueel alleen waar where(g)
+    waar is). Met callback wordt die op de input-thread aangeroepen (kort
+    houden!); zonder callback komen ze in een queue voor get().
+    """
+
+    def __init__(self, dispatcher, kinds, where=None, callback=None):
+        self.dispatcher = dispatcher
+        self.kinds = frozenset(kinds)
+        self.where = where
+        self.callback = callback
+        self.queue = queue.Queue() if callback is None else None
+
+    def deliver(self, gesture):
+        if gesture.kind not in self.kinds:
+            return
+        if self.where is not None and not self.where(gesture):
+            return
+        if self.callback is not None:
+            self.callback(gesture)
+        else:
+            self.queue.put(gesture)
+
+    def get(self, timeout=None):
+        """Volgende gesture, of None na timeout."""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.dispatcher.unsubscribe(self)
+
+class InputDispatcher:
+    """
+    Eén input-thread per proces (zie get_dispatcher()). Schermen doen
+    subscribe() in plaats van zelf het device te openen.
+    """
+
+    def __init__(self, path=TOUCH_DEVICE, scale=None):
+        self.path = path
+        self.recognizer = GestureRecognizer(scale)
+        self._subs = []
+        self._lock = threading.Lock()
+        self._recording = None
+        self._running = False
+        self._thread = None
+        self.stats = {"events": 0, "gestures": 0}
+
+    @property
+    def scale(self):
+        return self.recognizer.scale
+
+    @scale.setter
+    def scale(self, scale):
+        self.recognizer.scale = scale
+
+    def subscribe(self, kinds, where=None, callback=None):
+        sub = Subscription(self, kinds, where, callback)
+        with self._lock:
+            self._subs.append(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            if sub in self._subs:
+                self._subs.remove(sub)
+
+    def record(self, path):
+        """Ruwe events vanaf nu als JSON-regels [t, type, code, value] wegschrijven."""
+        self._recording = open(path, "a", buffering=1)
+        print(f"[INPUT] Recording raw events to {path}")
+
+    def stop_recording(self):
+        f, self._recording = self._recording, None
+        if f is not None:
+            f.close()
+
+    def feed(self, t, type_, code, value):
+        """Eén ruw event verwerken (vanuit de input-thread of een replay)."""
+        self.stats["events"] += 1
+        f = self._recording
+        if f is not None:
+            f.write(json.dumps([round(t, 6), type_, code, value]) + "\n")
+        self._dispatch(self.recognizer.feed(t, type_, code, value))
+
+    def _dispatch(self, gestures):
+        if not gestures:
+            return
+        with self._lock:
+            subs = list(self._subs)
+        for gesture in gestures:
+            self.stats["gestures"] += 1
+            with span(f"touch {gesture.kind}", "input", x=gesture.x, y=gesture.y):
+                for sub in subs:
+                    sub.deliver(gesture)
+
+    def replay(self, path, realtime=False):
+        """
+        Speel een opgenomen event-log af door dezelfde recognizer. Long-press
+        timers lopen mee op de timestamps uit het log (geen hardware nodig).
+        """
+        prev = None
+        with open(path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                t, type_, code, value = json.loads(line)
+                if prev is not None and realtime:
+                    time.sleep(max(0.0, t - prev))
+                prev = t
+                self._dispatch(self.recognizer.poll(t))
+                self.feed(t, type_, code, value)
+        if prev is not None:
+            self._dispatch(self.recognizer.poll(prev + GestureRecognizer.LONG_PRESS))
+
+    def start(self):
+        """Start de input-thread (idempotent)."""
+        if self._running:
+            return self
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="input", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+
+    def _run(self):
+        import evdev
+        device = evdev.InputDevice(self.path)
+        print(f"[INPUT] Reading {self.path} ({device.name})")
+        while self._running:
+            deadline = self.recognizer.next_deadline()
+            timeout = None if deadline is None else max(0.0, deadline - time.time())
+            # Wakker op events óf op de long-press deadline (anders hooguit 1x/s voor stop())
+            readable, _, _ = select.select([device.fd], [], [], timeout if timeout is not None else 1.0)
+            if readable:
+                try:
+                    for event in device.read():
+                        self.feed(event.timestamp(), event.type, event.code, event.value)
+                except BlockingIOError:
+                    pass
+            self._dispatch(self.recognizer.poll(time.time()))
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+def get_dispatcher():
+    """Gedeelde InputDispatcher (het device wordt maar één keer geopend)."""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = InputDispatcher(os.environ.get("DASHBOARD_TOUCH_DEVICE", TOUCH_DEVICE))
+        return _dispatcher
+
+if __name__ == "__main__":
+    import sys
+    # python3 touchscreen.py events.jsonl  -> gestures uit een opgenomen log tonen
+    dispatcher = InputDispatcher()
+    dispatcher.subscribe({"tap", "double_tap", "long_press", "swipe"}, callback=print)
+    dispatcher.replay(sys.argv[1])
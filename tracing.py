@@ -0,0 +1,136 @@
+# tracing.py
+"""
+Span-tracing voor één run (main.py --trace trace.json): begin/eind van
+renders, klok- en coin-updates, prijs-cycli, provider-fetches en touch-
+gestures, per thread. Het resultaat is Chrome trace-event JSON; open het in
+chrome://tracing of https://ui.perfetto.dev om de price-, input- en
+render-threads naast elkaar op een tijdlijn te zien.
+
+Spans gaan in een deque met maxlen: append() is in CPython atomair, dus
+geen lock tussen de threads, en bij een vol buffer vallen de oudste spans
+eraf. Staat tracing uit, dan is span() een gedeelde no-op en kost een
+@traced-functie alleen een extra aanroep.
+"""
+
+import atexit
+import functools
+import json
+import os
+import signal
+import threading
+import time
+from collections import deque
+
+# ~100 bytes per span; ruim genoeg voor uren normaal gebruik
+TRACE_CAPACITY = 100000
+
+enabled = False
+_events = deque(maxlen=TRACE_CAPACITY)
+_origin = time.perf_counter()
+
+def record(name, start, end, cat="dashboard", args=None):
+    """Eén afgesloten span (tijden van time.perf_counter()) op de huidige thread."""
+    if not enabled:
+        return
+    thread = threading.current_thread()
+    _events.append((name, cat, thread.ident, thread.name, start, end, args))
+
+class _Span:
+    __slots__ = ("name", "cat", "args", "start")
+
+    def __init__(self, name, cat, args):
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.name, self.start, time.perf_counter(), self.cat, self.args)
+        return False
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+def span(name, cat="dashboard", **args):
+    """with span("rotate"): ... — meet het blok als één span."""
+    if not enabled:
+        return _NULL_SPAN
+    return _Span(name, cat, args or None)
+
+def traced(name=None, cat="dashboard"):
+    """Decorator: elke aanroep van de functie wordt een span."""
+    def decorate(func):
+        label = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(label, start, time.perf_counter(), cat)
+        return wrapper
+    return decorate
+
+def trace_events():
+    """De spans als Chrome trace-events (ph "X", tijden in microseconden)."""
+    events = list(_events)  # Kopie in één C-aanroep: writers kunnen gewoon doorgaan
+    pid = os.getpid()
+    out = [{"ph": "M", "name": "process_name", "pid": pid, "tid": 0, "args": {"name": "btc-lcd-dashboard"}}]
+    # Een ident kan hergebruikt worden als een thread stopt (bv. de startup-threads)
+    tids = {}
+    for name, cat, ident, thread_name, start, end, args in events:
+        tid = tids.get((ident, thread_name))
+        if tid is None:
+            tid = tids[(ident, thread_name)] = len(tids) + 1
+            out.append({"ph": "M", "name": "thread_name", "pid": pid, "tid": tid, "args": {"name": thread_name}})
+        event = {"ph": "X", "name": name, "cat": cat, "pid": pid, "tid": tid,
+                 "ts": round((start - _origin) * 1e6, 1), "dur": round((end - start) * 1e6, 1)}
+        if args:
+            event["args"] = args
+        out.append(event)
+    return out
+
+def dump(path):
+    """Schrijf de trace (atomair: tmp + replace). Geeft het aantal spans terug."""
+    events = trace_events()
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+    os.replace(tmp, path)
+    return sum(1 for e in events if e["ph"] == "X")
+
+def start(path, dump_signal=signal.SIGUSR1):
+    """
+    Zet tracing aan; de trace wordt bij het afsluiten naar path geschreven,
+    en tussendoor bij elke dump_signal (kill -USR1 <pid>).
+    """
+    global enabled
+    enabled = True
+
+    def write(*_):
+        try:
+            n = dump(path)
+            print(f"[TRACE] Wrote {n} spans to {path}")
+        except OSError as e:
+            print(f"[WARNING] Could not write trace {path}: {e}")
+
+    atexit.register(write)
+    when = "on exit"
+    if dump_signal is not None:
+        signal.signal(dump_signal, write)
+        when += f" or {signal.Signals(dump_signal).name}"
+    print(f"[TRACE] Recording spans (up to {TRACE_CAPACITY}), written to {path} {when}")
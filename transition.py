@@ -0,0 +1,145 @@
+# transition.py
+"""
+Overgangen tussen twee dashboard-frames bij de coin-rotatie.
+Werkt direct op de RGB565-data (framebuffer-oriëntatie): beide frames worden
+zonder kopie als 2-kanaals "LA"-image gezien (lo/hi byte per pixel), zodat
+Pillow ze in C kan schuiven en mengen zonder ooit te decoderen of opnieuw
+te encoden.
+
+    slide     nieuw frame schuift van rechts naar binnen (rot0 en rot180)
+    dissolve  ordered-dither overgang: per frame een groter deel van de
+              pixels uit het nieuwe frame (Bayer-drempel als mask)
+
+Frames worden tegen een deadline gepland: loopt er een frame uit, dan
+wordt er overgeslagen in plaats van de animatie te rekken.
+"""
+
+import time
+
+from PIL import Image
+
+from tracing import traced
+
+MODES = ("slide", "dissolve")
+
+# 8x8 Bayer-matrix: drempels 0..63 voor de dissolve-mask
+_BAYER8 = [
+    [0, 32, 8, 40, 2, 34, 10, 42],
+    [48, 16, 56, 24, 50, 18, 58, 26],
+    [12, 44, 4, 36, 14, 46, 6, 38],
+    [60, 28, 52, 20, 62, 30, 54, 22],
+    [3, 35, 11, 43, 1, 33, 9, 41],
+    [51, 19, 59, 27, 49, 17, 57, 25],
+    [15, 47, 7, 39, 13, 45, 5, 37],
+    [63, 31, 55, 23, 61, 29, 53, 21],
+]
+
+def _as_pixels(data, width, height):
+    """RGB565-bytes als LA-image: één 'pixel' = lo+hi byte, dus blijft heel."""
+    return Image.frombuffer("LA", (width, height), data, "raw", "LA", 0, 1)
+
+class TransitionEngine:
+    """
+    run(old, new) speelt een overgang af op display (een framebuffer.Display)
+    en eindigt altijd met precies het nieuwe frame.
+    """
+
+    def __init__(self, display, width=480, height=320, mode="slide", duration=0.6, fps=25):
+        if mode not in MODES:
+            raise ValueError(f"unknown transition mode {mode!r}, expected one of {MODES}")
+        self.display = display
+        self.width = width
+        self.height = height
+        self.mode = mode
+        self.duration = duration
+        self.fps = fps
+        self._threshold = None
+        self.stats = {"runs": 0, "frames": 0, "dropped": 0, "last_fps": None,
+                      "last_cost_ms": None, "last_max_ms": None}
+
+    def _bayer(self):
+        if self._threshold is None:
+            tile = Image.new("L", (8, 8))
+            tile.putdata([v * 4 + 2 for row in _BAYER8 for v in row])
+            mask = Image.new("L", (self.width, self.height))
+            for y in range(0, self.height, 8):
+                for x in range(0, self.width, 8):
+                    mask.paste(tile, (x, y))
+            self._threshold = mask
+        return self._threshold
+
+    def compose(self, old, new, progress):
+        """RGB565-frame op progress (0..1) tussen old en new."""
+        w, h = self.width, self.height
+        if progress <= 0.0:
+            return old
+        if progress >= 1.0:
+            return new
+        if self.mode == "slide":
+            # Op het scherm schuift new van rechts in; in een 180° gedraaid
+            # framebuffer (rot180) is dat van links
+            shift = int(w * progress)
+            if shift <= 0:
+                return old
+            frame = Image.new("LA", (w, h))
+            if self.display.rotate:
+                frame.paste(_as_pixels(new, w, h).crop((w - shift, 0, w, h)), (0, 0))
+                frame.paste(_as_pixels(old, w, h).crop((0, 0, w - shift, h)), (shift, 0))
+            else:
+                frame.paste(_as_pixels(old, w, h).crop((shift, 0, w, h)), (0, 0))
+                frame.paste(_as_pixels(new, w, h).crop((0, 0, shift, h)), (w - shift, 0))
+            return frame.tobytes()
+        level = int(progress * 256)
+        mask = self._bayer().point(lambda v: 255 if v < level else 0)
+        return Image.composite(_as_pixels(new, w, h), _as_pixels(old, w, h), mask).tobytes()
+
+    @traced("transition")
+    def run(self, old, new, clock=time.perf_counter, sleep=time.sleep):
+        """
+        Speel de overgang af. Elk frame krijgt een slot van 1/fps; de
+        progress volgt de echte klok, dus een te laat frame betekent dat
+        er slots overgeslagen worden, niet dat de overgang langer duurt.
+        """
+        old = bytes(old)
+        start = clock()
+        end = start + self.duration
+        interval = 1.0 / self.fps
+        slots = max(1, int(round(self.duration * self.fps)))
+        frames = dropped = 0
+        costs = []
+        next_slot = 1
+        while True:
+            now = clock()
+            if now >= end:
+                break
+            slot = int((now - start) / interval) + 1
+            if slot > next_slot:
+                dropped += slot - next_slot
+            next_slot = slot + 1
+            t0 = clock()
+            # Vrijwel elke rij verandert: diffen tegen de schaduw kost hier alleen tijd
+            self.display.write_frame(self.compose(old, new, (now - start) / self.duration), diff=False)
+            costs.append(clock() - t0)
+            frames += 1
+            wake = start + slot * interval
+            if wake >= end:
+                break
+            delay = wake - clock()
+            if delay > 0:
+                sleep(delay)
+        delay = end - clock()
+        if delay > 0:
+            sleep(delay)
+        self.display.write_frame(new, diff=False)
+        frames += 1
+        elapsed = clock() - start
+        self.stats["runs"] += 1
+        self.stats["frames"] += frames
+        self.stats["dropped"] += dropped
+        self.stats["last_fps"] = frames / elapsed if elapsed > 0 else None
+        self.stats["last_cost_ms"] = sum(costs) / len(costs) * 1000 if costs else 0.0
+        self.stats["last_max_ms"] = max(costs) * 1000 if costs else 0.0
+        print(f"[TRANSITION] {self.mode} {elapsed:.2f}s: {frames} frames in {slots} slots, {dropped} dropped, "
+              f"{self.stats['last_fps']:.1f} fps, {self.stats['last_cost_ms']:.1f} ms/frame "
+              f"(max {self.stats['last_max_ms']:.1f})")
+        return self.stats
@@ -0,0 +1,117 @@
+# transport.py
+"""
+HTTP-transport voor de prijs-API's: keep-alive connection pooling via een
+gedeelde requests.Session, begrensde parallelle lookups en latency-log per
+request. Base-URL's zijn instelbaar zodat een lokale stand-in server de
+echte API's kan vervangen.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+COINGECKO_URL = os.environ.get("DASHBOARD_COINGECKO_URL", "https://api.coingecko.com")
+BINANCE_URL = os.environ.get("DASHBOARD_BINANCE_URL", "https://api.binance.com")
+DEFAULT_TIMEOUT = 8
+MAX_PARALLEL = 4
+LATENCY_LOG_SIZE = 256
+
+class HttpTransport:
+    """
+    Eén Session met connection-pool (geen nieuwe TCP+TLS handshake per cyclus)
+    en een kleine thread-pool voor parallelle lookups.
+    """
+
+    def __init__(self, coingecko_url=COINGECKO_URL, binance_url=BINANCE_URL,
+                 timeout=DEFAULT_TIMEOUT, max_parallel=MAX_PARALLEL):
+        self.coingecko_url = coingecko_url.rstrip("/")
+        self.binance_url = binance_url.rstrip("/")
+        self.timeout = timeout
+        self.max_parallel = max_parallel
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max_parallel)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._pool = ThreadPoolExecutor(max_workers=max_parallel, thread_name_prefix="http")
+        self._lock = threading.Lock()
+        # (url, status of foutmelding, latency in seconden)
+        self.latencies = deque(maxlen=LATENCY_LOG_SIZE)
+
+    def close(self):
+        self._pool.shutdown(wait=False)
+        self.session.close()
+
+    def get(self, url, params=None):
+        """GET via de gedeelde session; latency wordt altijd gelogd."""
+        t0 = time.perf_counter()
+        status = "error"
+        try:
+            r = self.session.get(url, params=params, timeout=self.timeout)
+            status = r.status_code
+            return r
+        finally:
+            with self._lock:
+                self.latencies.append((url, status, time.perf_counter() - t0))
+
+    def map(self, fn, items):
+        """fn(item) voor alle items, maximaal max_parallel tegelijk."""
+        return list(self._pool.map(fn, items))
+
+    def binance_ticker_prices(self, symbols):
+        """
+        {symbol: prijs} voor alle symbols. Eerst één multi-symbol request;
+        Binance weigert die helemaal bij één onbekend symbol (HTTP 400), dan
+        per symbol parallel (begrensd) opnieuw. Elke andere fout (429/418
+        rate limit of ban, 5xx) wordt een requests.HTTPError, zodat de
+        provider kan terugschakelen in plaats van N losse requests te sturen.
+        """
+        symbols = list(dict.fromkeys(symbols))
+        if not symbols:
+            return {}
+        r = self.get(f"{self.binance_url}/api/v3/ticker/price",
+                     params={"symbols": json.dumps(symbols, separators=(",", ":"))})
+        if r.ok:
+            return {t["symbol"]: float(t["price"]) for t in r.json()}
+        if r.status_code != 400:
+            r.raise_for_status()
+        if len(symbols) == 1:
+            print(f"[WARNING] Binance does not know {symbols[0]}: {r.text}")
+            return {}
+
+        def single(symbol):
+            rs = self.get(f"{self.binance_url}/api/v3/ticker/price", params={"symbol": symbol})
+            if rs.status_code == 400:
+                print(f"[WARNING] Binance does not know {symbol}: {rs.text}")
+                return symbol, None
+            rs.raise_for_status()
+            return symbol, float(rs.json().get("price", 0))
+
+        return {s: p for s, p in self.map(single, symbols) if p}
+
+    def latency_summary(self):
+        """{host: (aantal, gemiddelde, max)} over de laatste requests."""
+        out = {}
+        with self._lock:
+            entries = list(self.latencies)
+        for url, _status, latency in entries:
+            host = url.split("/")[2] if "//" in url else url
+            n, total, worst = out.get(host, (0, 0.0, 0.0))
+            out[host] = (n + 1, total + latency, max(worst, latency))
+        return {h: (n, total / n, worst) for h, (n, total, worst) in out.items()}
+
+_transport = None
+_transport_lock = threading.Lock()
+
+def get_transport():
+    """Gedeelde transport-instantie (één connection-pool per proces)."""
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            _transport = HttpTransport()
+        return _transport
@@ -16,12 +16,12 @@ def hex_to_rgb(hex_color, fallback=(247,147,26)):
     except:
         return fallback
 
-def clear_framebuffer(framebuffer="/dev/fb1", width=480, height=320):
+def clear_framebuffer(framebuffer=None, width=None, height=None):
     """
     Maakt het framebuffer-scherm zwart/clean.
     """
-    with open(framebuffer, 'wb') as f:
-        f.write(bytearray([0x00, 0x00] * width * height))
+    from framebuffer import get_framebuffer
+    get_framebuffer(framebuffer, width, height).fill(0)
 
 def get_now_and_struct():
     """
@@ -0,0 +1,152 @@
+# wsclient.py
+"""
+Minimale WebSocket-client (RFC 6455) op basis van de standaardbibliotheek,
+genoeg voor exchange ticker-streams: handshake, tekst/binaire frames,
+fragmentatie, ping/pong en close. Geen extra dependency op de Pi.
+"""
+
+import base64
+import hashlib
+import os
+import socket
+import ssl
+import struct
+from urllib.parse import urlparse
+
+GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC11B85"
+
+OP_CONT, OP_TEXT, OP_BINARY, OP_CLOSE, OP_PING, OP_PONG = 0x0, 0x1, 0x2, 0x8, 0x9, 0xA
+
+class WebSocketError(Exception):
+    pass
+
+def accept_key(key):
+    """Sec-WebSocket-Accept voor een Sec-WebSocket-Key."""
+    return base64.b64encode(hashlib.sha1((key + GUID).encode()).digest()).decode()
+
+def encode_frame(opcode, payload, mask=True):
+    """Eén FIN-frame; clients moeten maskeren, servers niet."""
+    if isinstance(payload, str):
+        payload = payload.encode()
+    header = bytearray([0x80 | opcode])
+    n = len(payload)
+    mask_bit = 0x80 if mask else 0
+    if n < 126:
+        header.append(mask_bit | n)
+    elif n < 65536:
+        header.append(mask_bit | 126)
+        header += struct.pack("!H", n)
+    else:
+        header.append(mask_bit | 127)
+        header += struct.pack("!Q", n)
+    if mask:
+        key = os.urandom(4)
+        header += key
+        payload = bytes(b ^ key[i & 3] for i, b in enumerate(payload))
+    return bytes(header) + payload
+
+class FrameReader:
+    """Leest frames van een socket (met eventuele al gebufferde bytes)."""
+
+    def __init__(self, sock, buffered=b""):
+        self.sock = sock
+        self.buf = bytearray(buffered)
+
+    def _read(self, n):
+        while len(self.buf) < n:
+            chunk = self.sock.recv(65536)
+            if not chunk:
+                raise WebSocketError("connection closed")
+            self.buf += chunk
+        data = bytes(self.buf[:n])
+        del self.buf[:n]
+        return data
+
+    def read_frame(self):
+        """(fin, opcode, payload)"""
+        b0, b1 = self._read(2)
+        n = b1 & 0x7F
+        if n == 126:
+            n = struct.unpack("!H", self._read(2))[0]
+        elif n == 127:
+            n = struct.unpack("!Q", self._read(8))[0]
+        key = self._read(4) if b1 & 0x80 else None
+        payload = self._read(n)
+        if key:
+            payload = bytes(b ^ key[i & 3] for i, b in enumerate(payload))
+        return bool(b0 & 0x80), b0 & 0x0F, payload
+
+class WebSocket:
+    def __init__(self, sock, buffered=b""):
+        self.sock = sock
+        self.reader = FrameReader(sock, buffered)
+
+    def send(self, message):
+        opcode = OP_TEXT if isinstance(message, str) else OP_BINARY
+        self.sock.sendall(encode_frame(opcode, message))
+
+    def recv(self):
+        """Volgende bericht (str of bytes); None als de server netjes sloot."""
+        parts = []
+        msg_opcode = None
+        while True:
+            fin, opcode, payload = self.reader.read_frame()
+            if opcode == OP_PING:
+                self.sock.sendall(encode_frame(OP_PONG, payload))
+                continue
+            if opcode == OP_PONG:
+                continue
+            if opcode == OP_CLOSE:
+                try:
+                    self.sock.sendall(encode_frame(OP_CLOSE, payload[:2]))
+                except OSError:
+                    pass
+                return None
+            if opcode != OP_CONT:
+                msg_opcode = opcode
+            parts.append(payload)
+            if fin:
+                data = b"".join(parts)
+                return data.decode() if msg_opcode == OP_TEXT else data
+
+    def close(self):
+        try:
+            self.sock.sendall(encode_frame(OP_CLOSE, b"\x03\xe8"))
+        except OSError:
+            pass
+        self.sock.close()
+
+def connect(url, timeout=10):
+    """Open een ws:// of wss:// verbinding en doe de handshake."""
+    u = urlparse(url)
+    secure = u.scheme == "wss"
+    port = u.port or (443 if secure else 80)
+    sock = socket.create_connection((u.hostname, port), timeout=timeout)
+    if secure:
+        sock = ssl.create_default_context().wrap_socket(sock, server_hostname=u.hostname)
+    key = base64.b64encode(os.urandom(16)).decode()
+    path = (u.path or "/") + (f"?{u.query}" if u.query else "")
+    request = (f"GET {path} HTTP/1.1\r\n"
+               f"Host: {u.hostname}:{port}\r\n"
+               "Upgrade: websocket\r\n"
+               "Connection: Upgrade\r\n"
+               f"Sec-WebSocket-Key: {key}\r\n"
+               "Sec-WebSocket-Version: 13\r\n\r\n")
+    sock.sendall(request.encode())
+    response = b""
+    while b"\r\n\r\n" not in response:
+        chunk = sock.recv(4096)
+        if not chunk:
+            sock.close()
+            raise WebSocketError("handshake failed: connection closed")
+        response += chunk
+    head, _, rest = response.partition(b"\r\n\r\n")
+    lines = head.decode(errors="replace").split("\r\n")
+    if " 101 " not in lines[0] + " ":
+        sock.close()
+        raise WebSocketError(f"handshake failed: {lines[0]}")
+    headers = {k.strip().lower(): v.strip() for k, _, v in (l.partition(":") for l in lines[1:])}
+    if headers.get("sec-websocket-accept") != accept_key(key):
+        sock.close()
+        raise WebSocketError("handshake failed: bad Sec-WebSocket-Accept")
+    return WebSocket(sock, rest)